@@ -0,0 +1,398 @@
+"""
+            eML_Benchmark of the eML system
+
+                 created on 10/19/2026
+    Copyright (c) 2026 Turtle Bay Geophysical LLC
+                ALL RIGHTS RESERVED.
+
+ Questions and comments can be directed to: Support@TurtleBayGeophysical.com
+
+  Licensed under the Attribution-NonCommercial-ShareAlike 4.0 International
+  (CC BY-NC-SA 4.0) (the "License"); you may not use this file except in
+  compliance with the License.
+
+  You may obtain a copy of the License at
+
+      https://creativecommons.org/licenses/by-nc-sa/4.0/
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+
+  Measures the load time, save time, time to save an unchanged file again, peak memory and file
+  size of eML files across a range of synthetic data shapes and sizes, in both the text eML and
+  the binary beML formats. Results are
+  written as JSON and optionally compared against a stored baseline so that performance
+  regressions are visible. The cold start time of importing eML is measured as well, along with a
+  check that importing eML does not import numpy.
+
+    python Benchmark/eML_Benchmark.py --sizes 1000 10000 --output results.json
+    python Benchmark/eML_Benchmark.py --baseline Benchmark/baseline.json
+    python Benchmark/eML_Benchmark.py --update-baseline Benchmark/baseline.json
+    python Benchmark/eML_Benchmark.py --formats text binary --shapes "large dict"
+    python Benchmark/eML_Benchmark.py --shapes primitives --import-budget 0.05
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eML import eML
+from _Table_eML import _Table_eML
+import eML_SyntheticData
+
+
+class eML_Benchmark:  # ======================================================== eML_Benchmark >>>
+  """
+  Runs the read/write benchmarks for each of the synthetic data shapes.
+  """
+
+  # sizes used for each shape when none are specified. The indentation of a text file grows with
+  # the nesting depth, so deep nesting has its own set of sizes.
+  default_sizes = [100, 1000, 10000]
+  default_depths = [10, 50, 200, 1000, 2000]
+
+  # metrics compared against the baseline
+  compared_metrics = ['save_s', 'resave_s', 'load_s', 'save_peak_bytes', 'load_peak_bytes',
+                      'file_bytes']
+
+  # timings below this many seconds are dominated by noise and are not compared
+  noise_floor_s = 0.005
+
+  # file formats benchmarked and the extension of their files
+  format_extensions = {'text': '.eml', 'binary': '.beml'}
+
+  def __init__(self, shapes: list = None, sizes: list = None, depths: list = None,
+               repeats: int = 3, workdir: str = None, formats: list = None):
+    """
+
+    :param shapes: names of the shapes to be benchmarked, all shapes if None
+    :param sizes: element counts used for every shape other than deep nesting
+    :param depths: nesting depths used for the deep nesting shape
+    :param repeats: number of timed repetitions, the best time is reported
+    :param workdir: directory the eML files are written to, a temporary directory if None
+    :param formats: file formats to be benchmarked, text only if None
+    """
+    self.shapes = shapes if shapes is not None else list(eML_SyntheticData.SHAPES.keys())
+    self.sizes = sizes if sizes is not None else self.default_sizes
+    self.depths = depths if depths is not None else self.default_depths
+    self.repeats = repeats
+    self.workdir = workdir
+    self.formats = formats if formats is not None else ['text']
+    pass
+
+  def run(self):  # ------------------------------------------------------------------------ run >>
+    """
+    Runs every shape at every size.
+
+    :return: dict holding the run meta data and a list of results
+    """
+    results = list()
+    with tempfile.TemporaryDirectory() as tmpdir:
+      workdir = self.workdir if self.workdir is not None else tmpdir
+      for shape in self.shapes:
+        sizes = self.depths if shape == 'deep nesting' else self.sizes
+        for size in sizes:
+          for fileformat in self.formats:
+            result = self.runCase(shape, size, workdir, fileformat)
+            results.append(result)
+            print('%-14s %8d %-6s  save %9.4fs  resave %9.4fs  load %9.4fs  %12d bytes' %
+                  (shape, size, fileformat, result['save_s'], result['resave_s'],
+                   result['load_s'], result['file_bytes']))
+
+    imports = self.runImport()
+    print('%-14s %8s %-6s  import %7.4fs  numpy imported %s' %
+          ('import eML', '', '', imports['import_s'], imports['numpy_imported']))
+
+    return {'meta': self._getMetaData(), 'results': results, 'import': imports}
+    pass
+
+  def runCase(self, shape: str, size: int, workdir: str,  # ---------------------------- runCase >>
+              fileformat: str = 'text'):
+    """
+    Benchmarks a single shape at a single size.
+
+    :param shape: name of the shape in eML_SyntheticData.SHAPES
+    :param size: element count (or nesting depth) passed to the generator
+    :param workdir: directory the eML file is written to
+    :param fileformat: file format to be benchmarked, text or binary
+    :return: dict of the measured metrics
+    """
+    entries = eML_SyntheticData.SHAPES[shape](size)
+    eml_filename = os.path.join(workdir, shape.replace(' ', '_') + '_' + str(size)
+                                + self.format_extensions[fileformat])
+
+    # every entry is encoded by each save, the unchanged entries are only copied when resaving
+    source = eML_SyntheticData.populate(eML(copy_unchanged=False), entries)
+
+    save_s = self._bestTime(lambda: source.save(eml_filename))
+    load_s = self._bestTime(lambda: eML(eml_filename))
+
+    resaved = eML(eml_filename)
+    resave_s = self._bestTime(lambda: resaved.save())
+
+    save_peak_bytes = self._peakMemory(lambda: source.save(eml_filename))
+    load_peak_bytes = self._peakMemory(lambda: eML(eml_filename))
+
+    loaded = eML(eml_filename)
+    verified = all(self._isEqual(value, loaded.eml_data.get(identifier))
+                   for setter, identifier, value in entries)
+
+    return {'shape': shape, 'size': size, 'format': fileformat, 'save_s': save_s,
+            'resave_s': resave_s, 'load_s': load_s, 'save_peak_bytes': save_peak_bytes, 'load_peak_bytes': load_peak_bytes,
+            'file_bytes': os.path.getsize(eml_filename), 'verified': verified}
+    pass
+
+  def runImport(self):  # ------------------------------------------------------------ runImport >>
+    """
+    Measures the cold start time of importing eML in a fresh interpreter with python -X importtime.
+    The bytecode is cached by the first run, so compiling the modules is not measured.
+
+    :return: dict of the fastest import time in seconds and whether numpy was imported
+    """
+    rootdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    env['PYTHONPATH'] = rootdir + os.pathsep + env.get('PYTHONPATH', '')
+    command = [sys.executable, '-X', 'importtime', '-c',
+               'import sys, eML; print("numpy" in sys.modules)']
+
+    import_s = None
+    numpy_imported = False
+    for ii in range(self.repeats + 1):
+      process = subprocess.run(command, env=env, cwd=rootdir, capture_output=True, text=True,
+                               check=True)
+      numpy_imported = process.stdout.strip() == 'True'
+      # each stderr line is "import time: self [us] | cumulative | module", eML is the last one
+      for line in process.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2].strip() == 'eML':
+          elapsed = int(fields[1]) / 1e6
+          # the first run caches the bytecode and is not counted
+          if ii > 0 and (import_s is None or elapsed < import_s):
+            import_s = elapsed
+    return {'import_s': import_s, 'numpy_imported': numpy_imported}
+    pass
+
+  @staticmethod
+  def compare(current: dict, baseline: dict, tolerance: float = 0.25):  # -------------- compare >>
+    """
+    Compares a set of results against a baseline.
+
+    :param current: results returned by run
+    :param baseline: results of a previous run
+    :param tolerance: allowed fractional increase of a metric before it is flagged
+    :return: list of (shape, size, format, metric, baseline value, current value, ratio)
+             regressions
+    """
+    # results written before the binary format was added are all text
+    baseline_results = dict()
+    for result in baseline['results']:
+      baseline_results[(result['shape'], result['size'], result.get('format', 'text'))] = result
+
+    regressions = list()
+    for result in current['results']:
+      key = (result['shape'], result['size'], result.get('format', 'text'))
+      if key not in baseline_results:
+        continue
+      for metric in eML_Benchmark.compared_metrics:
+        # baselines written before a metric was measured do not hold it
+        if metric not in baseline_results[key]:
+          continue
+        old = baseline_results[key][metric]
+        new = result[metric]
+        if metric.endswith('_s') and max(old, new) < eML_Benchmark.noise_floor_s:
+          continue
+        if old > 0 and new / old > 1.0 + tolerance:
+          regressions.append((key[0], key[1], key[2], metric, old, new, new / old))
+
+    # baselines written before the import time was measured have no import results
+    if 'import' in current and 'import' in baseline:
+      old = baseline['import']['import_s']
+      new = current['import']['import_s']
+      if old > 0 and new / old > 1.0 + tolerance:
+        regressions.append(('import eML', 0, '-', 'import_s', old, new, new / old))
+    return regressions
+    pass
+
+  @staticmethod
+  def speedups(current: dict):  # ----------------------------------------------------- speedups >>
+    """
+    Compares the binary format against the text format of the same run.
+
+    :param current: results returned by run
+    :return: list of (shape, size, save speedup, load speedup, size ratio) of binary over text
+    """
+    text_results = dict()
+    for result in current['results']:
+      if result.get('format', 'text') == 'text':
+        text_results[(result['shape'], result['size'])] = result
+
+    speedups = list()
+    for result in current['results']:
+      key = (result['shape'], result['size'])
+      if result.get('format') != 'binary' or key not in text_results:
+        continue
+      text = text_results[key]
+      speedups.append((key[0], key[1], text['save_s'] / max(result['save_s'], 1e-9),
+                       text['load_s'] / max(result['load_s'], 1e-9),
+                       result['file_bytes'] / max(text['file_bytes'], 1)))
+    return speedups
+    pass
+
+  def _bestTime(self, function):  # -------------------------------------------------- _bestTime >>
+    """
+    Times a function over a number of repetitions.
+
+    :param function: function to be timed
+    :return: the fastest of the repetitions in seconds
+    """
+    best = None
+    for ii in range(self.repeats):
+      start = time.perf_counter()
+      function()
+      elapsed = time.perf_counter() - start
+      if best is None or elapsed < best:
+        best = elapsed
+    return best
+    pass
+
+  def _getMetaData(self):  # ------------------------------------------------------ _getMetaData >>
+    """
+    :return: dict describing the environment the benchmark was run in
+    """
+    return {'date': datetime.today().strftime('%m/%d/%Y %H:%M:%S'),
+            'python': platform.python_version(), 'numpy': np.__version__,
+            'platform': platform.platform(), 'repeats': self.repeats}
+    pass
+
+  def _isEqual(self, expected, actual):  # -------------------------------------------- _isEqual >>
+    """
+    Checks that a value survived the round trip through the eML file. Containers are compared
+    from an explicit stack, as == recurses once per nesting level and fails on deep nesting.
+
+    :param expected: value that was written
+    :param actual: value that was read back
+    :return: True if the values are equal, False otherwise
+    """
+    stack = [(expected, actual)]
+    while len(stack) > 0:
+      expected, actual = stack.pop()
+      if isinstance(actual, _Table_eML):
+        if actual != _Table_eML.fromData(expected):
+          return False
+      elif isinstance(expected, np.ndarray):
+        if not (isinstance(actual, np.ndarray) and expected.shape == actual.shape
+                and bool(np.all(expected == actual))):
+          return False
+      elif isinstance(expected, dict):
+        if type(actual) is not dict or expected.keys() != actual.keys():
+          return False
+        stack.extend((value, actual[key]) for key, value in expected.items())
+      elif isinstance(expected, (list, tuple)):
+        if type(actual) is not type(expected) or len(actual) != len(expected):
+          return False
+        stack.extend(zip(expected, actual))
+      elif expected != actual:
+        return False
+    return True
+    pass
+
+  def _peakMemory(self, function):  # ---------------------------------------------- _peakMemory >>
+    """
+    Measures the peak python memory allocated whilst running a function.
+
+    :param function: function to be measured
+    :return: peak allocated bytes
+    """
+    tracemalloc.start()
+    try:
+      function()
+      current, peak = tracemalloc.get_traced_memory()
+    finally:
+      tracemalloc.stop()
+    return peak
+    pass
+
+
+def main(argv: list = None):  # ----------------------------------------------------------- main >>
+  """
+  command line entry point of the benchmark.
+
+  :param argv: command line arguments, sys.argv if None
+  :return: process exit code, 1 if regressions were found against the baseline
+  """
+  parser = argparse.ArgumentParser(description='eML read/write benchmarks')
+  parser.add_argument('--shapes', nargs='+', choices=list(eML_SyntheticData.SHAPES.keys()))
+  parser.add_argument('--sizes', nargs='+', type=int)
+  parser.add_argument('--depths', nargs='+', type=int)
+  parser.add_argument('--repeats', type=int, default=3)
+  parser.add_argument('--formats', nargs='+', choices=list(eML_Benchmark.format_extensions.keys()),
+                      default=['text', 'binary'])
+  parser.add_argument('--output', help='file the JSON results are written to')
+  parser.add_argument('--baseline', help='JSON results of a previous run to compare against')
+  parser.add_argument('--update-baseline', help='write the results as the new baseline')
+  parser.add_argument('--tolerance', type=float, default=0.25,
+                      help='allowed fractional increase before a metric is flagged')
+  parser.add_argument('--import-budget', type=float,
+                      help='seconds importing eML may take before it is flagged')
+  args = parser.parse_args(argv)
+
+  benchmark = eML_Benchmark(args.shapes, args.sizes, args.depths, args.repeats,
+                            formats=args.formats)
+  results = benchmark.run()
+
+  for shape, size, save_speedup, load_speedup, size_ratio in eML_Benchmark.speedups(results):
+    print('BINARY %-14s %8d  save x%6.2f  load x%6.2f  size x%5.2f' %
+          (shape, size, save_speedup, load_speedup, size_ratio))
+
+  for filename in [args.output, args.update_baseline]:
+    if filename is not None:
+      with open(filename, 'w') as file:
+        json.dump(results, file, indent=2)
+
+  exitcode = 0
+  if args.baseline is not None:
+    with open(args.baseline) as file:
+      baseline = json.load(file)
+    regressions = eML_Benchmark.compare(results, baseline, args.tolerance)
+    for shape, size, fileformat, metric, old, new, ratio in regressions:
+      print('REGRESSION %-14s %8d %-6s %-16s %14.6g -> %14.6g (x%.2f)' %
+            (shape, size, fileformat, metric, old, new, ratio))
+    if len(regressions) > 0:
+      exitcode = 1
+    else:
+      print('no regressions against ' + args.baseline)
+
+  imports = results['import']
+  if imports['numpy_imported']:
+    print('IMPORT importing eML imported numpy')
+    exitcode = 1
+  if args.import_budget is not None and imports['import_s'] > args.import_budget:
+    print('IMPORT importing eML took %.4fs, the budget is %.4fs' %
+          (imports['import_s'], args.import_budget))
+    exitcode = 1
+
+  unverified = [result for result in results['results'] if not result['verified']]
+  for result in unverified:
+    print('ROUND TRIP MISMATCH %-14s %8d %s' % (result['shape'], result['size'],
+                                                 result.get('format', 'text')))
+
+  return exitcode
+  pass
+
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,392 @@
+"""
+             eML_Scaling of the eML system
+
+                 created on 10/19/2026
+    Copyright (c) 2026 Turtle Bay Geophysical LLC
+                ALL RIGHTS RESERVED.
+
+ Questions and comments can be directed to: Support@TurtleBayGeophysical.com
+
+  Licensed under the Attribution-NonCommercial-ShareAlike 4.0 International
+  (CC BY-NC-SA 4.0) (the "License"); you may not use this file except in
+  compliance with the License.
+
+  You may obtain a copy of the License at
+
+      https://creativecommons.org/licenses/by-nc-sa/4.0/
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+
+
+  Measures how saving and loading scale with the size of the file, for capacity planning. Each of
+  the scaling shapes of eML_SyntheticData is written at each target file size and loaded again in
+  a fresh process, recording the time and the peak resident memory of the process. The growth of
+  each metric between successive sizes is reported as the exponent of a power law, 1 being linear,
+  and growth faster than linear is flagged.
+
+    python Benchmark/eML_Scaling.py
+    python Benchmark/eML_Scaling.py --sizes 1MB 4MB 16MB --shapes wide deep --output scaling.json
+    python Benchmark/eML_Scaling.py --sizes 10MB 100MB 1GB --formats text --timeout 3600
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eML import eML
+import eML_SyntheticData
+
+
+class eML_Scaling:  # ============================================================ eML_Scaling >>>
+  """
+  Runs every scaling shape at every file size, each save and load in a process of its own so that
+  its peak resident memory is not hidden by the cases run before it.
+  """
+
+  # target file sizes used when none are specified
+  default_sizes = ['10MB', '100MB', '1GB']
+
+  # metrics whose growth is checked. The peak memory of a save includes the generated data being
+  # saved, the memory of a load excludes the interpreter and the imported modules
+  scaled_metrics = ['save_s', 'load_s', 'save_peak_rss_bytes', 'load_rss_bytes']
+
+  # timings below this many seconds and memory below this many bytes are dominated by noise and
+  # their growth is not checked
+  noise_floor_s = 0.05
+  noise_floor_bytes = 16 * 1024 * 1024
+
+  # file formats measured and the extension of their files
+  format_extensions = {'text': '.eml', 'binary': '.beml'}
+
+  def __init__(self, shapes: list = None, sizes: list = None, formats: list = None,
+               seed: int = 0, workdir: str = None, timeout: float = None):
+    """
+
+    :param shapes: names of the shapes in eML_SyntheticData.SCALING_SHAPES, all of them if None
+    :param sizes: target file sizes such as 10MB or 1GB, see eML_SyntheticData.parseSize
+    :param formats: file formats to be measured, text and binary if None
+    :param seed: seed of the generated data
+    :param workdir: directory the files are written to, a temporary directory if None
+    :param timeout: seconds a single save or load may take before it is abandoned, None waits
+    """
+    self.shapes = shapes if shapes is not None else list(eML_SyntheticData.SCALING_SHAPES.keys())
+    self.sizes = sizes if sizes is not None else self.default_sizes
+    self.formats = formats if formats is not None else ['text', 'binary']
+    self.seed = seed
+    self.workdir = workdir
+    self.timeout = timeout
+    pass
+
+  def run(self):  # ------------------------------------------------------------------------ run >>
+    """
+    Runs every shape in every format at every size. Once a size fails, for instance when the
+    process runs out of memory, the larger sizes of the same shape and format are skipped.
+
+    :return: dict holding the run meta data, a list of results and the scaling of each metric
+    """
+    results = list()
+    with tempfile.TemporaryDirectory() as tmpdir:
+      workdir = self.workdir if self.workdir is not None else tmpdir
+      for shape in self.shapes:
+        for fileformat in self.formats:
+          for size in sorted(self.sizes, key=eML_SyntheticData.parseSize):
+            result = self.runCase(shape, size, workdir, fileformat)
+            results.append(result)
+            if 'error' in result:
+              print('%-10s %-6s %7s  failed: %s' % (shape, fileformat, size, result['error']))
+              break
+            print('%-10s %-6s %7s  %12d bytes  save %9.3fs %8.1f MB  load %9.3fs %8.1f MB' %
+                  (shape, fileformat, size, result['file_bytes'], result['save_s'],
+                   toMegabytes(result['save_peak_rss_bytes']), result['load_s'],
+                   toMegabytes(result['load_rss_bytes'])))
+
+    return {'meta': self._getMetaData(), 'results': results,
+            'scaling': eML_Scaling.getScaling(results)}
+    pass
+
+  def runCase(self, shape: str, size: str, workdir: str,  # ---------------------------- runCase >>
+              fileformat: str = 'text'):
+    """
+    Writes and loads a single shape at a single target size, the file is removed afterwards.
+
+    :param shape: name of the shape in eML_SyntheticData.SCALING_SHAPES
+    :param size: target file size such as 10MB
+    :param workdir: directory the file is written to
+    :param fileformat: file format to be measured, text or binary
+    :return: dict of the measured metrics, holding an error instead when the save or load failed
+    """
+    eml_filename = os.path.join(workdir, shape.replace(' ', '_') + '_' + size
+                                + self.format_extensions[fileformat])
+    result = {'shape': shape, 'size': size, 'format': fileformat,
+              'target_bytes': eML_SyntheticData.parseSize(size)}
+    try:
+      result['generated_size'] = eML_SyntheticData.getScaledSize(
+        shape, result['target_bytes'], self.seed, fileformat == 'binary')
+      saved = self._measure(['save', shape, str(result['generated_size']), str(self.seed),
+                             eml_filename])
+      if 'error' not in saved:
+        result['file_bytes'] = os.path.getsize(eml_filename)
+        loaded = self._measure(['load', eml_filename])
+        saved.update(loaded)
+      result.update(saved)
+    finally:
+      if os.path.exists(eml_filename):
+        os.remove(eml_filename)
+    return result
+    pass
+
+  @staticmethod
+  def getScaling(results: list):  # ------------------------------------------------- getScaling >>
+    """
+    Fits how each metric grows with the file size. Between each pair of successive sizes the
+    growth is the exponent of a power law through both points, log(metric ratio) / log(file size
+    ratio), so 1 is linear growth and 2 quadratic growth.
+
+    :param results: results returned by runCase
+    :return: list of dicts of the shape, format and metric along with the exponent of each pair of
+             successive sizes, the exponent fitted across every size, and whether any pair grew
+             faster than linear
+    """
+    curves = dict()
+    for result in results:
+      if 'error' not in result:
+        curves.setdefault((result['shape'], result['format']), list()).append(result)
+
+    scaling = list()
+    for (shape, fileformat), curve in curves.items():
+      curve.sort(key=lambda result: result['file_bytes'])
+      for metric in eML_Scaling.scaled_metrics:
+        floor = eML_Scaling.noise_floor_s if metric.endswith('_s') else \
+          eML_Scaling.noise_floor_bytes
+        points = [(result['file_bytes'], result[metric]) for result in curve
+                  if result[metric] is not None and result[metric] > 0]
+        if len(points) < 2:
+          continue
+
+        exponents = list()
+        for (bytes_a, value_a), (bytes_b, value_b) in zip(points[:-1], points[1:]):
+          if bytes_b <= bytes_a or min(value_a, value_b) < floor:
+            exponents.append(None)
+          else:
+            exponents.append(math.log(value_b / value_a) / math.log(bytes_b / bytes_a))
+
+        logbytes = np.log([point[0] for point in points])
+        logvalues = np.log([point[1] for point in points])
+        fitted = float(np.polyfit(logbytes, logvalues, 1)[0]) if np.ptp(logbytes) > 0 else None
+
+        scaling.append({'shape': shape, 'format': fileformat, 'metric': metric,
+                        'exponents': exponents, 'fitted_exponent': fitted,
+                        'superlinear': False})
+    return scaling
+    pass
+
+  @staticmethod
+  def flagSuperlinear(scaling: list, tolerance: float = 0.2):  # --------------- flagSuperlinear >>
+    """
+    Flags the metrics that grew faster than linear between any pair of successive sizes.
+
+    :param scaling: scaling returned by getScaling, the superlinear entry of each is set
+    :param tolerance: exponent above 1 allowed before growth is flagged, timings are noisy
+    :return: list of the flagged scaling dicts
+    """
+    flagged = list()
+    for curve in scaling:
+      curve['superlinear'] = any(exponent is not None and exponent > 1.0 + tolerance
+                                 for exponent in curve['exponents'])
+      if curve['superlinear']:
+        flagged.append(curve)
+    return flagged
+    pass
+
+  @staticmethod
+  def printCurves(results: list):  # ----------------------------------------------- printCurves >>
+    """
+    Prints the time and memory per MB of each shape and format at each size. A linear curve keeps
+    the same time and memory per MB as the file grows, so the bars stay the same length.
+
+    :param results: results returned by runCase
+    """
+    curves = dict()
+    for result in results:
+      if 'error' not in result:
+        curves.setdefault((result['shape'], result['format']), list()).append(result)
+
+    for (shape, fileformat), curve in curves.items():
+      curve.sort(key=lambda result: result['file_bytes'])
+      print()
+      print('%s %s' % (shape, fileformat))
+      print('  %10s  %10s  %10s  %11s  %11s  load time per MB' %
+            ('file MB', 'save s/MB', 'load s/MB', 'save RSS/MB', 'load RSS/MB'))
+      megabytes = [result['file_bytes'] / 2 ** 20 for result in curve]
+      perload = [result['load_s'] / mb for result, mb in zip(curve, megabytes)]
+      longest = max(perload)
+      for result, mb, load in zip(curve, megabytes, perload):
+        bar = '#' * max(int(round(40 * load / longest)), 1) if longest > 0 else ''
+        print('  %10.1f  %10.4f  %10.4f  %11.2f  %11.2f  %s' %
+              (mb, result['save_s'] / mb, load, toMegabytes(result['save_peak_rss_bytes']) / mb,
+               toMegabytes(result['load_rss_bytes']) / mb, bar))
+    pass
+
+  def _getMetaData(self):  # ------------------------------------------------------ _getMetaData >>
+    """
+    :return: dict describing the environment the measurements were made in
+    """
+    return {'date': datetime.today().strftime('%m/%d/%Y %H:%M:%S'),
+            'python': platform.python_version(), 'numpy': np.__version__,
+            'platform': platform.platform(), 'cpus': os.cpu_count(), 'seed': self.seed}
+    pass
+
+  def _measure(self, arguments: list):  # --------------------------------------------- _measure >>
+    """
+    Runs a save or load in a fresh process, see measure.
+
+    :param arguments: the arguments of measure
+    :return: dict of the measured metrics, or of the error when the process failed
+    """
+    command = [sys.executable, os.path.abspath(__file__), '--measure'] + arguments
+    try:
+      process = subprocess.run(command, capture_output=True, text=True, timeout=self.timeout)
+    except subprocess.TimeoutExpired:
+      return {'error': 'timed out after ' + str(self.timeout) + 's'}
+    if process.returncode != 0:
+      lines = process.stderr.strip().splitlines()
+      if process.returncode < 0:
+        return {'error': 'killed by signal ' + str(-process.returncode)
+                         + ', the process probably ran out of memory'}
+      return {'error': lines[-1] if len(lines) > 0 else 'exit code ' + str(process.returncode)}
+    return json.loads(process.stdout.strip().splitlines()[-1])
+    pass
+
+
+def getPeakRSS():  # ---------------------------------------------------------------- getPeakRSS >>
+  """
+  Gets the peak resident memory of this process so far.
+
+  :return: peak resident bytes, None on platforms without the resource module
+  """
+  try:
+    import resource
+  except ImportError:
+    return None
+  peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  # linux reports kilobytes and macOS bytes
+  return peak if sys.platform == 'darwin' else peak * 1024
+  pass
+
+
+def getCurrentRSS():  # ---------------------------------------------------------- getCurrentRSS >>
+  """
+  Gets the resident memory of this process now, which can be below its peak.
+
+  :return: resident bytes, the peak resident bytes where the current ones can not be read
+  """
+  try:
+    with open('/proc/self/statm') as file:
+      return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+  except (OSError, ValueError, AttributeError):
+    return getPeakRSS()
+  pass
+
+
+def toMegabytes(nbytes: int):  # --------------------------------------------------- toMegabytes >>
+  """
+  :param nbytes: number of bytes, None where memory can not be measured
+  :return: number of megabytes, nan if nbytes is None
+  """
+  return float('nan') if nbytes is None else nbytes / 2 ** 20
+  pass
+
+
+def measure(arguments: list):  # ------------------------------------------------------- measure >>
+  """
+  Measures a single save or load within this process and prints the metrics as JSON. The peak
+  resident memory of a save is that of the whole process, as the generated data is held whilst it
+  is saved. The memory held as a load starts is subtracted from its peak.
+
+    save shape generated_size seed eml_filename
+    load eml_filename
+
+  :param arguments: the operation followed by its arguments
+  """
+  if arguments[0] == 'save':
+    shape, size, seed, eml_filename = arguments[1:]
+    generator = eML_SyntheticData.SCALING_SHAPES[shape]
+    eml = eML_SyntheticData.populate(eML(), generator(int(size), int(seed)))
+    start = time.perf_counter()
+    eml.save(eml_filename, eml_filename.endswith('.beml'))
+    metrics = {'save_s': time.perf_counter() - start,
+               'save_peak_rss_bytes': getPeakRSS()}
+  else:
+    eml_filename = arguments[1]
+    before = getCurrentRSS()
+    start = time.perf_counter()
+    eML(eml_filename)
+    metrics = {'load_s': time.perf_counter() - start, 'load_peak_rss_bytes': getPeakRSS()}
+    metrics['load_rss_bytes'] = None if before is None else metrics['load_peak_rss_bytes'] - before
+  print(json.dumps(metrics))
+  pass
+
+
+def main(argv: list = None):  # ----------------------------------------------------------- main >>
+  """
+  command line entry point of the scaling harness.
+
+  :param argv: command line arguments, sys.argv if None
+  :return: process exit code, 1 if any metric grew faster than linear
+  """
+  parser = argparse.ArgumentParser(description='eML file size scaling')
+  parser.add_argument('--shapes', nargs='+',
+                      choices=list(eML_SyntheticData.SCALING_SHAPES.keys()))
+  parser.add_argument('--sizes', nargs='+', help='target file sizes, e.g. 10MB 100MB 1GB')
+  parser.add_argument('--formats', nargs='+', choices=list(eML_Scaling.format_extensions.keys()))
+  parser.add_argument('--seed', type=int, default=0)
+  parser.add_argument('--workdir', help='directory the files are written to')
+  parser.add_argument('--timeout', type=float, help='seconds a single save or load may take')
+  parser.add_argument('--tolerance', type=float, default=0.2,
+                      help='exponent above linear allowed before growth is flagged')
+  parser.add_argument('--output', help='file the JSON results are written to')
+  parser.add_argument('--measure', nargs='+', help=argparse.SUPPRESS)
+  args = parser.parse_args(argv)
+
+  if args.measure is not None:
+    measure(args.measure)
+    return 0
+
+  scaling = eML_Scaling(args.shapes, args.sizes, args.formats, args.seed, args.workdir,
+                        args.timeout)
+  results = scaling.run()
+  eML_Scaling.printCurves(results['results'])
+  flagged = eML_Scaling.flagSuperlinear(results['scaling'], args.tolerance)
+
+  if args.output is not None:
+    with open(args.output, 'w') as file:
+      json.dump(results, file, indent=2)
+
+  print()
+  for curve in flagged:
+    exponents = ', '.join('-' if exponent is None else '%.2f' % exponent
+                          for exponent in curve['exponents'])
+    print('SUPERLINEAR %-10s %-6s %-15s exponents %s' %
+          (curve['shape'], curve['format'], curve['metric'], exponents))
+  if len(flagged) == 0:
+    print('every metric grew linearly or slower')
+  return 1 if len(flagged) > 0 else 0
+  pass
+
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,513 @@
+"""
+          eML_SyntheticData of the eML system
+
+                 created on 10/19/2026
+    Copyright (c) 2026 Turtle Bay Geophysical LLC
+                ALL RIGHTS RESERVED.
+
+ Questions and comments can be directed to: Support@TurtleBayGeophysical.com
+
+  Licensed under the Attribution-NonCommercial-ShareAlike 4.0 International
+  (CC BY-NC-SA 4.0) (the "License"); you may not use this file except in
+  compliance with the License.
+
+  You may obtain a copy of the License at
+
+      https://creativecommons.org/licenses/by-nc-sa/4.0/
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+
+  The generators build the data of each shape for the benchmarks. generateFile scales a shape up to
+  a target file size and writes it, so that the same shape, size and seed always produce the same
+  file:
+
+    python Benchmark/eML_SyntheticData.py wide.eml --shape wide --size 100MB
+    python Benchmark/eML_SyntheticData.py huge.beml --shape "few huge" --size 1GB --seed 3
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eML import eML
+
+
+def makePrimitives(size: int, seed: int = 0):  # -------------------------------- makePrimitives >>
+  """
+  Generates size top level entries cycling through each of the primitive types.
+
+  :param size: number of top level entries
+  :param seed: seed of the random generator so that the data is reproducible
+  :return: list of (setter name, identifier, value) tuples
+  """
+  rng = random.Random(seed)
+  start = datetime(2024, 7, 28, 16, 13, 20, 603820)
+
+  entries = list()
+  for ii in range(size):
+    match ii % 7:
+      case 0:
+        entries.append(('setBoolean', 'bool ' + str(ii), rng.random() < 0.5))
+      case 1:
+        entries.append(('setInt', 'int ' + str(ii), rng.randint(-10 ** 9, 10 ** 9)))
+      case 2:
+        entries.append(('setFloat', 'float ' + str(ii), rng.uniform(-1e6, 1e6)))
+      case 3:
+        entries.append(('setComplex', 'complex ' + str(ii),
+                        complex(rng.uniform(-1, 1), rng.uniform(-1, 1))))
+      case 4:
+        entries.append(('setString', 'string ' + str(ii), 'value number ' + str(ii)))
+      case 5:
+        entries.append(('setDate', 'date ' + str(ii),
+                        (start + timedelta(days=rng.randint(0, 3650))).date()))
+      case 6:
+        entries.append(('setDateTime', 'datetime ' + str(ii),
+                        start + timedelta(seconds=rng.uniform(0, 1e8))))
+  return entries
+  pass
+
+
+def makeWideList(size: int, seed: int = 0):  # ------------------------------------ makeWideList >>
+  """
+  Generates a single flat list of size mixed primitive elements.
+
+  :param size: number of elements in the list
+  :param seed: seed of the random generator so that the data is reproducible
+  :return: list of (setter name, identifier, value) tuples
+  """
+  rng = random.Random(seed)
+  values = list()
+  for ii in range(size):
+    match ii % 3:
+      case 0:
+        values.append(rng.randint(-10 ** 6, 10 ** 6))
+      case 1:
+        values.append(rng.uniform(-1e6, 1e6))
+      case 2:
+        values.append('element ' + str(ii))
+  return [('setList', 'wide list', values)]
+  pass
+
+
+def makeNumericList(size: int, seed: int = 0):  # ------------------------------ makeNumericList >>
+  """
+  Generates an int list and a float list each holding size elements, which are written in the
+  compact single line form.
+
+  :param size: number of elements in each list
+  :param seed: seed of the random generator so that the data is reproducible
+  :return: list of (setter name, identifier, value) tuples
+  """
+  rng = random.Random(seed)
+  intlist = [rng.randint(-10 ** 6, 10 ** 6) for ii in range(size)]
+  floatlist = [rng.uniform(-1e6, 1e6) for ii in range(size)]
+  return [('setList', 'int list', intlist), ('setList', 'float list', floatlist)]
+  pass
+
+
+def makeDeepNesting(size: int, seed: int = 0):  # ------------------------------ makeDeepNesting >>
+  """
+  Generates a single dict nested size levels deep. Every level holds a few primitives alongside
+  the next level.
+
+  :param size: nesting depth of the dict
+  :param seed: seed of the random generator so that the data is reproducible
+  :return: list of (setter name, identifier, value) tuples
+  """
+  rng = random.Random(seed)
+  nested = {'leaf': rng.randint(0, 100)}
+  for ii in range(size - 1):
+    nested = {'level': ii, 'scale': rng.uniform(0, 1), 'child': nested}
+  return [('setDict', 'deep dict', nested)]
+  pass
+
+
+def makeLargeDict(size: int, seed: int = 0):  # ---------------------------------- makeLargeDict >>
+  """
+  Generates a single dict of size records, each of which is a small dict of mixed primitives.
+
+  :param size: number of keys in the dict
+  :param seed: seed of the random generator so that the data is reproducible
+  :return: list of (setter name, identifier, value) tuples
+  """
+  rng = random.Random(seed)
+  dictout = dict()
+  for ii in range(size):
+    dictout['key ' + str(ii)] = {'a': rng.randint(0, 10 ** 6), 'b': rng.uniform(0, 1),
+                                 'c': 'record ' + str(ii)}
+  return [('setDict', 'large dict', dictout)]
+  pass
+
+
+def makeLookupTable(size: int, seed: int = 0):  # ------------------------------ makeLookupTable >>
+  """
+  Generates a str -> float and an int -> int dict each holding size pairs, which are written in the
+  compact single line form.
+
+  :param size: number of pairs in each dict
+  :param seed: seed of the random generator so that the data is reproducible
+  :return: list of (setter name, identifier, value) tuples
+  """
+  rng = random.Random(seed)
+  strfloat = {'key ' + str(ii): rng.uniform(0, 1) for ii in range(size)}
+  intint = {ii: rng.randint(-10 ** 6, 10 ** 6) for ii in range(size)}
+  return [('setDict', 'str float', strfloat), ('setDict', 'int int', intint)]
+  pass
+
+
+def makeNumericArray(size: int, seed: int = 0):  # ---------------------------- makeNumericArray >>
+  """
+  Generates an int64 and a float64 array each holding size elements.
+
+  :param size: number of elements in each array
+  :param seed: seed of the random generator so that the data is reproducible
+  :return: list of (setter name, identifier, value) tuples
+  """
+  rng = np.random.default_rng(seed)
+  intarray = rng.integers(-10 ** 6, 10 ** 6, size=size, dtype=np.int64)
+  if size % 100 == 0:
+    intarray = intarray.reshape([size // 100, 100])
+  floatarray = rng.standard_normal(size)
+  return [('setArray', 'int array', intarray), ('setArray', 'float array', floatarray)]
+  pass
+
+
+def makeObjectArray(size: int, seed: int = 0):  # ------------------------------ makeObjectArray >>
+  """
+  Generates an object array of size mixed primitive elements.
+
+  :param size: number of elements in the array
+  :param seed: seed of the random generator so that the data is reproducible
+  :return: list of (setter name, identifier, value) tuples
+  """
+  rng = random.Random(seed)
+  arrayout = np.zeros(size, dtype=object)
+  for ii in range(size):
+    match ii % 3:
+      case 0:
+        arrayout[ii] = rng.randint(-10 ** 6, 10 ** 6)
+      case 1:
+        arrayout[ii] = rng.uniform(-1e6, 1e6)
+      case 2:
+        arrayout[ii] = 'element ' + str(ii)
+  return [('setArray', 'object array', arrayout)]
+  pass
+
+
+def makeRecordArray(size: int, seed: int = 0):  # ------------------------------ makeRecordArray >>
+  """
+  Generates a structured array of size trace headers mixing int32, float64 and fixed width string
+  fields.
+
+  :param size: number of records in the array
+  :param seed: seed of the random generator so that the data is reproducible
+  :return: list of (setter name, identifier, value) tuples
+  """
+  rng = np.random.default_rng(seed)
+  headers = np.zeros(size, dtype=[('trace', '<i4'), ('offset', '<f8'), ('x', '<f8'), ('y', '<f8'),
+                                  ('line', '<U12')])
+  headers['trace'] = np.arange(size)
+  headers['offset'] = rng.uniform(0, 5000, size)
+  headers['x'] = rng.uniform(0, 1e5, size)
+  headers['y'] = rng.uniform(0, 1e5, size)
+  headers['line'] = ['line ' + str(ii % 100) for ii in range(size)]
+  return [('setArray', 'trace headers', headers)]
+  pass
+
+
+def makeRecordList(size: int, seed: int = 0):  # -------------------------------- makeRecordList >>
+  """
+  Generates a list of size homogeneous records, each of which is a small dict of primitives.
+
+  :param size: number of records
+  :param seed: seed of the random generator so that the data is reproducible
+  :return: list of (setter name, identifier, value) tuples
+  """
+  return [('setList', 'records', _makeRecords(size, seed))]
+  pass
+
+
+def makeRecordTable(size: int, seed: int = 0):  # ------------------------------ makeRecordTable >>
+  """
+  Generates the same records as makeRecordList stored column-wise as a table. The columns are only
+  decoded when they are accessed, so the load time excludes decoding them.
+
+  :param size: number of records
+  :param seed: seed of the random generator so that the data is reproducible
+  :return: list of (setter name, identifier, value) tuples
+  """
+  return [('setTable', 'records', _makeRecords(size, seed))]
+  pass
+
+
+def _makeRecords(size: int, seed: int):  # ---------------------------------------- _makeRecords >>
+  """
+  Generates size homogeneous records.
+
+  :param size: number of records
+  :param seed: seed of the random generator so that the data is reproducible
+  :return: list of dicts sharing the same keys
+  """
+  rng = random.Random(seed)
+  return [{'station': 'station ' + str(ii), 'x': rng.uniform(0, 1e5), 'y': rng.uniform(0, 1e5),
+           'elevation': rng.randint(-100, 3000), 'active': rng.random() < 0.5}
+          for ii in range(size)]
+  pass
+
+
+def makeManySmall(size: int, seed: int = 0):  # ---------------------------------- makeManySmall >>
+  """
+  Generates size small top level entries cycling through the primitive types, the containers and
+  short arrays.
+
+  :param size: number of top level entries
+  :param seed: seed of the random generator so that the data is reproducible
+  :return: list of (setter name, identifier, value) tuples
+  """
+  rng = random.Random(seed)
+  primitives = makePrimitives(size, seed)
+  entries = list()
+  for ii in range(size):
+    match ii % 13:
+      case 7:
+        entries.append(('setList', 'list ' + str(ii), [ii, 'element ' + str(ii), rng.random()]))
+      case 8:
+        # str hashes are randomized per process, so sets only hold ints to keep their order
+        entries.append(('setSet', 'set ' + str(ii), {ii, ii + 1, -ii - 1}))
+      case 9:
+        entries.append(('setTuple', 'tuple ' + str(ii), (rng.random(), rng.random())))
+      case 10:
+        entries.append(('setFrozenSet', 'frozenset ' + str(ii), frozenset({ii, -ii - 1})))
+      case 11:
+        entries.append(('setDict', 'dict ' + str(ii), {'a': ii, 'b': [rng.random(), 'b']}))
+      case 12:
+        entries.append(('setArray', 'array ' + str(ii),
+                        np.arange(ii % 16 + 1, dtype=np.int32).reshape(-1, 1)))
+      case _:
+        entries.append(primitives[ii])
+  return entries
+  pass
+
+
+def makeFewHuge(size: int, seed: int = 0):  # -------------------------------------- makeFewHuge >>
+  """
+  Generates a handful of top level entries that each grow with size, a numeric array, a compact
+  int list, a structured array and a table.
+
+  :param size: number of elements in the array and the list, the structured array and the table
+               hold a quarter as many records
+  :param seed: seed of the random generator so that the data is reproducible
+  :return: list of (setter name, identifier, value) tuples
+  """
+  rng = random.Random(seed)
+  return (makeNumericArray(size, seed)[1:]
+          + [('setList', 'int list', [rng.randint(-10 ** 6, 10 ** 6) for ii in range(size)])]
+          + makeRecordArray(max(size // 4, 1), seed) + makeRecordTable(max(size // 4, 1), seed))
+  pass
+
+
+def makeWide(size: int, seed: int = 0):  # -------------------------------------------- makeWide >>
+  """
+  Generates a dict of size small records alongside a flat list of size mixed primitives, a few
+  top level entries each holding many elements one level deep.
+
+  :param size: number of records in the dict and of elements in the list
+  :param seed: seed of the random generator so that the data is reproducible
+  :return: list of (setter name, identifier, value) tuples
+  """
+  return makeLargeDict(size, seed) + makeWideList(size, seed)
+  pass
+
+
+def makeDeep(size: int, seed: int = 0, depth: int = 24):  # --------------------------- makeDeep >>
+  """
+  Generates a list of size dicts each nested depth levels deep, see makeDeepNesting.
+
+  :param size: number of nested dicts in the list
+  :param seed: seed of the random generator so that the data is reproducible
+  :param depth: nesting depth of each dict
+  :return: list of (setter name, identifier, value) tuples
+  """
+  rng = random.Random(seed)
+  values = list()
+  for ii in range(size):
+    nested = {'leaf': ii}
+    for level in range(depth - 1):
+      nested = {'level': level, 'scale': rng.uniform(0, 1), 'child': nested}
+    values.append(nested)
+  return [('setList', 'deep list', values)]
+  pass
+
+
+# each of the data shapes along with the generator used to create it
+SHAPES = {
+  'primitives': makePrimitives,
+  'wide list': makeWideList,
+  'numeric list': makeNumericList,
+  'deep nesting': makeDeepNesting,
+  'large dict': makeLargeDict,
+  'lookup table': makeLookupTable,
+  'numeric array': makeNumericArray,
+  'object array': makeObjectArray,
+  'record array': makeRecordArray,
+  'record list': makeRecordList,
+  'record table': makeRecordTable,
+}
+
+
+def populate(eml, entries):  # -------------------------------------------------------- populate >>
+  """
+  Sets each of the generated entries on an eML instance.
+
+  :param eml: eML instance to be populated
+  :param entries: list of (setter name, identifier, value) tuples from one of the generators
+  :return: the populated eML instance
+  """
+  for setter, identifier, value in entries:
+    getattr(eml, setter)(identifier, value)
+  return eml
+  pass
+
+
+# the shapes used for scaling to a target file size, each covering a different structure
+SCALING_SHAPES = {
+  'many small': makeManySmall,
+  'few huge': makeFewHuge,
+  'wide': makeWide,
+  'deep': makeDeep,
+}
+
+# header dates written to generated files so that they are reproducible byte for byte
+_GENERATED_DATE = datetime(2024, 7, 28, 16, 13, 20, 603820)
+
+# sizes the bytes per unit of size of a shape are first measured at, and the file size they are
+# measured at again before the shape is scaled to a target size
+_CALIBRATION_SIZE = 100
+_CALIBRATION_BYTES = 1024 * 1024
+
+
+def generateFile(eml_filename: str, shape: str, target_bytes: int,  # ------------- generateFile >>
+                 seed: int = 0, binary: bool = None):
+  """
+  Writes a synthetic file of one of the shapes close to a target size. The same shape, target,
+  seed and format always produce the same file.
+
+  :param eml_filename: the eml filename to be written
+  :param shape: name of the shape in SCALING_SHAPES or SHAPES
+  :param target_bytes: the size of the file aimed for
+  :param seed: seed of the random generator so that the data is reproducible
+  :param binary: write the binary beML format, None uses beML for filenames ending in .beml
+  :return: the size passed to the generator of the shape
+  """
+  if binary is None:
+    binary = eml_filename.lower().endswith('.beml')
+  size = getScaledSize(shape, target_bytes, seed, binary)
+  _writeFile(eML(), _getGenerator(shape)(size, seed), eml_filename, binary)
+  return size
+  pass
+
+
+def getScaledSize(shape: str, target_bytes: int, seed: int = 0,  # --------------- getScaledSize >>
+                  binary: bool = False):
+  """
+  Gets the size a shape is generated at to write a file close to a target size. The shape is
+  written at a small size to estimate its bytes per unit of size, and again at the size estimated
+  to write about a megabyte, which leaves out the fixed overhead of the file. The bytes per unit
+  measured are then scaled up to the target.
+
+  :param shape: name of the shape in SCALING_SHAPES or SHAPES
+  :param target_bytes: the size of the file aimed for
+  :param seed: seed of the random generator so that the data is reproducible
+  :param binary: measure the binary beML format rather than text
+  :return: the size to be passed to the generator of the shape
+  """
+  generator = _getGenerator(shape)
+  size = _CALIBRATION_SIZE
+  with tempfile.TemporaryDirectory() as tmpdir:
+    calibration_filename = os.path.join(tmpdir, 'calibration')
+    for target in (_CALIBRATION_BYTES, target_bytes):
+      _writeFile(eML(), generator(size, seed), calibration_filename, binary)
+      bytes_per_unit = os.path.getsize(calibration_filename) / size
+      size = max(int(min(target, target_bytes) / bytes_per_unit), 1)
+  return size
+  pass
+
+
+def _getGenerator(shape: str):  # ------------------------------------------------ _getGenerator >>
+  """
+  :param shape: name of the shape in SCALING_SHAPES or SHAPES
+  :return: the generator of the shape
+  """
+  generator = SCALING_SHAPES.get(shape, SHAPES.get(shape))
+  if generator is None:
+    raise Exception('eML_SyntheticData error: unknown shape ' + shape)
+  return generator
+  pass
+
+
+def _writeFile(eml, entries: list, eml_filename: str, binary: bool):  # ------------- _writeFile >>
+  """
+  Populates an eML instance with generated entries and writes it with fixed header dates.
+
+  :param eml: the eML instance to be populated
+  :param entries: list of (setter name, identifier, value) tuples from one of the generators
+  :param eml_filename: the eml filename to be written
+  :param binary: write the binary beML format
+  """
+  populate(eml, entries)
+  eml.eml_meta_data['creation date'] = _GENERATED_DATE
+  eml.eml_meta_data['last update'] = _GENERATED_DATE
+  eml.save(eml_filename, binary)
+  pass
+
+
+def parseSize(text: str):  # --------------------------------------------------------- parseSize >>
+  """
+  Parses a file size such as 500KB, 10MB or 1GB, plain numbers are bytes.
+
+  :param text: the file size
+  :return: number of bytes
+  """
+  units = {'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+  text = text.strip().upper()
+  for unit, scale in units.items():
+    if text.endswith(unit):
+      return int(float(text[:-len(unit)]) * scale)
+  return int(text)
+  pass
+
+
+def main(argv: list = None):  # ----------------------------------------------------------- main >>
+  """
+  command line entry point of the generator.
+
+  :param argv: command line arguments, sys.argv if None
+  :return: process exit code
+  """
+  parser = argparse.ArgumentParser(description='writes reproducible synthetic eML files')
+  parser.add_argument('eml_filename', help='file to be written, beML for names ending in .beml')
+  parser.add_argument('--shape', default='wide',
+                      choices=list(SCALING_SHAPES.keys()) + list(SHAPES.keys()))
+  parser.add_argument('--size', default='10MB', help='target file size, e.g. 500KB, 10MB or 1GB')
+  parser.add_argument('--seed', type=int, default=0)
+  args = parser.parse_args(argv)
+
+  size = generateFile(args.eml_filename, args.shape, parseSize(args.size), args.seed)
+  print('%s: %s of size %d, %d bytes' % (args.eml_filename, args.shape, size,
+                                         os.path.getsize(args.eml_filename)))
+  return 0
+  pass
+
+
+if __name__ == "__main__":
+  sys.exit(main())
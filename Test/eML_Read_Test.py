@@ -21,6 +21,13 @@
   See the License for the specific language governing permissions and
   limitations under the License.
 """
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+import numpy as np
+
 from eML import eML
 
 
@@ -42,6 +49,374 @@ class eML_Read_Test:
     iii=0
     pass
 
+  def testInstrumentedReads(self):
+    eml_filename = os.path.join(os.path.dirname(__file__), 'complexcontainer.eml')
+    hooked = list()
+    eml = eML(eml_filename, stats_hook=hooked.append)
+    stats = eml.getStats()['load']
+    assert hooked == [stats]
+    assert set(stats.phases) == {'io', 'tokenize', 'decode'}
+    assert stats.counters['lines'] == 50
+    assert stats.entry_types['dict'] == 12
+    assert stats.max_depth == 4
+    assert set(stats.identifier_times) == {'complex list 1', 'complex dict 1'}
+
+    assert eML(eml_filename).getStats() == {'load': None, 'save': None}
+    pass
+
+  def testCachedReads(self):
+    eml_filename = os.path.join(os.path.dirname(__file__), 'complexcontainer.eml')
+    eML.clearCache()
+    first = eML(eml_filename, use_cache=True)
+    second = eML(eml_filename, use_cache=True)
+    stats = eML.getCacheStats()
+    assert stats['hits'] == 1 and stats['misses'] == 1
+
+    # values handed out by one instance must not leak into the cache
+    second.getList('complex list 1')[0].append(666)
+    assert eML(eml_filename, use_cache=True).getList('complex list 1')[0] == [1, 2, 34, 4]
+    assert first.getDict('complex dict 1') == eML(eml_filename).getDict('complex dict 1')
+
+    # nor may values changed through eml_data directly, by the instance that filled the cache or
+    # by one loaded from it
+    first.eml_data['complex list 1'][0].append(99)
+    second.eml_data['complex dict 1'].clear()
+    third = eML(eml_filename, use_cache=True)
+    assert third.getList('complex list 1')[0] == [1, 2, 34, 4]
+    assert third.getDict('complex dict 1') == eML(eml_filename).getDict('complex dict 1')
+    assert eML.getCacheStats()['hits'] == 3
+
+    # the instance that filled the cache keeps writable arrays, cached arrays are read-only views
+    array_filename = os.path.join(os.path.dirname(__file__), 'cachedarray.eml')
+    eml = eML()
+    eml.setArray('samples', np.arange(4.0))
+    eml.saveAs(array_filename)
+    eML.clearCache()
+    loaded = eML(array_filename, use_cache=True)
+    loaded.eml_data['samples'][0] = 99.0
+    cached = eML(array_filename, use_cache=True).eml_data['samples']
+    assert cached[0] == 0.0 and not cached.flags.writeable
+    os.remove(array_filename)
+    eML.clearCache()
+    pass
+
+  def testSharedArrayReads(self):
+    eml_filename = os.path.join(os.path.dirname(__file__), 'sharedarray.eml')
+    if os.path.exists(eml_filename):
+      os.remove(eml_filename)
+    eml = eML(eml_filename)
+    eml.setArray('shared', np.arange(12, dtype=np.float32).reshape([3, 4]))
+    eml.save()
+
+    first = eML(eml_filename, shared_arrays=True).getArray('shared')
+    second = eML(eml_filename, shared_arrays=True).getArray('shared')
+    assert np.shares_memory(first, second)
+    assert not second.flags.writeable
+    assert np.array_equal(second, np.arange(12, dtype=np.float32).reshape([3, 4]))
+
+    del first, second
+    eML.releaseSharedMemory(unlink=True)
+
+    # blocks created by a worker process that has exited are removed by the owner of the pool
+    from multiprocessing import shared_memory
+    from _SharedArrays_eML import _SharedArrays_eML
+
+    script = ('import sys; from eML import eML; '
+              'eML(sys.argv[1], shared_arrays=True).getArray("shared"); eML.releaseSharedMemory()')
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    subprocess.run([sys.executable, '-c', script, eml_filename], env=env, check=True)
+    name = _SharedArrays_eML(eml_filename)._getBlockName('shared')
+    shared_memory.SharedMemory(name=name).close()
+    eML.releaseSharedMemory(unlink=True, eml_filenames=[eml_filename])
+    try:
+      shared_memory.SharedMemory(name=name)
+      assert False
+    except FileNotFoundError:
+      pass
+    os.remove(eml_filename)
+    pass
+
+  def testTableReads(self):
+    eml_filename = os.path.join(os.path.dirname(__file__), 'table.eml')
+    if os.path.exists(eml_filename):
+      os.remove(eml_filename)
+
+    records = [{'station': 'A' + str(ii), 'x': ii * 1.5, 'elevation': ii, 'active': ii % 2 == 0,
+                'surveyed': datetime(2024, 7, 28, ii)} for ii in range(5)]
+    eml = eML()
+    eml.setTable('stations', records)
+    eml.setTable('traces', {'amplitude': np.linspace(0, 1, 4, dtype=np.float32)})
+    eml.save(eml_filename)
+
+    loaded = eML(eml_filename)
+    assert loaded.identifiers['stations'] == 'table'
+    columns = loaded.getTable('stations', ['x', 'elevation'])
+    assert list(columns.keys()) == ['x', 'elevation']
+    assert np.array_equal(columns['x'], [ii * 1.5 for ii in range(5)])
+    assert columns['elevation'].dtype == np.int64
+
+    # only the requested columns have been decoded
+    assert set(loaded.eml_data['stations'].decoders.keys()) == {'station', 'active', 'surveyed'}
+
+    table = loaded.getTable('stations')
+    assert list(table['station']) == ['A0', 'A1', 'A2', 'A3', 'A4']
+    assert list(table['active']) == [True, False, True, False, True]
+    assert list(table['surveyed']) == [record['surveyed'] for record in records]
+    assert loaded.getTable('traces')['amplitude'].dtype == np.float32
+
+    # whitespace is kept except at the end of a column line, where the reader would strip it, and
+    # carriage returns would split the line
+    eml = eML()
+    eml.setTable('padded', {'name': ['  x', 'y  ', 'z'], 'n': [1, 2, 3]})
+    eml.save(eml_filename)
+    assert eML(eml_filename).getTable('padded')['name'].tolist() == ['  x', 'y  ', 'z']
+    for values in [['x', 'y  '], ['p\rq', 'r']]:
+      eml = eML()
+      eml.setTable('lossy', {'name': values, 'n': [1, 2]})
+      try:
+        eml.save(eml_filename)
+        assert False
+      except Exception as exception:
+        assert 'eML table error' in str(exception)
+      beml_filename = eml_filename.replace('.eml', '.beml')
+      eml.save(beml_filename)
+      assert eML(beml_filename).getTable('lossy')['name'].tolist() == values
+      os.remove(beml_filename)
+
+    # column names are written to the table format, which is a single line
+    for name in ['a\r', 'a\nb', 'a|b']:
+      try:
+        eML().setTable('lossy', {name: [1, 2]})
+        assert False
+      except Exception as exception:
+        assert 'eML table error' in str(exception)
+
+    os.remove(eml_filename)
+    pass
+
+  def testRecordArrayReads(self):
+    testdir = os.path.dirname(__file__)
+    headers = np.zeros(3, dtype=np.dtype([('trace', '>i4'), ('offset', '<f8'), ('line', 'U8'),
+                                          ('flags', '?', (2,))], align=True))
+    headers['trace'] = [101, 102, 103]
+    headers['offset'] = [12.5, 25.0, 37.5]
+    headers['line'] = ['north', 'south', 'east']
+    headers['flags'] = [[True, False], [False, True], [True, True]]
+
+    for eml_filename in [os.path.join(testdir, 'recordarray.eml'),
+                         os.path.join(testdir, 'recordarray.beml')]:
+      if os.path.exists(eml_filename):
+        os.remove(eml_filename)
+      eml = eML()
+      eml.setArray('trace headers', headers)
+      eml.save(eml_filename)
+
+      loaded = eML(eml_filename).getArray('trace headers')
+      assert loaded.dtype.names == headers.dtype.names and loaded.shape == headers.shape
+      for name in headers.dtype.names:
+        assert loaded.dtype[name].base.kind == headers.dtype[name].base.kind
+        assert np.array_equal(loaded[name], headers[name])
+      os.remove(eml_filename)
+    pass
+
+  def testStrArrayReads(self):
+    # str arrays read back as written in both formats, the first element included
+    testdir = os.path.dirname(__file__)
+    names = np.array(['a', 'b ', ' c', 'd'])
+    grid = np.array([['north line', 'x'], ['', ' south']])
+    for eml_filename in [os.path.join(testdir, 'strarray.eml'),
+                         os.path.join(testdir, 'strarray.beml')]:
+      eml = eML()
+      eml.setArray('names', names)
+      eml.setArray('grid', grid)
+      eml.save(eml_filename)
+
+      loaded = eML(eml_filename)
+      assert loaded.getArray('names').tolist() == names.tolist()
+      assert loaded.getArray('grid').tolist() == grid.tolist()
+      os.remove(eml_filename)
+
+    # elements a text file can not hold are rejected rather than read back differently
+    for bad in [np.array(['a|b', 'c']), np.array(['a', 'b\r']), np.array(['a', 'b '])]:
+      eml = eML()
+      eml.setArray('names', bad)
+      try:
+        eml.saveAs(os.path.join(testdir, 'strarray.eml'))
+        assert False
+      except Exception as exception:
+        assert 'str array' in str(exception)
+    assert not os.path.exists(os.path.join(testdir, 'strarray.eml'))
+    pass
+
+  def testLazyNumpyImport(self):
+    # numpy is only imported once an array is read, which needs a fresh interpreter to check
+    testdir = os.path.dirname(os.path.abspath(__file__))
+    script = ('import sys; from eML import eML; eml = eML(sys.argv[1]); '
+              'print("numpy" in sys.modules, len(eml.eml_data) > 0)')
+    eml_filename = os.path.join(testdir, 'lazynumpy.eml')
+    eml = eML()
+    eml.setDict('lookup', {'a': 1.5, 'b': 2.5})
+    eml.setList('mixed', [1, 'one', [2.5, True]])
+    eml.save(eml_filename)
+
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(testdir))
+    output = subprocess.run([sys.executable, '-c', script, eml_filename], env=env,
+                            capture_output=True, text=True, check=True).stdout
+    assert output.strip() == 'False True'
+
+    eml.setArray('samples', np.arange(4))
+    eml.save(eml_filename)
+    output = subprocess.run([sys.executable, '-c', script, eml_filename], env=env,
+                            capture_output=True, text=True, check=True).stdout
+    assert output.strip() == 'True True'
+    os.remove(eml_filename)
+    pass
+
+  def testTokenizedReads(self):
+    # values holding the := and | separators are taken apart by the tokenizer rather than split
+    testdir = os.path.dirname(os.path.abspath(__file__))
+    eml_filename = os.path.join(testdir, 'tokenized.eml')
+    eml = eML()
+    eml.setString('assignment', 'offset := 12.5')
+    eml.setDict('notes', {'first': 'a := b', 2: ['c := d', (3, 'e := f')]})
+    eml.setList('lines', [{'g': 'h := i'}, 'j := k', 1.5])
+    eml.save(eml_filename)
+
+    loaded = eML(eml_filename)
+    assert loaded.getString('assignment') == 'offset := 12.5'
+    assert loaded.getDict('notes') == {'first': 'a := b', 2: ['c := d', (3, 'e := f')]}
+    assert loaded.getList('lines') == [{'g': 'h := i'}, 'j := k', 1.5]
+    os.remove(eml_filename)
+    pass
+
+  def testPeek(self):
+    # peeking lists the header and identifiers of text and beML files without decoding the values
+    testdir = os.path.dirname(os.path.abspath(__file__))
+    eml = eML()
+    eml.setString('survey', 'line := 12')
+    eml.setDict('geometry', {'lines': [101, 'north'], 'spacing': (12.5, 'm')})
+    eml.setArray('samples', np.arange(100000, dtype=np.float32))
+    eml.setTable('stations', {'name': ['A1', 'A2'], 'x': [1.5, 2.5]})
+    eml.setFrozenSet('flags', frozenset({'raw', 3}))
+
+    # text files are peeked through their eML Index, compressed ones by scanning their lines
+    for eml_filename in [os.path.join(testdir, 'peek.eml'), os.path.join(testdir, 'peek.beml'),
+                         os.path.join(testdir, 'peek.eml.gz')]:
+      eml.save(eml_filename)
+      eml_meta_data, identifiers = eML.peek(eml_filename)
+      loaded = eML(eml_filename)
+      assert eml_meta_data == loaded.eml_meta_data
+      assert identifiers == loaded.identifiers
+      assert list(identifiers.values()) == ['string', 'dict', 'array', 'table', 'frozen set']
+      os.remove(eml_filename)
+
+    # an index that no longer matches the entries of a file edited by hand is not used
+    eml_filename = os.path.join(testdir, 'peek.eml')
+    eml.save(eml_filename)
+    with open(eml_filename) as file:
+      lines = file.readlines()
+    with open(eml_filename, 'w') as file:
+      file.writelines(lines[:1] + ['added := <int>7\n'] + lines[1:])
+    identifiers = eML.peek(eml_filename)[1]
+    assert list(identifiers) == ['added', 'survey', 'geometry', 'samples', 'stations', 'flags']
+    os.remove(eml_filename)
+    pass
+
+  def testVerify(self):
+    # every entry is checked against its stored checksum without being decoded
+    testdir = os.path.dirname(os.path.abspath(__file__))
+    eml = eML()
+    eml.setString('survey', 'north slope')
+    eml.setList('lines', [101, 'north', [102.5, 'south']])
+    eml.setArray('samples', np.arange(1000, dtype=np.int32))
+
+    for eml_filename in [os.path.join(testdir, 'verify.eml'), os.path.join(testdir, 'verify.beml')]:
+      eml.save(eml_filename)
+      assert eML.verify(eml_filename) == []
+
+      with open(eml_filename, 'rb') as file:
+        contents = bytearray(file.read())
+      contents[contents.find(b'south')] ^= 0x20
+      with open(eml_filename, 'wb') as file:
+        file.write(contents)
+      assert eML.verify(eml_filename) == ['lines']
+      os.remove(eml_filename)
+    pass
+
+  def testDiffAndMerge(self):
+    # only the entries whose checksums differ are decoded and compared
+    testdir = os.path.dirname(os.path.abspath(__file__))
+    for extension in ['.eml', '.beml']:
+      base_filename, ours_filename, theirs_filename, merged_filename = \
+        [os.path.join(testdir, name + extension) for name in ['base', 'ours', 'theirs', 'merged']]
+
+      eml = eML()
+      eml.setDict('stations', {'A1': {'x': 1.5, 'y': 2.0}, 'A2': {'x': 3.0, 'y': 4.0}})
+      eml.setList('lines', [101, 102, 103])
+      eml.setArray('samples', np.arange(1000, dtype=np.int32))
+      eml.save(base_filename)
+      assert eML.diff(base_filename, base_filename) == []
+
+      ours = eML(base_filename)
+      ours.getDict('stations')['A1']['x'] = 9.5
+      ours.getList('lines')[1] = 202
+      ours.saveAs(ours_filename)
+      assert eML.diff(base_filename, ours_filename) == [
+        (('stations', 'A1', 'x'), 'changed', 1.5, 9.5), (('lines', 1), 'changed', 102, 202)]
+
+      theirs = eML(base_filename)
+      theirs.getDict('stations')['A2']['z'] = 5.0
+      theirs.getList('lines')[1] = 302
+      theirs.setFloat('north', 12.5)
+      theirs.saveAs(theirs_filename)
+
+      merged, conflicts = eML.merge(base_filename, ours_filename, theirs_filename)
+      assert conflicts == [('lines', 1)]
+      merged.saveAs(merged_filename)
+      merged = eML(merged_filename)
+      assert merged.getDict('stations') == {'A1': {'x': 9.5, 'y': 2.0},
+                                            'A2': {'x': 3.0, 'y': 4.0, 'z': 5.0}}
+      assert merged.getList('lines') == [101, 202, 103] and merged.getFloat('north') == 12.5
+      assert np.array_equal(merged.getArray('samples'), np.arange(1000, dtype=np.int32))
+
+      for eml_filename in [base_filename, ours_filename, theirs_filename, merged_filename]:
+        os.remove(eml_filename)
+    pass
+
+  def testRefresh(self):
+    # only the identifiers added or changed by another writer are decoded again
+    testdir = os.path.dirname(os.path.abspath(__file__))
+    for extension in ['.eml', '.beml']:
+      eml_filename = os.path.join(testdir, 'refresh' + extension)
+      for use_cache in [False, True]:
+        writer = eML()
+        writer.setDict('stations', {'A1': {'x': 1.5}, 'A2': {'x': 3.0}})
+        writer.setArray('samples', np.arange(1000, dtype=np.int32))
+        writer.setInt('count', 2)
+        writer.save(eml_filename)
+
+        reader = eML(eml_filename, use_cache=use_cache)
+        samples = reader.getArray('samples')
+        assert reader.refresh() == []
+
+        writer = eML(eml_filename)
+        writer.getDict('stations')['A2']['x'] = 4.5
+        writer.setString('survey', 'north slope')
+        writer.save(eml_filename)
+        assert reader.refresh() == ['stations', 'survey']
+        assert reader.getDict('stations') == {'A1': {'x': 1.5}, 'A2': {'x': 4.5}}
+        assert reader.getString('survey') == 'north slope'
+        assert reader.getArray('samples') is samples
+
+        rewritten = eML()
+        rewritten.setArray('samples', np.arange(1000, dtype=np.int32))
+        rewritten.setInt('count', 3)
+        rewritten.save(eml_filename)
+        assert reader.refresh() == ['count', 'stations', 'survey']
+        assert list(reader.identifiers) == ['samples', 'count'] and reader.getInt('count') == 3
+      os.remove(eml_filename)
+    pass
+
 
 if __name__ == "__main__":
   print('enl test')
@@ -50,4 +425,26 @@ if __name__ == "__main__":
 
   eML_Read_Test().testContainerReads()
 
-  eML_Read_Test().testComplexContainerReads()
\ No newline at end of file
+  eML_Read_Test().testComplexContainerReads()
+
+  eML_Read_Test().testInstrumentedReads()
+
+  eML_Read_Test().testCachedReads()
+
+  eML_Read_Test().testSharedArrayReads()
+
+  eML_Read_Test().testTableReads()
+
+  eML_Read_Test().testRecordArrayReads()
+
+  eML_Read_Test().testLazyNumpyImport()
+
+  eML_Read_Test().testTokenizedReads()
+
+  eML_Read_Test().testPeek()
+
+  eML_Read_Test().testVerify()
+
+  eML_Read_Test().testDiffAndMerge()
+
+  eML_Read_Test().testRefresh()
@@ -20,6 +20,11 @@
   See the License for the specific language governing permissions and
   limitations under the License.
 """
+import os
+import subprocess
+import sys
+import threading
+import time
 from datetime import datetime
 
 from eML import eML
@@ -74,6 +79,628 @@ class eML_Write_Test:
     eml.saveAs()
     pass
 
+  def testStreamWrites(self):
+    eml_filename = os.path.join(os.path.dirname(__file__), 'streamcontainer.eml')
+    if os.path.exists(eml_filename):
+      os.remove(eml_filename)
+
+    eml = eML(eml_filename)
+    eml.setListStream('list stream', (ii * ii for ii in range(10)))
+    eml.setDictStream('dict stream', ((str(ii), [ii, 'x']) for ii in range(3)))
+    eml.setListStream('empty stream', iter([]))
+    eml.save()
+
+    eml = eML(eml_filename)
+    assert eml.getList('list stream') == [ii * ii for ii in range(10)]
+    assert eml.getDict('dict stream') == {'0': [0, 'x'], '1': [1, 'x'], '2': [2, 'x']}
+    assert eml.getList('empty stream') == []
+    pass
+
+  def testStreamSavedTwice(self):
+    # a consumed stream is copied from the file it was saved to and read back from it
+    testdir = os.path.dirname(__file__)
+    for eml_filename in [os.path.join(testdir, 'streamtwice.eml'),
+                         os.path.join(testdir, 'streamtwice.beml')]:
+      copy_filename = eml_filename.replace('streamtwice', 'streamtwicecopy')
+      eml = eML()
+      eml.setListStream('list stream', (ii * ii for ii in range(10)))
+      eml.setDictStream('dict stream', ((str(ii), [ii, 'x']) for ii in range(3)))
+      eml.setInt('version', 1)
+      eml.saveAs(eml_filename)
+      eml.update('version', 2)
+      eml.save(eml_filename)
+      eml.saveAs(copy_filename)
+      for filename in [eml_filename, copy_filename]:
+        loaded = eML(filename)
+        assert loaded.getList('list stream') == [ii * ii for ii in range(10)]
+        assert loaded.getDict('dict stream') == {'0': [0, 'x'], '1': [1, 'x'], '2': [2, 'x']}
+        assert loaded.getInt('version') == 2 and eML.verify(filename) == []
+
+      assert eml.getList('list stream') == [ii * ii for ii in range(10)]
+      assert eml.identifiers['list stream'] == 'list'
+      eml.save(copy_filename)
+      assert eML(copy_filename).getList('list stream') == [ii * ii for ii in range(10)]
+
+      # once the file has changed the stream can no longer be copied or read back
+      os.remove(copy_filename)
+      try:
+        eml.getDict('dict stream')
+        assert False
+      except Exception as exception:
+        assert 'has changed since' in str(exception)
+      try:
+        eml.saveAs(copy_filename)
+        assert False
+      except Exception as exception:
+        assert 'set the stream again' in str(exception)
+      os.remove(eml_filename)
+    pass
+
+  def testBinaryConversion(self):
+    testdir = os.path.dirname(__file__)
+    beml_filename = os.path.join(testdir, 'conversion.beml')
+    eml_filename = os.path.join(testdir, 'conversion.eml')
+
+    eml = eML()
+    eml.setBoolean('bool', True)
+    eml.setInt('big int', 2 ** 80)
+    eml.setComplex('complex', 1 + 2j)
+    eml.setString('string', 'unicode \u00e9 and a | bar')
+    eml.setDate('date', datetime.today().date())
+    eml.setDateTime('datetime', datetime.today())
+    eml.setFrozenSet('frozen set', frozenset([1, 2.5, 'a']))
+    eml.setDict('dict', {1: [True, 'x'], 'b': {'c': (1, 2)}, 3: {5, 6}})
+    eml.setArray('array', np.arange(12, dtype=np.float32).reshape(3, 4))
+    eml.setArray('object array', np.array(['a', 1, 2.5], dtype=object))
+    eml.setListStream('list stream', (ii for ii in range(5)))
+
+    for filename in [beml_filename, eml_filename]:
+      if os.path.exists(filename):
+        os.remove(filename)
+    eml.save(beml_filename)
+    eML.convertToText(beml_filename, eml_filename)
+    os.remove(beml_filename)
+    eML.convertToBinary(eml_filename, beml_filename)
+
+    text = eML(eml_filename)
+    binary = eML(beml_filename)
+    assert binary.binary and not text.binary
+    assert binary.eml_meta_data == text.eml_meta_data
+    assert binary.identifiers == text.identifiers
+    for name in text.identifiers:
+      if isinstance(text.eml_data[name], np.ndarray):
+        assert binary.eml_data[name].dtype == text.eml_data[name].dtype
+        assert np.array_equal(binary.eml_data[name], text.eml_data[name])
+      else:
+        assert binary.eml_data[name] == text.eml_data[name]
+    assert binary.getList('list stream') == [0, 1, 2, 3, 4]
+
+    os.remove(beml_filename)
+    os.remove(eml_filename)
+    pass
+
+  def testNumpyScalarWrites(self):
+    # both formats accept the same numpy scalars in containers and read them back alike, the ones
+    # whose data type would be lost are rejected by both
+    testdir = os.path.dirname(__file__)
+    beml_filename = os.path.join(testdir, 'numpyscalars.beml')
+    eml_filename = os.path.join(testdir, 'numpyscalars.eml')
+
+    eml = eML()
+    eml.setList('kept', [np.float64(1.5), np.complex128(2j), np.bool_(True), np.str_('a')])
+    eml.save(beml_filename)
+    eML.convertToText(beml_filename, eml_filename)
+    assert eML(eml_filename).getList('kept') == eML(beml_filename).getList('kept') \
+           == [1.5, 2j, True, 'a']
+    os.remove(beml_filename)
+    eML.convertToBinary(eml_filename, beml_filename)
+    assert eML(beml_filename).getList('kept') == [1.5, 2j, True, 'a']
+    os.remove(beml_filename)
+    os.remove(eml_filename)
+
+    for value in [np.int64(3), np.int32(3), np.float32(1.5), np.uint8(7)]:
+      for filename in [beml_filename, eml_filename]:
+        eml = eML()
+        eml.setList('narrowed', [value])
+        try:
+          eml.saveAs(filename)
+          assert False
+        except Exception as exception:
+          assert 'is not currently supported' in str(exception)
+        assert not os.path.exists(filename)
+    pass
+
+  def testReferenceWrites(self):
+    eml_filename = os.path.join(os.path.dirname(__file__), 'references.eml')
+    if os.path.exists(eml_filename):
+      os.remove(eml_filename)
+
+    description = 'a long string value that repeats across the records'
+    station = {'name': 'A1', 'location': (10.5, 20.25), 'tags': {'land', 'vibroseis'}}
+    records = [{'station': station, 'description': description, 'index': ii} for ii in range(4)]
+
+    eml = eML()
+    eml.setList('records', records)
+    eml.setDict('lookup', {'first': station, 'text': description, 'short': 'ab'})
+    eml.save(eml_filename, references=True)
+
+    with open(eml_filename) as file:
+      text = file.read()
+    assert text.count(description) == 1 and text.count("'A1'") == 0
+    assert text.count('<str>A1') == 1 and '<ref>' in text
+
+    loaded = eML(eml_filename)
+    assert loaded.getList('records') == records
+    assert loaded.getDict('lookup') == {'first': station, 'text': description, 'short': 'ab'}
+
+    # the same object is shared wherever it was shared when it was written
+    loaded_records = loaded.eml_data['records']
+    assert all(record['station'] is loaded_records[0]['station'] for record in loaded_records)
+    assert loaded.eml_data['lookup']['first'] is loaded_records[0]['station']
+
+    os.remove(eml_filename)
+    pass
+
+  def testCompactWrites(self):
+    eml_filename = os.path.join(os.path.dirname(__file__), 'compactcontainer.eml')
+    if os.path.exists(eml_filename):
+      os.remove(eml_filename)
+
+    eml = eML()
+    eml.setList('ints', list(range(1000)))
+    eml.setTuple('floats', (0.1, 2.5, -3.75e-9))
+    eml.setSet('names', {'north', 'south', 'east'})
+    eml.setDict('nested', {'flags': [True, False, True], 'days': [datetime(2024, 7, 28).date()],
+                           'mixed': [1, 'one']})
+    eml.save(eml_filename)
+
+    with open(eml_filename) as file:
+      lines = file.readlines()
+    assert lines[1].startswith('ints := <list|1000|int>0|1|2|')
+    assert '<list |3|bool>True|False|True' in lines[4]
+    assert len(lines) == 9 and lines[-1].startswith('eML Index | ')
+
+    loaded = eML(eml_filename)
+    for name in ['ints', 'floats', 'names', 'nested']:
+      assert loaded.eml_data[name] == eml.eml_data[name]
+
+    os.remove(eml_filename)
+
+    # dicts with one key type and one value type are compacted as well
+    eml = eML()
+    eml.setDict('lookup', {'a': 1.5, 'b': 2.5})
+    eml.setDict('nested', {'squares': {ii: ii * ii for ii in range(4)}})
+    eml.save(eml_filename)
+    with open(eml_filename) as file:
+      lines = file.readlines()
+    assert lines[1] == 'lookup := <dict|2|str|float>a|1.5|b|2.5\n'
+    assert lines[2].endswith('<dict |4|int|int>0|0|1|1|2|4|3|9\n')
+    loaded = eML(eml_filename)
+    assert loaded.getDict('lookup') == {'a': 1.5, 'b': 2.5}
+    assert loaded.getDict('nested') == {'squares': {0: 0, 1: 1, 2: 4, 3: 9}}
+    os.remove(eml_filename)
+    pass
+
+  def testDeepNesting(self):
+    # nesting far beyond the recursion limit, a chain of single element lists is a single line
+    testdir = os.path.dirname(__file__)
+    depth = 5000
+    nested = 'leaf'
+    for ii in range(depth):
+      nested = [nested] if ii % 2 == 0 else {'child': nested}
+
+    for eml_filename in [os.path.join(testdir, 'deepnesting.eml'),
+                         os.path.join(testdir, 'deepnesting.beml')]:
+      if os.path.exists(eml_filename):
+        os.remove(eml_filename)
+      eml = eML()
+      eml.setDict('deep', {'nested': nested, 'empty': [[], {}]})
+      eml.save(eml_filename)
+
+      loaded = eML(eml_filename).getDict('deep')
+      assert loaded['empty'] == [[], {}]
+      value = loaded['nested']
+      for ii in range(depth):
+        value = value['child'] if ii % 2 == 0 else value[0]
+      assert value == 'leaf'
+      os.remove(eml_filename)
+    pass
+
+  def testCyclicSaves(self):
+    # a container holding itself can not be written, the same container held twice can
+    testdir = os.path.dirname(__file__)
+    cyclic_list = [1]
+    cyclic_list.append(cyclic_list)
+    cyclic_dict = {'a': 1}
+    cyclic_dict['b'] = [cyclic_dict]
+    shared = [5]
+
+    for eml_filename in [os.path.join(testdir, 'cyclic.eml'),
+                         os.path.join(testdir, 'cyclic.beml')]:
+      for references in [False, True]:
+        for identifier, value in [('list', cyclic_list), ('dict', cyclic_dict)]:
+          eml = eML()
+          eml.update(identifier, value)
+          try:
+            eml.saveAs(eml_filename, references=references)
+            assert False
+          except Exception as exception:
+            assert 'contains itself' in str(exception)
+          assert not os.path.exists(eml_filename)
+
+        eml = eML()
+        eml.setList('shared', [shared, shared, (shared,)])
+        eml.saveAs(eml_filename, references=references)
+        assert eML(eml_filename).getList('shared') == [[5], [5], ([5],)]
+        os.remove(eml_filename)
+    pass
+
+  def testUnchangedWrites(self):
+    # entries whose value is unchanged since the file was loaded are copied rather than encoded
+    testdir = os.path.dirname(__file__)
+    for eml_filename in [os.path.join(testdir, 'unchanged.eml'),
+                         os.path.join(testdir, 'unchanged.beml')]:
+      eml = eML()
+      eml.setDict('geometry', {'lines': [101, 'north', (1.5, 'm')], 'shots': {1, 2, 3}})
+      eml.setArray('samples', np.linspace(0.0, 1.0, 1000))
+      eml.setList('picks', [[12, 'first break'], [40, 'reflection']])
+      eml.setInt('revision', 1)
+      eml.save(eml_filename)
+
+      loaded = eML(eml_filename, instrument=True)
+      loaded.eml_data['revision'] = 2
+      loaded.getList('picks').append([77, 'multiple'])
+      loaded.save()
+      assert loaded.getStats()['save'].counters['reused entries'] == 2
+      assert eML.verify(eml_filename) == []
+
+      reloaded = eML(eml_filename)
+      assert reloaded.getDict('geometry') == eml.getDict('geometry')
+      assert np.array_equal(reloaded.getArray('samples'), eml.getArray('samples'))
+      assert reloaded.getList('picks')[-1] == [77, 'multiple']
+      assert reloaded.getInt('revision') == 2
+      os.remove(eml_filename)
+    pass
+
+  def testUnchangedSetWrites(self):
+    # sets of str iterate in an order that changes with the hash seed of each process, unchanged
+    # set entries are still copied when the file is saved by a process with another hash seed
+    testdir = os.path.dirname(__file__)
+    script = ('import sys\n'
+              'from eML import eML\n'
+              'eml = eML(sys.argv[1], instrument=True) if sys.argv[2] == "save" else eML()\n'
+              'if sys.argv[2] == "create":\n'
+              '  eml.setDict("survey", {"crews": {"alpha", "bravo", "charlie", "delta"},\n'
+              '                         "lines": [frozenset({"north", "south", 7})]})\n'
+              '  eml.setFrozenSet("tags", frozenset({"raw", "stacked", "migrated"}))\n'
+              '  eml.setInt("revision", 1)\n'
+              'else:\n'
+              '  eml.eml_data["revision"] = 2\n'
+              'eml.save(sys.argv[1])\n'
+              'if sys.argv[2] == "save":\n'
+              '  print(eml.getStats()["save"].counters.get("reused entries", 0))\n')
+    environment = dict(os.environ)
+    environment['PYTHONPATH'] = os.pathsep.join([os.path.dirname(testdir),
+                                                 environment.get('PYTHONPATH', '')])
+    for eml_filename in [os.path.join(testdir, 'unchangedsets.eml'),
+                         os.path.join(testdir, 'unchangedsets.beml')]:
+      for seed, action in [('1', 'create'), ('2', 'save')]:
+        environment['PYTHONHASHSEED'] = seed
+        result = subprocess.run([sys.executable, '-c', script, eml_filename, action],
+                                env=environment, capture_output=True, text=True, check=True)
+      assert result.stdout.strip() == '2'
+      reloaded = eML(eml_filename)
+      assert reloaded.getDict('survey')['crews'] == {'alpha', 'bravo', 'charlie', 'delta'}
+      assert reloaded.eml_data['tags'] == frozenset({'raw', 'stacked', 'migrated'})
+      assert reloaded.getInt('revision') == 2
+      os.remove(eml_filename)
+    pass
+
+  def testThreadSafeWrites(self):
+    # threads set and read identifiers whilst another thread saves snapshots of the instance
+    eml_filename = os.path.join(os.path.dirname(__file__), 'threadsafe.beml')
+    eml = eML(thread_safe=True)
+    eml.setArray('samples', np.arange(10000, dtype=np.int32))
+
+    # exceptions raised within the threads are collected, they would otherwise only be printed
+    failures = list()
+
+    def setInts(first):
+      try:
+        for value in range(first, first + 200):
+          eml.setInt('value ' + str(value), value)
+          assert eml.getInt('value ' + str(value)) == value
+      except Exception as exception:
+        failures.append(exception)
+
+    def saveSnapshots():
+      try:
+        for attempt in range(20):
+          eml.saveAs(eml_filename)
+          saved = eML(eml_filename)
+          assert np.array_equal(saved.getArray('samples'), np.arange(10000, dtype=np.int32))
+      except Exception as exception:
+        failures.append(exception)
+
+    threads = [threading.Thread(target=setInts, args=(first,)) for first in range(0, 800, 200)]
+    threads.append(threading.Thread(target=saveSnapshots))
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    assert failures == []
+
+    eml.saveAs(eml_filename)
+    saved = eML(eml_filename)
+    assert len(saved.identifiers) == 801 and saved.getInt('value 799') == 799
+    os.remove(eml_filename)
+    pass
+
+  def testThreadSafeTableReads(self):
+    # threads reading the same table decode each column once and all get the decoded column
+    eml_filename = os.path.join(os.path.dirname(__file__), 'threadsafetable.eml')
+    eml = eML()
+    eml.setTable('stations', {'name': ['A1', 'A2', 'A3'], 'x': [1.5, 2.5, 3.5]})
+    eml.save(eml_filename)
+
+    loaded = eML(eml_filename, thread_safe=True)
+    table = loaded.eml_data['stations']
+    calls = list()
+    for name, decode in list(table.decoders.items()):
+      def slowDecode(decode=decode, name=name):
+        calls.append(name)
+        time.sleep(0.05)
+        return decode()
+      table.decoders[name] = slowDecode
+
+    results = list()
+    threads = [threading.Thread(target=lambda: results.append(loaded.getTable('stations')))
+               for ii in range(4)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    assert sorted(calls) == ['name', 'x'] and len(results) == 4
+    for columns in results:
+      assert columns['name'].tolist() == ['A1', 'A2', 'A3']
+      assert columns['x'].tolist() == [1.5, 2.5, 3.5]
+    os.remove(eml_filename)
+    pass
+
+  def testAtomicSaves(self):
+    # two instances save the same file whilst it is loaded, every load sees one complete version
+    eml_filename = os.path.join(os.path.dirname(__file__), 'atomic.beml')
+    eml = eML()
+    eml.setInt('version', 0)
+    eml.setArray('samples', np.zeros(100000, dtype=np.int64))
+    eml.saveAs(eml_filename)
+    os.chmod(eml_filename, 0o640)
+
+    failures = list()
+
+    def saveVersions(first):
+      try:
+        saver = eML(eml_filename)
+        for version in range(first, first + 20):
+          saver.eml_data['version'] = version
+          saver.eml_data['samples'] = np.full(100000, version, dtype=np.int64)
+          saver.saveAs(eml_filename)
+      except Exception as exception:
+        failures.append(exception)
+
+    def loadVersions():
+      try:
+        for attempt in range(40):
+          loaded = eML(eml_filename)
+          version = loaded.getInt('version')
+          assert np.all(loaded.getArray('samples') == version)
+      except Exception as exception:
+        failures.append(exception)
+
+    threads = [threading.Thread(target=saveVersions, args=(first,)) for first in (1, 100)]
+    threads.append(threading.Thread(target=loadVersions))
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    assert failures == []
+
+    # the replaced file keeps its permissions and no partly written file is left behind
+    assert os.stat(eml_filename).st_mode & 0o777 == 0o640
+    assert [name for name in os.listdir(os.path.dirname(eml_filename) or '.')
+            if name.startswith('atomic.beml')] == ['atomic.beml']
+    os.remove(eml_filename)
+
+    # processes creating a file take turns too, the directory is locked whilst it does not exist
+    from _FileLock_eML import _FileLock_eML
+
+    creating = _FileLock_eML(eml_filename)
+    creating.acquire()
+    acquired = threading.Event()
+
+    def acquireLock():
+      with _FileLock_eML(eml_filename):
+        acquired.set()
+
+    waiting = threading.Thread(target=acquireLock)
+    waiting.start()
+    assert not acquired.wait(0.5)
+    creating.release()
+    waiting.join()
+    assert acquired.is_set()
+    pass
+
+  def testSymbolicLinkSaves(self):
+    # saving through a symbolic link replaces the file it points to and keeps the link
+    testdir = os.path.dirname(__file__)
+    for extension in ['.eml', '.beml']:
+      real_filename = os.path.join(testdir, 'real' + extension)
+      link_filename = os.path.join(testdir, 'link' + extension)
+      eml = eML()
+      eml.setInt('version', 1)
+      eml.saveAs(real_filename)
+      os.symlink(os.path.basename(real_filename), link_filename)
+
+      linked = eML(link_filename)
+      linked.eml_data['version'] = 2
+      linked.saveAs(link_filename)
+      assert os.path.islink(link_filename)
+      assert eML(real_filename).getInt('version') == 2
+      assert [name for name in os.listdir(testdir) if name.startswith('real' + extension)] \
+             == ['real' + extension]
+      os.remove(link_filename)
+      os.remove(real_filename)
+    pass
+
+  def testBulkSetters(self):
+    # many identifiers are set at once and existing identifiers are replaced in place
+    eml_filename = os.path.join(os.path.dirname(__file__), 'bulk.beml')
+    eml = eML()
+    eml.setMany({'value ' + str(value): value for value in range(10000)})
+    eml.setMany({'flag': True, 'when': datetime(2024, 7, 28, 16, 13, 20),
+                 'samples': np.arange(100, dtype=np.int32), 'names': ('A1', 'A2')})
+    assert eml.identifiers['flag'] == 'bool' and eml.identifiers['when'] == 'datetime'
+    assert eml.identifiers['samples'] == 'array' and eml.identifiers['names'] == 'tuple'
+    eml.setMany({'counts': ('list stream', iter(range(3))),
+                 'stations': ('table', {'station': ['A1', 'A2'], 'x': [1.5, 2.5]})},
+                infer_types=False)
+    eml.saveAs(eml_filename)
+
+    loaded = eML(eml_filename)
+    assert len(loaded.identifiers) == 10006 and loaded.getInt('value 9999') == 9999
+    assert loaded.getList('counts') == [0, 1, 2] and loaded.identifiers['stations'] == 'table'
+    loaded.update('value 1', 'one')
+    loaded.update('samples', np.zeros(100, dtype=np.int32))
+    loaded.update('names', ['B1'])
+    loaded.dropIdentifier('value 2')
+    loaded.save()
+
+    saved = eML(eml_filename)
+    assert saved.identifiers['value 1'] == 'string' and saved.getString('value 1') == 'one'
+    assert np.array_equal(saved.getArray('samples'), np.zeros(100, dtype=np.int32))
+    assert saved.getList('names') == ['B1'] and not saved.exists('value 2')
+    assert len(saved.identifiers) == 10005
+
+    # nothing is set when any of the values is invalid
+    for mapping, infer_types in (({'valid': 1, 'invalid': object()}, True),
+                                 ({'valid': ('int', 1), 'invalid': ('long', 2)}, False)):
+      try:
+        saved.setMany(mapping, infer_types)
+        assert False
+      except Exception as exception:
+        assert 'invalid' in str(exception)
+      assert not saved.exists('valid')
+    os.remove(eml_filename)
+    pass
+
+  def testCompactLayout(self):
+    # continuation lines start with a single blank, the nesting is carried by the counts
+    source_filename = os.path.join(os.path.dirname(__file__), 'complexcontainer.eml')
+    eml_filename = os.path.join(os.path.dirname(__file__), 'compactlayout.eml')
+    eml = eML(source_filename)
+    eml.setArray('samples', np.arange(12, dtype=np.float32).reshape(3, 4))
+    eml.setListStream('counts', iter(range(3)))
+    eml.setTable('stations', {'station': ['A1', 'A2'], 'x': [1.5, 2.5]})
+    eml.saveAs(eml_filename, compact_layout=True)
+
+    with open(eml_filename) as file:
+      lines = file.readlines()
+    assert all(line.startswith(' <') for line in lines[2:] if line[0].isspace())
+    assert lines[-1].startswith('eML Index compact | ')
+    assert os.path.getsize(eml_filename) < os.path.getsize(source_filename)
+
+    loaded = eML(eml_filename)
+    for identifier in ['complex list 1', 'complex dict 1']:
+      assert loaded.eml_data[identifier] == eml.eml_data[identifier]
+    assert np.array_equal(loaded.getArray('samples'), eml.getArray('samples'))
+    assert loaded.getList('counts') == [0, 1, 2] and loaded.identifiers['stations'] == 'table'
+    assert eML.peek(eml_filename)[1] == loaded.identifiers
+
+    # saving in the other layout re-encodes the unchanged entries rather than copying them
+    loaded.save(eml_filename)
+    with open(eml_filename) as file:
+      assert not file.readlines()[-1].startswith('eML Index compact')
+    aligned = eML(eml_filename)
+    assert aligned.eml_data['complex dict 1'] == eml.eml_data['complex dict 1']
+    aligned.save(eml_filename, compact_layout=True)
+    with open(eml_filename) as file:
+      assert '\n  ' not in file.read()
+    assert eML(eml_filename).eml_data['complex list 1'] == eml.eml_data['complex list 1']
+    os.remove(eml_filename)
+    pass
+
+  def testCompressedFiles(self):
+    # compressed files are written and read by their extension, streams are spooled and copied
+    source_filename = os.path.join(os.path.dirname(__file__), 'complexcontainer.eml')
+    plain_filename = os.path.join(os.path.dirname(__file__), 'compressed.eml')
+    for extension in ['.gz', '.xz', '.bz2']:
+      eml_filename = plain_filename + extension
+      eml = eML(source_filename)
+      eml.setListStream('counts', iter(range(3)))
+      eml.saveAs(eml_filename)
+      assert os.path.getsize(eml_filename) < os.path.getsize(source_filename) / 3
+
+      loaded = eML(eml_filename)
+      assert loaded.eml_data['complex dict 1'] == eml.eml_data['complex dict 1']
+      assert loaded.getList('counts') == [0, 1, 2]
+      assert eML.peek(eml_filename)[1] == loaded.identifiers and eML.verify(eml_filename) == []
+
+      # entries are copied from a plain file into a compressed file but never out of one
+      loaded.setInt('version', 2)
+      loaded.save()
+      loaded.saveAs(plain_filename)
+      assert eML(plain_filename).getInt('version') == 2 and eML.verify(plain_filename) == []
+      plain = eML(plain_filename)
+      plain.save(eml_filename)
+      assert eML(eml_filename).eml_data['complex list 1'] == eml.eml_data['complex list 1']
+      os.remove(plain_filename)
+      os.remove(eml_filename)
+
+    try:
+      eML().save(plain_filename + '.beml.gz')
+      assert False
+    except Exception as exception:
+      assert 'can not be compressed' in str(exception)
+    pass
+
+  def testCommandLine(self):
+    # files are converted to JSON and npz and back without losing their values or data types
+    import _Cli_eML
+
+    directory = os.path.dirname(__file__)
+    source_filename = os.path.join(directory, 'commandline.eml')
+    eml = eML(os.path.join(directory, 'complexcontainer.eml'))
+    eml.setMany({'grid': ('array', np.arange(6, dtype=np.float32).reshape(2, 3)),
+                 'pair': ('tuple', (1, 2.5j)), 'not a number': ('float', float('nan')),
+                 'stations': ('table', {'name': ['A1', 'A2'], 'x': [1.5, 2.5]})},
+                infer_types=False)
+    eml.saveAs(source_filename)
+
+    for to, extension in [('json', '.json'), ('npz', '.npz')]:
+      assert _Cli_eML.main(['convert', source_filename, '--to', to, '--jobs', '1', '--quiet']) == 0
+      converted_filename = os.path.join(directory, 'commandline' + extension)
+      assert _Cli_eML.main(['convert', converted_filename, '--to', 'beml', '--jobs', '1',
+                            '--quiet']) == 0
+      beml_filename = os.path.join(directory, 'commandline.beml')
+      loaded = eML(beml_filename)
+      assert loaded.identifiers == eml.identifiers
+      assert loaded.eml_data['complex dict 1'] == eml.eml_data['complex dict 1']
+      assert loaded.getArray('grid').dtype == np.float32
+      assert loaded.getTable('stations')['name'].tolist() == ['A1', 'A2']
+      assert loaded.eml_data['pair'] == (1, 2.5j) and np.isnan(loaded.getFloat('not a number'))
+      assert _Cli_eML.main(['validate', beml_filename, '--jobs', '1', '--quiet']) == 0
+
+      # existing files are only replaced when asked
+      assert _Cli_eML.main(['convert', converted_filename, '--to', 'beml', '--jobs', '1',
+                            '--quiet']) == 1
+      os.remove(converted_filename)
+      os.remove(beml_filename)
+
+    assert _Cli_eML.main(['validate', os.path.join(directory, 'missing.eml'), '--jobs', '1',
+                          '--quiet']) == 1
+    os.remove(source_filename)
+    pass
+
 
 if __name__ == "__main__":
   print('eML test')
@@ -82,4 +709,40 @@ if __name__ == "__main__":
   #
   eML_Write_Test().testContainerWrites()
   #
-  eML_Write_Test().testComplexContainerWrites()
\ No newline at end of file
+  eML_Write_Test().testComplexContainerWrites()
+  #
+  eML_Write_Test().testStreamWrites()
+  #
+  eML_Write_Test().testStreamSavedTwice()
+  #
+  eML_Write_Test().testBinaryConversion()
+  #
+  eML_Write_Test().testNumpyScalarWrites()
+  #
+  eML_Write_Test().testReferenceWrites()
+  #
+  eML_Write_Test().testCompactWrites()
+  #
+  eML_Write_Test().testDeepNesting()
+  #
+  eML_Write_Test().testCyclicSaves()
+  #
+  eML_Write_Test().testUnchangedWrites()
+  #
+  eML_Write_Test().testUnchangedSetWrites()
+  #
+  eML_Write_Test().testThreadSafeWrites()
+  #
+  eML_Write_Test().testThreadSafeTableReads()
+  #
+  eML_Write_Test().testAtomicSaves()
+  #
+  eML_Write_Test().testSymbolicLinkSaves()
+  #
+  eML_Write_Test().testBulkSetters()
+  #
+  eML_Write_Test().testCompactLayout()
+  #
+  eML_Write_Test().testCompressedFiles()
+  #
+  eML_Write_Test().testCommandLine()
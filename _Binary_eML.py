@@ -0,0 +1,1010 @@
+"""
+             _Binary_eML of the eML system
+
+                 created on 10/19/2026
+    Copyright (c) 2026 Turtle Bay Geophysical LLC
+                ALL RIGHTS RESERVED.
+
+ Questions and comments can be directed to: Support@TurtleBayGeophysical.com
+
+  Licensed under the Attribution-NonCommercial-ShareAlike 4.0 International
+  (CC BY-NC-SA 4.0) (the "License"); you may not use this file except in
+  compliance with the License.
+
+  You may obtain a copy of the License at
+
+      https://creativecommons.org/licenses/by-nc-sa/4.0/
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+
+  beML is the binary encoding of the eML type system. It holds exactly the same header meta data,
+  identifiers and values as a text eML file, so files can be converted losslessly in either
+  direction. All integers are little endian.
+
+    file    := 'beML' u8(format version) header record* index footer
+    header  := u32(length) f64(version) str(language) datetime(creation) datetime(last update)
+    record  := str(identifier) u8(length) ascii(identifier type) u64(length) value
+    index   := u32(count) (str(identifier) u8(length) ascii(identifier type) u64(record offset)
+                           u64(record length) u32(record crc-32) u8(has fingerprint)
+                           [16 bytes(fingerprint)])*
+    footer  := u64(index offset) 'bIDX'
+
+    value   := u8(tag) payload, see the TAG_ constants
+    str     := u32(length) utf-8
+
+  The index of format version 1 files has neither the crc-32 nor the fingerprint of the records,
+  see _Index_eML for both.
+"""
+from __future__ import annotations
+
+import ast
+import functools
+import itertools
+import os
+import struct
+import time
+import zlib
+from datetime import date, datetime
+
+from _Index_eML import _WrittenStream, checksumRange, copyRange, fingerprintValue
+from _LazyNumpy_eML import np, isArray, isNumpyLoaded
+from _Stats_eML import _Stats_eML
+from _Table_eML import _Table_eML
+
+
+MAGIC = b'beML'
+FOOTER_MAGIC = b'bIDX'
+FORMAT_VERSION = 2
+
+# value tags
+TAG_FALSE = 0x01
+TAG_TRUE = 0x02
+TAG_INT = 0x03            # i64
+TAG_BIGINT = 0x04         # u32(length) signed little endian two's complement
+TAG_FLOAT = 0x05          # f64
+TAG_COMPLEX = 0x06        # f64 f64
+TAG_STR = 0x07            # str
+TAG_DATETIME = 0x08       # u16(year) u8(month) u8(day) u8(hour) u8(minute) u8(second) u32(usec)
+TAG_DATE = 0x09           # u16(year) u8(month) u8(day)
+TAG_LIST = 0x10           # u32(count) value*
+TAG_SET = 0x11            # u32(count) value*
+TAG_TUPLE = 0x12          # u32(count) value*
+TAG_FROZENSET = 0x13      # u32(count) value*
+TAG_DICT = 0x14           # u32(count) (value(key) value)*
+TAG_ARRAY = 0x20          # str(dtype descr) u8(ndim) u64(dim)* (u64(length) bytes | value*)
+TAG_TABLE = 0x21          # u32(columns) u64(rows) (str(name) u64(length) value(array))*
+
+_U8 = struct.Struct('<B')
+_U32 = struct.Struct('<I')
+_U64 = struct.Struct('<Q')
+_I64 = struct.Struct('<q')
+_F64 = struct.Struct('<d')
+_C128 = struct.Struct('<dd')
+_DATETIME = struct.Struct('<HBBBBBI')
+_DATE = struct.Struct('<HBB')
+_FOOTER = struct.Struct('<Q4s')
+
+# records are written to the file once this many bytes have been gathered
+_WRITE_BUFFER_BYTES = 1024 * 1024
+
+# containers whose elements follow their u32 count, the elements of a dict are its keys and values
+_CONTAINER_TAGS = {TAG_LIST, TAG_SET, TAG_TUPLE, TAG_FROZENSET, TAG_DICT}
+
+# identifier types that are written as a regular list or dict once their stream is exhausted
+_STREAM_TYPES = {'list stream': 'list', 'dict stream': 'dict'}
+
+
+def isBinary(eml_filename: str):  # --------------------------------------------------- isBinary >>
+  """
+  Determines if an existing file is a beML file.
+
+  :param eml_filename: the filename to be checked
+  :return: True if the file starts with the beML magic number, False otherwise
+  """
+  with open(eml_filename, 'rb') as file:
+    return file.read(len(MAGIC)) == MAGIC
+  pass
+
+
+def peek(eml_filename: str):  # ----------------------------------------------------------- peek >>
+  """
+  Reads the header meta data and the identifiers of a beML file from its header and trailing index
+  without reading any of the records.
+
+  :param eml_filename: the beML filename
+  :return: eml_meta_data, identifiers
+  """
+  with open(eml_filename, 'rb') as file:
+    eml_meta_data = _readHeader(file, eml_filename)
+
+  identifiers = {entry[0]: entry[1] for entry in readIndex(eml_filename)}
+  return eml_meta_data, identifiers
+  pass
+
+
+def readIndex(eml_filename: str):  # ------------------------------------------------- readIndex >>
+  """
+  Reads the trailing index of a beML file without reading any of the records.
+
+  :param eml_filename: the beML filename
+  :return: list of (identifier, identifier type, record offset, record length, crc-32, fingerprint)
+           tuples, the crc-32 and fingerprint are None when they are not held by the index
+  """
+  with open(eml_filename, 'rb') as file:
+    version = file.read(len(MAGIC) + 1)[-1]
+    file.seek(-_FOOTER.size, os.SEEK_END)
+    index_offset, footer_magic = _FOOTER.unpack(file.read(_FOOTER.size))
+    if footer_magic != FOOTER_MAGIC:
+      raise Exception('Read beML error: ' + eml_filename + ' has no index')
+    end = file.seek(0, os.SEEK_END) - _FOOTER.size
+    file.seek(index_offset)
+    buffer = file.read(end - index_offset)
+  return _decodeIndex(buffer, 0, version)
+  pass
+
+
+def verify(eml_filename: str):  # ------------------------------------------------------- verify >>
+  """
+  Checks every record of a beML file against the crc-32 held for it in the index, the records are
+  checksummed without being decoded.
+
+  :param eml_filename: the beML filename
+  :return: list of the identifiers of the records not matching their crc-32
+  """
+  corrupted = list()
+  with open(eml_filename, 'rb') as file:
+    if file.read(len(MAGIC) + 1)[-1] < 2:
+      raise Exception('Read beML error: ' + eml_filename + ' is a format version 1 file without '
+                      'record checksums')
+    for identifier, entrytype, offset, length, checksum, fingerprint in readIndex(eml_filename):
+      if checksumRange(file, offset, length) != checksum:
+        corrupted.append(identifier)
+  return corrupted
+  pass
+
+
+def _decodeHeader(buffer, offset: int):  # --------------------------------------- _decodeHeader >>
+  """
+  Decodes the header meta data.
+
+  :param buffer: bytes holding the header
+  :param offset: offset of the header length
+  :return: dict of the header meta data, offset of the first record
+  """
+  length = _U32.unpack_from(buffer, offset)[0]
+  offset += _U32.size
+  end = offset + length
+
+  eml_meta_data = dict()
+  eml_meta_data['version'] = _F64.unpack_from(buffer, offset)[0]
+  offset += _F64.size
+  eml_meta_data['lamguage'], offset = _decodeStr(buffer, offset)
+  # each datetime is preceded by its tag
+  eml_meta_data['creation date'] = datetime(*_DATETIME.unpack_from(buffer, offset + 1))
+  offset += 1 + _DATETIME.size
+  eml_meta_data['last update'] = datetime(*_DATETIME.unpack_from(buffer, offset + 1))
+  return eml_meta_data, end
+  pass
+
+
+def _readHeader(file, eml_filename: str):  # --------------------------------------- _readHeader >>
+  """
+  Reads the header of a beML file without reading any of the records.
+
+  :param file: the beML file opened for binary reading and positioned at its start
+  :param eml_filename: the beML filename
+  :return: the header meta data
+  """
+  buffer = file.read(len(MAGIC) + 1 + _U32.size)
+  if buffer[:len(MAGIC)] != MAGIC:
+    raise Exception('Read beML error: ' + eml_filename + ' is not a beML file')
+  length = _U32.unpack_from(buffer, len(MAGIC) + 1)[0]
+  return _decodeHeader(buffer + file.read(length), len(MAGIC) + 1)[0]
+  pass
+
+
+def _decodeIndex(buffer, offset: int, version: int):  # --------------------------- _decodeIndex >>
+  """
+  Decodes the index of a beML file.
+
+  :param buffer: bytes holding the index
+  :param offset: offset of the index within buffer
+  :param version: the format version of the file
+  :return: list of (identifier, identifier type, record offset, record length, crc-32,
+           fingerprint) tuples
+  """
+  count = _U32.unpack_from(buffer, offset)[0]
+  offset += _U32.size
+
+  index = list()
+  for ii in range(count):
+    identifier, offset = _decodeStr(buffer, offset)
+    entrytype, offset = _decodeAscii(buffer, offset)
+    record_offset, record_length = struct.unpack_from('<QQ', buffer, offset)
+    offset += 16
+    checksum = fingerprint = None
+    if version >= 2:
+      checksum, has_fingerprint = struct.unpack_from('<IB', buffer, offset)
+      offset += 5
+      if has_fingerprint:
+        fingerprint = bytes(buffer[offset:offset + 16])
+        offset += 16
+    index.append((identifier, entrytype, record_offset, record_length, checksum, fingerprint))
+  return index
+  pass
+
+
+def _closeContainer(tag: int, elements: list):  # ------------------------------ _closeContainer >>
+  """
+  Converts the decoded elements of a container to its data type.
+
+  :param tag: the container tag
+  :param elements: the decoded elements, alternating keys and values for a dict
+  :return: the decoded container
+  """
+  if tag == TAG_DICT:
+    pairs = iter(elements)
+    return dict(zip(pairs, pairs))
+  elif tag == TAG_LIST:
+    return elements
+  elif tag == TAG_TUPLE:
+    return tuple(elements)
+  elif tag == TAG_SET:
+    return set(elements)
+  return frozenset(elements)
+  pass
+
+
+def _decodeAscii(buffer, offset: int):  # ----------------------------------------- _decodeAscii >>
+  """
+  Decodes a u8 length prefixed ascii string.
+
+  :param buffer: bytes being decoded
+  :param offset: offset of the length
+  :return: the string and the offset following it
+  """
+  length = buffer[offset]
+  offset += 1
+  return bytes(buffer[offset:offset + length]).decode('ascii'), offset + length
+  pass
+
+
+def _decodeStr(buffer, offset: int):  # --------------------------------------------- _decodeStr >>
+  """
+  Decodes a u32 length prefixed utf-8 string.
+
+  :param buffer: bytes being decoded
+  :param offset: offset of the length
+  :return: the string and the offset following it
+  """
+  length = _U32.unpack_from(buffer, offset)[0]
+  offset += _U32.size
+  return bytes(buffer[offset:offset + length]).decode('utf-8'), offset + length
+  pass
+
+
+def _encodeAscii(buffer: bytearray, value: str):  # ------------------------------- _encodeAscii >>
+  """
+  Encodes a u8 length prefixed ascii string.
+
+  :param buffer: bytearray being encoded to
+  :param value: the string
+  """
+  encoded = value.encode('ascii')
+  buffer += _U8.pack(len(encoded))
+  buffer += encoded
+  pass
+
+
+def _encodeStr(buffer: bytearray, value: str):  # ----------------------------------- _encodeStr >>
+  """
+  Encodes a u32 length prefixed utf-8 string.
+
+  :param buffer: bytearray being encoded to
+  :param value: the string
+  """
+  encoded = value.encode('utf-8')
+  buffer += _U32.pack(len(encoded))
+  buffer += encoded
+  pass
+
+
+class _Write_beML:  # ============================================================ _Write_beML >>>
+  """
+  Writes a beML file.
+  valid data types that are used include the following:
+    Primitives:
+      bool, int, float, complex, str, datetime, date
+    Containers:
+      array, dict, list, set, tuple, and FrozenSet
+  """
+
+  def __init__(self, eml_filename: str, eml_meta_data: dict,  # ----------------------- __init__ >>
+               identifiers: dict, eml_data: dict, stats: _Stats_eML = None,
+               source=None, source_entries: dict = None):
+    """
+
+    :param eml_filename: the fully qualified beML filename
+    :param eml_meta_data: the meta data of the eML file
+    :param identifiers: the identifiers and their types
+    :param eml_data: the user specified data of the eML file
+    :param stats: optional statistics collected whilst saving, None disables the instrumentation
+    :param source: an existing beML file opened for reading, the unchanged records are copied from
+                   it
+    :param source_entries: index of the records of source, identifier -> (offset, length,
+                           crc-32, fingerprint). Records whose fingerprint is unchanged are copied
+                           rather than encoded
+    """
+    self.eml_filename = eml_filename
+    self.eml_meta_data = eml_meta_data
+    self.identifiers = identifiers
+    self.eml_data = eml_data
+    self.stats = stats
+    self.source = source
+    self.source_entries = source_entries if source_entries is not None else dict()
+
+    # index of the records written, identifier -> (offset, length, crc-32, fingerprint)
+    self.entries = dict()
+
+    # encoders of the exact python types, anything else falls back to _encodeOther
+    self._encoders = {bool: self._encodeBool, int: self._encodeInt, float: self._encodeFloat,
+                      complex: self._encodeComplex, str: self._encodeString,
+                      datetime: self._encodeDatetime, date: self._encodeDate,
+                      list: self._encodeList, set: self._encodeSet, tuple: self._encodeTuple,
+                      frozenset: self._encodeFrozenSet, dict: self._encodeDict,
+                      _Table_eML: self._encodeTable}
+    if isNumpyLoaded():
+      self._encoders[np.ndarray] = self._encodeArray
+    pass
+
+  def save(self):  # ---------------------------------------------------------------------- save >>
+    """
+    saves the encoded entries to the file specified and closes the file
+    """
+    with open(self.eml_filename, 'wb') as file:
+      self._writeEntries(file)
+    pass
+
+  def encodeValue(self, buffer: bytearray, value):  # ------------------------------ encodeValue >>
+    """
+    Encodes a single tagged value. The encoders of containers only write their tag and count and
+    return an iterator over the values they hold, which are encoded from an explicit stack rather
+    than by recursion so there is no limit on the nesting depth.
+
+    :param buffer: bytearray being encoded to
+    :param value: the value to be encoded
+    """
+    encoders = self._encoders
+    stack = [iter((value,))]
+    # ids of the containers being encoded, in stack order and as a set, a container holding
+    # itself would never end
+    stack_ids = [None]
+    open_ids = set()
+    while len(stack) > 0:
+      for value in stack[-1]:
+        encoder = encoders.get(type(value))
+        if encoder is None:
+          elements = self._encodeOther(buffer, value)
+        else:
+          elements = encoder(buffer, value)
+        if elements is not None:
+          container_id = id(value)
+          if container_id in open_ids:
+            raise Exception('eML error: a ' + type(value).__name__
+                            + ' contains itself and can not be written')
+          # the iterator of the enclosing container resumes once the nested one is exhausted
+          stack.append(elements)
+          stack_ids.append(container_id)
+          open_ids.add(container_id)
+          break
+      else:
+        stack.pop()
+        open_ids.discard(stack_ids.pop())
+    pass
+
+  def _encodeArray(self, buffer: bytearray, value: np.ndarray):  # ---------------- _encodeArray >>
+    """
+    Encodes an array, the data of non object arrays is written in bulk.
+    """
+    buffer.append(TAG_ARRAY)
+    _encodeStr(buffer, repr(np.lib.format.dtype_to_descr(value.dtype)))
+    buffer += _U8.pack(value.ndim)
+    for dim in value.shape:
+      buffer += _U64.pack(dim)
+
+    if value.dtype == object:
+      for item in value.flat:
+        self.encodeValue(buffer, item)
+    else:
+      data = np.ascontiguousarray(value).tobytes()
+      buffer += _U64.pack(len(data))
+      buffer += data
+    pass
+
+  def _encodeBool(self, buffer: bytearray, value):  # ------------------------------ _encodeBool >>
+    """
+    Encodes a bool.
+    """
+    buffer.append(TAG_TRUE if value else TAG_FALSE)
+    pass
+
+  def _encodeComplex(self, buffer: bytearray, value):  # ------------------------ _encodeComplex >>
+    """
+    Encodes a complex value as two f64.
+    """
+    buffer.append(TAG_COMPLEX)
+    buffer += _C128.pack(value.real, value.imag)
+    pass
+
+  def _encodeContainer(self, buffer: bytearray, tag: int, value):  # ---------- _encodeContainer >>
+    """
+    Encodes the tag and count of a list, set, tuple or frozenset.
+
+    :return: iterator over the elements still to be encoded
+    """
+    buffer.append(tag)
+    buffer += _U32.pack(len(value))
+    return iter(value)
+    pass
+
+  def _encodeDate(self, buffer: bytearray, value: date):  # ------------------------ _encodeDate >>
+    """
+    Encodes a date.
+    """
+    buffer.append(TAG_DATE)
+    buffer += _DATE.pack(value.year, value.month, value.day)
+    pass
+
+  def _encodeDatetime(self, buffer: bytearray, value: datetime):  # ------------ _encodeDatetime >>
+    """
+    Encodes a datetime to microsecond precision.
+    """
+    buffer.append(TAG_DATETIME)
+    buffer += _DATETIME.pack(value.year, value.month, value.day, value.hour, value.minute,
+                             value.second, value.microsecond)
+    pass
+
+  def _encodeDict(self, buffer: bytearray, value: dict):  # ------------------------ _encodeDict >>
+    """
+    Encodes the tag and count of a dict, which is followed by alternating keys and values.
+
+    :return: iterator over the keys and values still to be encoded
+    """
+    buffer.append(TAG_DICT)
+    buffer += _U32.pack(len(value))
+    return itertools.chain.from_iterable(value.items())
+    pass
+
+  def _encodeFloat(self, buffer: bytearray, value):  # ---------------------------- _encodeFloat >>
+    """
+    Encodes a float as an f64.
+    """
+    buffer.append(TAG_FLOAT)
+    buffer += _F64.pack(value)
+    pass
+
+  def _encodeFrozenSet(self, buffer: bytearray, value):  # -------------------- _encodeFrozenSet >>
+    """
+    Encodes a frozenset.
+    """
+    return self._encodeContainer(buffer, TAG_FROZENSET, value)
+    pass
+
+  def _encodeInt(self, buffer: bytearray, value):  # -------------------------------- _encodeInt >>
+    """
+    Encodes an int as an i64, or as a two's complement byte string if it does not fit.
+    """
+    if -2 ** 63 <= value < 2 ** 63:
+      buffer.append(TAG_INT)
+      buffer += _I64.pack(value)
+    else:
+      data = value.to_bytes((value.bit_length() + 8) // 8, 'little', signed=True)
+      buffer.append(TAG_BIGINT)
+      buffer += _U32.pack(len(data))
+      buffer += data
+    pass
+
+  def _encodeList(self, buffer: bytearray, value):  # ------------------------------ _encodeList >>
+    """
+    Encodes a list.
+    """
+    return self._encodeContainer(buffer, TAG_LIST, value)
+    pass
+
+  def _encodeOther(self, buffer: bytearray, value):  # ---------------------------- _encodeOther >>
+    """
+    Encodes subclasses of the supported types and numpy bools. Other numpy scalars are rejected as
+    they are by _Write_eML, rather than losing their data type.
+
+    :return: iterator over the elements still to be encoded when value is a container
+    """
+    # numpy scalars can only be handed in once numpy has been imported
+    if isinstance(value, bool) or isNumpyLoaded() and isinstance(value, np.bool_):
+      self._encodeBool(buffer, value)
+    elif isinstance(value, int):
+      self._encodeInt(buffer, int(value))
+    elif isinstance(value, float):
+      self._encodeFloat(buffer, float(value))
+    elif isinstance(value, complex):
+      self._encodeComplex(buffer, complex(value))
+    elif isinstance(value, str):
+      self._encodeString(buffer, value)
+    elif isinstance(value, datetime):
+      self._encodeDatetime(buffer, value)
+    elif isinstance(value, date):
+      self._encodeDate(buffer, value)
+    elif isArray(value):
+      self._encodeArray(buffer, value)
+    elif isinstance(value, dict):
+      return self._encodeDict(buffer, value)
+    elif isinstance(value, list):
+      return self._encodeList(buffer, value)
+    elif isinstance(value, set):
+      return self._encodeSet(buffer, value)
+    elif isinstance(value, tuple):
+      return self._encodeTuple(buffer, value)
+    elif isinstance(value, frozenset):
+      return self._encodeFrozenSet(buffer, value)
+    else:
+      raise Exception('Write beML error: Data type for ' + str(type(value))
+                      + ' is not currently supported')
+    pass
+
+  def _encodeSet(self, buffer: bytearray, value):  # -------------------------------- _encodeSet >>
+    """
+    Encodes a set.
+    """
+    return self._encodeContainer(buffer, TAG_SET, value)
+    pass
+
+  def _encodeString(self, buffer: bytearray, value):  # -------------------------- _encodeString >>
+    """
+    Encodes a str.
+    """
+    buffer.append(TAG_STR)
+    _encodeStr(buffer, value)
+    pass
+
+  def _encodeTable(self, buffer: bytearray, value: _Table_eML):  # ---------------- _encodeTable >>
+    """
+    Encodes a table, each column is length prefixed so that it can be decoded on its own.
+    """
+    names = value.getColumnNames()
+    buffer.append(TAG_TABLE)
+    buffer += _U32.pack(len(names))
+    buffer += _U64.pack(len(value))
+    for name in names:
+      _encodeStr(buffer, name)
+      length_offset = len(buffer)
+      buffer += _U64.pack(0)
+      self._encodeArray(buffer, value.getColumn(name))
+      _U64.pack_into(buffer, length_offset, len(buffer) - length_offset - _U64.size)
+    pass
+
+  def _encodeTuple(self, buffer: bytearray, value):  # ---------------------------- _encodeTuple >>
+    """
+    Encodes a tuple.
+    """
+    return self._encodeContainer(buffer, TAG_TUPLE, value)
+    pass
+
+  def _writeEntries(self, file):  # ---------------------------------------------- _writeEntries >>
+    """
+    Writes the header, one record per identifier, the index and the footer to the open file.
+
+    :param file: the open beML file being written
+    """
+    stats = self.stats
+
+    header = bytearray()
+    header += _F64.pack(float(self.eml_meta_data['version']))
+    _encodeStr(header, self.eml_meta_data['lamguage'])
+    self._encodeDatetime(header, self.eml_meta_data['creation date'])
+    self._encodeDatetime(header, self.eml_meta_data['last update'])
+    file.write(MAGIC + _U8.pack(FORMAT_VERSION) + _U32.pack(len(header)) + header)
+
+    # small records are gathered into one buffer rather than written one at a time, the offsets
+    # are tracked here so the file position is only needed around stream records
+    index = list()
+    pending = bytearray()
+    position = file.tell()
+    source = self.source if len(self.source_entries) > 0 else None
+    for id, entrytype in self.identifiers.items():
+      if stats is not None:
+        start = time.perf_counter()
+
+      stored = self.source_entries.get(id)
+      if isinstance(self.eml_data[id], _WrittenStream):
+        # a stream consumed by an earlier save can only be copied from the file it was saved to
+        if stored is None:
+          raise Exception(self.eml_data[id].getSaveError(id))
+        entrytype = _STREAM_TYPES[entrytype]
+        fingerprint = None
+        unchanged = True
+      else:
+        fingerprint = fingerprintValue(entrytype, self.eml_data[id])
+        unchanged = fingerprint is not None and stored is not None and stored[3] == fingerprint
+      if unchanged:
+        # unchanged records are copied from the source file rather than encoded
+        file.write(pending)
+        position += len(pending)
+        pending = bytearray()
+        copyRange(source, file, stored[0], stored[1])
+        index.append((id, entrytype, position, stored[1], stored[2], fingerprint))
+        position += stored[1]
+        if stats is not None:
+          stats.count('reused entries')
+      elif entrytype in _STREAM_TYPES:
+        file.write(pending)
+        pending = bytearray()
+        record_offset = file.tell()
+        self._writeStreamRecord(file, id, _STREAM_TYPES[entrytype], self.eml_data[id])
+        entrytype = _STREAM_TYPES[entrytype]
+        position = file.tell()
+        # the back-patched count and length are checksummed once the record is complete
+        file.flush()
+        with open(self.eml_filename, 'rb') as written:
+          checksum = checksumRange(written, record_offset, position - record_offset)
+        index.append((id, entrytype, record_offset, position - record_offset, checksum, None))
+      else:
+        record_start = len(pending)
+        _encodeStr(pending, id)
+        _encodeAscii(pending, entrytype)
+        payload_start = len(pending) + _U64.size
+        pending += _U64.pack(0)
+        self.encodeValue(pending, self.eml_data[id])
+        _U64.pack_into(pending, payload_start - _U64.size, len(pending) - payload_start)
+        with memoryview(pending) as view:
+          checksum = zlib.crc32(view[record_start:])
+        index.append((id, entrytype, position + record_start, len(pending) - record_start,
+                      checksum, fingerprint))
+        if stats is not None:
+          encoded = time.perf_counter()
+          stats.addTime('encode', encoded - start)
+        if len(pending) >= _WRITE_BUFFER_BYTES:
+          file.write(pending)
+          position += len(pending)
+          pending = bytearray()
+          if stats is not None:
+            stats.addTime('write', time.perf_counter() - encoded)
+
+      if stats is not None:
+        stats.timeIdentifier(id, time.perf_counter() - start)
+        stats.countEntry(entrytype)
+    file.write(pending)
+
+    indexbuffer = bytearray()
+    indexbuffer += _U32.pack(len(index))
+    for id, entrytype, record_offset, record_length, checksum, fingerprint in index:
+      _encodeStr(indexbuffer, id)
+      _encodeAscii(indexbuffer, entrytype)
+      indexbuffer += struct.pack('<QQIB', record_offset, record_length, checksum,
+                                 fingerprint is not None)
+      if fingerprint is not None:
+        indexbuffer += fingerprint
+      self.entries[id] = (record_offset, record_length, checksum, fingerprint)
+    index_offset = file.tell()
+    file.write(indexbuffer)
+    file.write(_FOOTER.pack(index_offset, FOOTER_MAGIC))
+
+    if stats is not None:
+      stats.count('bytes', file.tell())
+    pass
+
+  def _writeStreamRecord(self, file, id, entrytype: str, iterable):  # ------ _writeStreamRecord >>
+    """
+    Writes a list or dict record from an iterable, element by element. The element count and the
+    payload length are back-patched once the iterable is exhausted.
+
+    :param file: the open beML file being written
+    :param id: the user specified identifier
+    :param entrytype: list or dict
+    :param iterable: iterable producing elements, or (key, value) pairs for a dict
+    """
+    record = bytearray()
+    _encodeStr(record, id)
+    _encodeAscii(record, entrytype)
+    file.write(record)
+    length_offset = file.tell()
+    file.write(_U64.pack(0))
+    payload_start = file.tell()
+    file.write(_U8.pack(TAG_DICT if entrytype == 'dict' else TAG_LIST) + _U32.pack(0))
+
+    count = 0
+    for item in iterable:
+      buffer = bytearray()
+      if entrytype == 'dict':
+        self.encodeValue(buffer, item[0])
+        self.encodeValue(buffer, item[1])
+      else:
+        self.encodeValue(buffer, item)
+      file.write(buffer)
+      count += 1
+    if count >= 2 ** 32:
+      raise Exception('Write beML error: streamed container has too many elements ' + str(count))
+
+    end_offset = file.tell()
+    file.seek(length_offset)
+    file.write(_U64.pack(end_offset - payload_start))
+    file.seek(payload_start + 1)
+    file.write(_U32.pack(count))
+    file.seek(end_offset)
+    pass
+
+
+class _Read_beML:  # ============================================================== _Read_beML >>>
+  """
+  Reads and decodes a beML file.
+  valid data types that are used include the following:
+    Primitives:
+      bool, int, float, complex, str, datetime, date
+    Containers:
+      array, dict, list, set, tuple, and FrozenSet
+  """
+
+  def __init__(self, eml_filename: str, stats: _Stats_eML = None,  # ------------------ __init__ >>
+               shared_arrays=None, ranges: list = None):
+    """
+    Loads all of the information within the beML file.
+
+    :param eml_filename: name of the beML file
+    :param stats: optional statistics collected whilst loading, None disables the instrumentation
+    :param shared_arrays: optional _SharedArrays_eML the top level arrays are attached from or
+                          shared through, None decodes every array locally
+    :param ranges: optional (offset, length) ranges of the records to be loaded, taken from
+                   readIndex. Only the header and those records are read. None loads the whole
+                   file
+    """
+    self.eml_meta_data = dict()
+    self.eml_data = dict()
+    self.identifiers = dict()
+
+    # index of the records, it is only read by readIndex once a record is copied from this file
+    self.entries = None
+
+    self._decoders = {TAG_FALSE: self._decodeFalse, TAG_TRUE: self._decodeTrue,
+                      TAG_INT: self._decodeInt, TAG_BIGINT: self._decodeBigInt,
+                      TAG_FLOAT: self._decodeFloat, TAG_COMPLEX: self._decodeComplex,
+                      TAG_STR: _decodeStr, TAG_DATETIME: self._decodeDatetime,
+                      TAG_DATE: self._decodeDate, TAG_ARRAY: self._decodeArray,
+                      TAG_TABLE: self._decodeTable}
+
+    if ranges is not None:
+      with open(eml_filename, 'rb') as file:
+        self.eml_meta_data = _readHeader(file, eml_filename)
+        for offset, length in ranges:
+          file.seek(offset)
+          buffer = file.read(length)
+          id, entrytype, value_offset, end = self.decodeRecordHead(buffer, 0)
+          self.eml_data[id] = self.decodeValue(buffer, value_offset)[0]
+          self.identifiers[id] = entrytype
+      return
+
+    if stats is not None:
+      start = time.perf_counter()
+
+    with open(eml_filename, 'rb') as file:
+      buffer = file.read()
+
+    if stats is not None:
+      decoding = time.perf_counter()
+      stats.addTime('io', decoding - start)
+      stats.count('bytes', len(buffer))
+
+    if buffer[:len(MAGIC)] != MAGIC:
+      raise Exception('Read beML error: ' + eml_filename + ' is not a beML file')
+    if buffer[len(MAGIC)] > FORMAT_VERSION:
+      raise Exception('Read beML error: unsupported beML format version '
+                      + str(buffer[len(MAGIC)]))
+
+    self.eml_meta_data, offset = _decodeHeader(buffer, len(MAGIC) + 1)
+
+    index_offset = _FOOTER.unpack_from(buffer, len(buffer) - _FOOTER.size)[0]
+    while offset < index_offset:
+      if stats is not None:
+        entry_start = time.perf_counter()
+
+      id, entrytype, value_offset, offset = self.decodeRecordHead(buffer, offset)
+      if shared_arrays is not None and entrytype == 'array':
+        self.eml_data[id] = shared_arrays.getArray(
+          id, lambda: self.decodeValue(buffer, value_offset)[0])
+      else:
+        self.eml_data[id] = self.decodeValue(buffer, value_offset)[0]
+      self.identifiers[id] = entrytype
+
+      if stats is not None:
+        stats.countEntry(entrytype)
+        stats.timeIdentifier(id, time.perf_counter() - entry_start)
+    if stats is not None:
+      stats.addTime('decode', time.perf_counter() - decoding)
+    pass
+
+  def getExistingData(self):  # ------------------------------------------------ getExistingData >>
+    """
+    passes all of the decoded data for this beML file to the calling routine.
+    :return: 3 dicts containing eml_meta_data, identifiers, eml_data
+    """
+    return self.eml_meta_data, self.identifiers, self.eml_data
+    pass
+
+  def decodeRecordHead(self, buffer, offset: int):  # ------------------------- decodeRecordHead >>
+    """
+    Decodes the head of a record.
+
+    :param buffer: bytes holding the record
+    :param offset: offset of the record
+    :return: identifier, identifier type, offset of the value, offset of the following record
+    """
+    id, offset = _decodeStr(buffer, offset)
+    entrytype, offset = _decodeAscii(buffer, offset)
+    length = _U64.unpack_from(buffer, offset)[0]
+    offset += _U64.size
+    return id, entrytype, offset, offset + length
+    pass
+
+  def decodeValue(self, buffer, offset: int):  # ----------------------------------- decodeValue >>
+    """
+    Decodes a single tagged value. The containers being decoded are held on an explicit stack
+    rather than by recursion, so there is no limit on the nesting depth.
+
+    :param buffer: bytes holding the value
+    :param offset: offset of the tag
+    :return: the value and the offset following it
+    """
+    decoders = self._decoders
+    container_tags = _CONTAINER_TAGS
+
+    # each frame holds the container tag, the number of values it holds and the values decoded so
+    # far. The count and values of the innermost container are also held in locals.
+    stack = list()
+    count = 0
+    elements = None
+    while True:
+      tag = buffer[offset]
+      if tag in container_tags:
+        length = _U32.unpack_from(buffer, offset + 1)[0]
+        offset += 1 + _U32.size
+        if tag == TAG_DICT:
+          length *= 2
+        if length > 0:
+          count = length
+          elements = list()
+          stack.append((tag, count, elements))
+          continue
+        valueout = _closeContainer(tag, list())
+      else:
+        decoder = decoders.get(tag)
+        if decoder is None:
+          raise Exception('Read beML error: invalid value tag ' + str(tag) + ' at ' + str(offset))
+        valueout, offset = decoder(buffer, offset + 1)
+
+      if elements is None:
+        return valueout, offset
+
+      # adds the decoded value to its container, closing every container that is now complete
+      elements.append(valueout)
+      while len(elements) == count:
+        valueout = _closeContainer(stack.pop()[0], elements)
+        if len(stack) == 0:
+          return valueout, offset
+        tag, count, elements = stack[-1]
+        elements.append(valueout)
+    pass
+
+  def _decodeArray(self, buffer, offset: int):  # --------------------------------- _decodeArray >>
+    """
+    Decodes an array, the data of non object arrays is read in bulk.
+    """
+    descr, offset = _decodeStr(buffer, offset)
+    dtype = np.lib.format.descr_to_dtype(ast.literal_eval(descr))
+    ndim = buffer[offset]
+    offset += 1
+    shape = struct.unpack_from('<' + 'Q' * ndim, buffer, offset)
+    offset += 8 * ndim
+
+    if dtype == object:
+      count = 1
+      for dim in shape:
+        count *= dim
+      arrayout = np.empty(count, dtype=object)
+      for ii in range(count):
+        arrayout[ii], offset = self.decodeValue(buffer, offset)
+      return arrayout.reshape(shape), offset
+
+    length = _U64.unpack_from(buffer, offset)[0]
+    offset += _U64.size
+    arrayout = np.frombuffer(buffer, dtype=dtype, count=length // max(dtype.itemsize, 1),
+                             offset=offset).reshape(shape).copy()
+    return arrayout, offset + length
+    pass
+
+  def _decodeBigInt(self, buffer, offset: int):  # ------------------------------- _decodeBigInt >>
+    """
+    Decodes an int too large for an i64.
+    """
+    length = _U32.unpack_from(buffer, offset)[0]
+    offset += _U32.size
+    return int.from_bytes(buffer[offset:offset + length], 'little', signed=True), offset + length
+    pass
+
+  def _decodeColumn(self, column: bytes):  # ------------------------------------- _decodeColumn >>
+    """
+    Decodes a single column of a table.
+
+    :param column: bytes holding the column array
+    :return: the column as a numpy array
+    """
+    return self.decodeValue(column, 0)[0]
+    pass
+
+  def _decodeComplex(self, buffer, offset: int):  # ----------------------------- _decodeComplex >>
+    """
+    Decodes a complex value.
+    """
+    real, imag = _C128.unpack_from(buffer, offset)
+    return complex(real, imag), offset + _C128.size
+    pass
+
+  def _decodeDate(self, buffer, offset: int):  # ----------------------------------- _decodeDate >>
+    """
+    Decodes a date.
+    """
+    return date(*_DATE.unpack_from(buffer, offset)), offset + _DATE.size
+    pass
+
+  def _decodeDatetime(self, buffer, offset: int):  # --------------------------- _decodeDatetime >>
+    """
+    Decodes a datetime.
+    """
+    return datetime(*_DATETIME.unpack_from(buffer, offset)), offset + _DATETIME.size
+    pass
+
+  def _decodeFalse(self, buffer, offset: int):  # --------------------------------- _decodeFalse >>
+    """
+    Decodes a bool False.
+    """
+    return False, offset
+    pass
+
+  def _decodeFloat(self, buffer, offset: int):  # --------------------------------- _decodeFloat >>
+    """
+    Decodes a float.
+    """
+    return _F64.unpack_from(buffer, offset)[0], offset + _F64.size
+    pass
+
+  def _decodeInt(self, buffer, offset: int):  # ------------------------------------- _decodeInt >>
+    """
+    Decodes an int.
+    """
+    return _I64.unpack_from(buffer, offset)[0], offset + _I64.size
+    pass
+
+  def _decodeTable(self, buffer, offset: int):  # --------------------------------- _decodeTable >>
+    """
+    Decodes a table, the columns are only decoded when they are first accessed.
+    """
+    count, nrows = struct.unpack_from('<IQ', buffer, offset)
+    offset += _U32.size + _U64.size
+    tableout = _Table_eML()
+    tableout.nrows = nrows
+    for ii in range(count):
+      name, offset = _decodeStr(buffer, offset)
+      length = _U64.unpack_from(buffer, offset)[0]
+      offset += _U64.size
+      column = bytes(buffer[offset:offset + length])
+      tableout.addEncodedColumn(name, nrows, functools.partial(self._decodeColumn, column))
+      offset += length
+    return tableout, offset
+    pass
+
+  def _decodeTrue(self, buffer, offset: int):  # ----------------------------------- _decodeTrue >>
+    """
+    Decodes a bool True.
+    """
+    return True, offset
+    pass
@@ -0,0 +1,311 @@
+"""
+             _Cache_eML of the eML system
+
+                 created on 10/19/2026
+    Copyright (c) 2026 Turtle Bay Geophysical LLC
+                ALL RIGHTS RESERVED.
+
+ Questions and comments can be directed to: Support@TurtleBayGeophysical.com
+
+  Licensed under the Attribution-NonCommercial-ShareAlike 4.0 International
+  (CC BY-NC-SA 4.0) (the "License"); you may not use this file except in
+  compliance with the License.
+
+  You may obtain a copy of the License at
+
+      https://creativecommons.org/licenses/by-nc-sa/4.0/
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+"""
+import copy
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+
+from _LazyNumpy_eML import isArray
+
+
+class _Cache_eML:  # ============================================================== _Cache_eML >>>
+  """
+  Process wide least recently used cache of parsed eML files. Entries are keyed by the real path
+  of the file and are invalidated when the size or modification time of the file changes, or
+  optionally when the hash of its contents changes.
+
+  The cached data is never handed out directly. The cache holds its own copy of the parsed values,
+  each lookup hands out fresh copies and arrays are handed out as read-only views, so callers can
+  not corrupt the cache.
+  """
+
+  def __init__(self, max_entries: int = 64, max_bytes: int = 256 * 1024 * 1024,
+               hash_contents: bool = False):
+    """
+
+    :param max_entries: maximum number of parsed files held
+    :param max_bytes: maximum estimated memory held by the parsed files
+    :param hash_contents: also validate entries against a hash of the file contents
+    """
+    self.max_entries = max_entries
+    self.max_bytes = max_bytes
+    self.hash_contents = hash_contents
+
+    # real path -> (signature, eml_meta_data, identifiers, eml_data, estimated bytes)
+    self.entries = OrderedDict()
+    self.current_bytes = 0
+
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self.invalidations = 0
+
+    self.lock = threading.Lock()
+    pass
+
+  def clear(self):  # -------------------------------------------------------------------- clear >>
+    """
+    Removes all of the cached files and resets the statistics.
+    """
+    with self.lock:
+      self.entries.clear()
+      self.current_bytes = 0
+      self.hits = 0
+      self.misses = 0
+      self.evictions = 0
+      self.invalidations = 0
+    pass
+
+  def configure(self, max_entries: int = None, max_bytes: int = None,  # ----------- configure >>
+                hash_contents: bool = None):
+    """
+    Changes the limits of the cache, evicting files if the cache is now over its limits.
+
+    :param max_entries: maximum number of parsed files held, unchanged if None
+    :param max_bytes: maximum estimated memory held by the parsed files, unchanged if None
+    :param hash_contents: validate entries against a hash of the file contents, unchanged if None
+    """
+    with self.lock:
+      if max_entries is not None:
+        self.max_entries = max_entries
+      if max_bytes is not None:
+        self.max_bytes = max_bytes
+      if hash_contents is not None:
+        self.hash_contents = hash_contents
+        # the existing signatures were made with the previous setting
+        self.entries.clear()
+        self.current_bytes = 0
+      self._evict()
+    pass
+
+  def get(self, eml_filename: str):  # ----------------------------------------------------- get >>
+    """
+    Looks up a parsed file.
+
+    :param eml_filename: the eml filename
+    :return: (eml_meta_data, identifiers, eml_data) on a hit, None on a miss. The values of the
+             returned eml_data are copies, see copyValue
+    """
+    key = os.path.realpath(eml_filename)
+    with self.lock:
+      if key not in self.entries:
+        self.misses += 1
+        return None
+      signature = self.entries[key][0]
+
+    if self.getSignature(eml_filename) != signature:
+      with self.lock:
+        if key in self.entries:
+          self._remove(key)
+          self.invalidations += 1
+        self.misses += 1
+      return None
+
+    with self.lock:
+      if key not in self.entries:
+        self.misses += 1
+        return None
+      self.entries.move_to_end(key)
+      self.hits += 1
+      signature, eml_meta_data, identifiers, eml_data, nbytes = self.entries[key]
+
+    # the cached values are never changed, so they are copied without holding the lock
+    return dict(eml_meta_data), dict(identifiers), {identifier: self.copyValue(value)
+                                                    for identifier, value in eml_data.items()}
+    pass
+
+  def getStats(self):  # -------------------------------------------------------------- getStats >>
+    """
+    :return: dict of the hit, miss, eviction and invalidation counts along with the current size
+    """
+    with self.lock:
+      lookups = self.hits + self.misses
+      return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+              'invalidations': self.invalidations, 'entries': len(self.entries),
+              'bytes': self.current_bytes, 'max_entries': self.max_entries,
+              'max_bytes': self.max_bytes,
+              'hit_ratio': self.hits / lookups if lookups > 0 else 0.0}
+    pass
+
+  def getSignature(self, eml_filename: str):  # ----------------------------------- getSignature >>
+    """
+    Gets the signature used to detect that a file has changed.
+
+    :param eml_filename: the eml filename
+    :return: (size, mtime, content hash) where the content hash is None unless hash_contents is
+             set, None if the file does not exist
+    """
+    try:
+      stat = os.stat(eml_filename)
+    except OSError:
+      return None
+
+    content_hash = None
+    if self.hash_contents:
+      content_hash = hashlib.blake2b()
+      with open(eml_filename, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+          content_hash.update(block)
+      content_hash = content_hash.hexdigest()
+
+    return stat.st_size, stat.st_mtime_ns, content_hash
+    pass
+
+  def invalidate(self, eml_filename: str):  # --------------------------------------- invalidate >>
+    """
+    Removes a file from the cache, used when the file is written by this process.
+
+    :param eml_filename: the eml filename
+    """
+    key = os.path.realpath(eml_filename)
+    with self.lock:
+      if key in self.entries:
+        self._remove(key)
+        self.invalidations += 1
+    pass
+
+  def put(self, eml_filename: str, signature, eml_meta_data: dict,  # ---------------------- put >>
+          identifiers: dict, eml_data: dict):
+    """
+    Adds a freshly parsed file to the cache. The cache keeps its own copy of the values, so the
+    caller keeps eml_data and may change it.
+
+    :param eml_filename: the eml filename
+    :param signature: signature of the file taken before it was parsed, see getSignature
+    :param eml_meta_data: the parsed meta data
+    :param identifiers: the parsed identifiers
+    :param eml_data: the parsed data
+    """
+    if signature is None:
+      return
+
+    eml_data = {identifier: self._copyPrivate(value) for identifier, value in eml_data.items()}
+    nbytes = self._estimateSize(eml_data)
+    if nbytes > self.max_bytes:
+      return
+
+    key = os.path.realpath(eml_filename)
+    with self.lock:
+      if key in self.entries:
+        self._remove(key)
+      self.entries[key] = (signature, dict(eml_meta_data), dict(identifiers), dict(eml_data),
+                           nbytes)
+      self.current_bytes += nbytes
+      self._evict()
+    pass
+
+  @staticmethod
+  def copyValue(value):  # ----------------------------------------------------------- copyValue >>
+    """
+    Copies a cached value so that it can be handed to the user. Immutable values are shared and
+    arrays are handed out as read-only views rather than copies.
+
+    :param value: value held by the cache
+    :return: value safe to hand to the user
+    """
+    if isinstance(value, (bool, int, float, complex, str, datetime, date)):
+      return value
+    if isArray(value):
+      view = value.view()
+      view.flags.writeable = False
+      return view
+    return copy.deepcopy(value)
+    pass
+
+  @staticmethod
+  def _copyPrivate(value):  # ----------------------------------------------------- _copyPrivate >>
+    """
+    Copies a freshly parsed value so that the cache does not share it with the instance that loaded
+    it. Arrays are held read-only, arrays that are already read-only, such as the views of shared
+    memory blocks, are not copied.
+
+    :param value: the parsed value
+    :return: value owned by the cache
+    """
+    if isinstance(value, (bool, int, float, complex, str, datetime, date)):
+      return value
+    if isArray(value):
+      if not value.flags.writeable:
+        return value
+      value = value.copy()
+      value.flags.writeable = False
+      return value
+    return copy.deepcopy(value)
+    pass
+
+  def _estimateSize(self, value):  # --------------------------------------------- _estimateSize >>
+    """
+    Estimates the memory held by a parsed value.
+
+    :param value: the parsed value
+    :return: estimated number of bytes
+    """
+    size = 0
+    stack = [value]
+    while len(stack) > 0:
+      item = stack.pop()
+      if isArray(item):
+        size += item.nbytes
+        if item.dtype == object:
+          stack.extend(item.flat)
+      elif isinstance(item, dict):
+        size += sys.getsizeof(item)
+        stack.extend(item.keys())
+        stack.extend(item.values())
+      elif isinstance(item, (list, set, tuple, frozenset)):
+        size += sys.getsizeof(item)
+        stack.extend(item)
+      else:
+        size += sys.getsizeof(item)
+    return size
+    pass
+
+  def _evict(self):  # ------------------------------------------------------------------ _evict >>
+    """
+    Removes the least recently used files until the cache is within its limits. The lock must be
+    held by the caller.
+    """
+    while len(self.entries) > 0 and (len(self.entries) > self.max_entries
+                                     or self.current_bytes > self.max_bytes):
+      key = next(iter(self.entries))
+      self._remove(key)
+      self.evictions += 1
+    pass
+
+  def _remove(self, key: str):  # ------------------------------------------------------ _remove >>
+    """
+    Removes a single file from the cache. The lock must be held by the caller.
+
+    :param key: real path of the file
+    """
+    self.current_bytes -= self.entries[key][4]
+    del self.entries[key]
+    pass
+
+
+# the cache shared by every eML instance within this process
+shared_cache = _Cache_eML()
@@ -0,0 +1,435 @@
+"""
+               _Cli_eML of the eML system
+
+                 created on 10/19/2026
+    Copyright (c) 2026 Turtle Bay Geophysical LLC
+                ALL RIGHTS RESERVED.
+
+ Questions and comments can be directed to: Support@TurtleBayGeophysical.com
+
+  Licensed under the Attribution-NonCommercial-ShareAlike 4.0 International
+  (CC BY-NC-SA 4.0) (the "License"); you may not use this file except in
+  compliance with the License.
+
+  You may obtain a copy of the License at
+
+      https://creativecommons.org/licenses/by-nc-sa/4.0/
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+
+  Command line of the eML system, run as python -m eML:
+
+    python -m eML inspect survey.eml
+    python -m eML validate 'surveys/**/*.eml' --jobs 4
+    python -m eML convert 'surveys/*.eml' --to json --output-dir exported
+    python -m eML convert 'exported/*.json' --to beml
+    python -m eML bench survey.eml --repeats 5
+
+  Each subcommand takes filenames or glob patterns, ** matching any number of directories. The
+  files are handed to a pool of worker processes, with at most two files per worker queued at a
+  time, and a progress line is written to stderr as each file completes. The exit code is 1 if any
+  file failed.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+from eML import eML
+from _Convert_eML import convertFile, readFile
+
+# extensions of the formats convert writes, see _Convert_eML
+_TARGET_EXTENSIONS = {'eml': '.eml', 'beml': '.beml', 'eml.gz': '.eml.gz', 'eml.xz': '.eml.xz',
+                      'eml.bz2': '.eml.bz2', 'json': '.json', 'npz': '.npz'}
+
+# extensions removed from a source filename before the extension of the target format is added
+_SOURCE_EXTENSIONS = ('.gz', '.xz', '.bz2', '.eml', '.beml', '.json', '.npz')
+
+# files queued per worker process, bounding the memory held by results not yet collected
+_QUEUED_PER_JOB = 2
+
+
+def main(argv: list = None):  # ----------------------------------------------------------- main >>
+  """
+  command line entry point of the eML system.
+
+  :param argv: command line arguments, sys.argv if None
+  :return: process exit code, 1 if any file failed
+  """
+  parser = argparse.ArgumentParser(prog='python -m eML',
+                                   description='inspect, validate, convert and benchmark eML files')
+  subparsers = parser.add_subparsers(dest='command', required=True)
+
+  inspect = subparsers.add_parser('inspect', help='print the header and identifiers of files')
+  inspect.add_argument('--json', action='store_true', help='print one JSON object per file')
+
+  validate = subparsers.add_parser('validate', help='check the checksums and decode every entry')
+  validate.add_argument('--quick', action='store_true', help='only check the checksums')
+
+  convert = subparsers.add_parser('convert', help='convert files to another format')
+  convert.add_argument('--to', required=True, choices=list(_TARGET_EXTENSIONS.keys()))
+  convert.add_argument('--output-dir', help='directory the converted files are written to, the '
+                                            'directory of each file if not given')
+  convert.add_argument('--overwrite', action='store_true', help='replace existing files')
+  convert.add_argument('--compact-layout', action='store_true',
+                       help='write text eML files without alignment padding')
+
+  bench = subparsers.add_parser('bench', help='time loading and saving files')
+  bench.add_argument('--repeats', type=int, default=3, help='the best of this many runs is kept')
+
+  for subparser in (inspect, validate, convert, bench):
+    subparser.add_argument('patterns', nargs='+', help='filenames or glob patterns')
+    subparser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                           help='number of worker processes, 1 runs in this process')
+    subparser.add_argument('--quiet', action='store_true', help='no progress line')
+  args = parser.parse_args(argv)
+
+  filenames = expandPatterns(args.patterns)
+  if len(filenames) == 0:
+    print('eML error: no files match ' + ' '.join(args.patterns), file=sys.stderr)
+    return 1
+
+  options = {key: value for key, value in vars(args).items()
+             if key not in ('command', 'patterns', 'jobs', 'quiet')}
+  failures = 0
+  for result in runBatch(args.command, filenames, options, args.jobs, args.quiet):
+    if result['error'] is not None:
+      failures += 1
+      print(result['filename'] + ': ' + result['error'], file=sys.stderr)
+    else:
+      _printResult(args.command, result, options)
+  return 1 if failures > 0 else 0
+  pass
+
+
+def expandPatterns(patterns: list):  # ------------------------------------------ expandPatterns >>
+  """
+  Expands filenames and glob patterns. Filenames that do not exist are kept so that they are
+  reported as failures.
+
+  :param patterns: filenames or glob patterns, ** matching any number of directories
+  :return: sorted list of the distinct filenames
+  """
+  filenames = set()
+  for pattern in patterns:
+    if glob.has_magic(pattern):
+      filenames.update(name for name in glob.glob(pattern, recursive=True) if os.path.isfile(name))
+    else:
+      filenames.add(pattern)
+  return sorted(filenames)
+  pass
+
+
+def runBatch(command: str, filenames: list, options: dict, jobs: int = 1,  # ---------- runBatch >>
+             quiet: bool = True):
+  """
+  Runs a subcommand on each file, across a pool of worker processes if jobs is above 1. Results are
+  yielded as the files complete, so they are not in the order of filenames.
+
+  :param command: the subcommand, inspect, validate, convert or bench
+  :param filenames: the filenames
+  :param options: the options of the subcommand
+  :param jobs: number of worker processes, 1 runs the subcommand in this process
+  :param quiet: do not write a progress line to stderr
+  :return: generator of the result dict of each file, see runFile
+  """
+  progress = _Progress(len(filenames), quiet)
+  if jobs <= 1 or len(filenames) == 1:
+    for filename in filenames:
+      result = runFile(command, filename, options)
+      progress.update(result)
+      yield result
+    progress.finish()
+    return
+
+  from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+  pending = iter(filenames)
+  with ProcessPoolExecutor(max_workers=min(jobs, len(filenames))) as executor:
+    # only a bounded number of files are queued, so a large batch does not hold every result
+    running = set()
+    for filename in pending:
+      running.add(executor.submit(runFile, command, filename, options))
+      if len(running) >= jobs * _QUEUED_PER_JOB:
+        break
+    while len(running) > 0:
+      done, running = wait(running, return_when=FIRST_COMPLETED)
+      for future in done:
+        result = future.result()
+        progress.update(result)
+        yield result
+        filename = next(pending, None)
+        if filename is not None:
+          running.add(executor.submit(runFile, command, filename, options))
+  progress.finish()
+  pass
+
+
+def runFile(command: str, filename: str, options: dict):  # ---------------------------- runFile >>
+  """
+  Runs a subcommand on a single file, run by the worker processes. Errors are returned rather than
+  raised so that one bad file does not stop the batch.
+
+  :param command: the subcommand, inspect, validate, convert or bench
+  :param filename: the filename
+  :param options: the options of the subcommand
+  :return: dict of the filename, the error message or None, the seconds taken and the results of
+           the subcommand
+  """
+  start = time.perf_counter()
+  result = {'filename': filename, 'error': None}
+  try:
+    if not os.path.isfile(filename):
+      raise Exception('eML error: ' + filename + ' does not exist')
+    result.update(_COMMANDS[command](filename, options))
+  except Exception as error:
+    result['error'] = str(error)
+  result['seconds'] = time.perf_counter() - start
+  return result
+  pass
+
+
+def getTargetFilename(filename: str, to: str, output_dir: str = None):  # ---- getTargetFilename >>
+  """
+  Gets the filename a file is converted to.
+
+  :param filename: the source filename
+  :param to: the target format, see _TARGET_EXTENSIONS
+  :param output_dir: the directory of the target, the directory of the source if None
+  :return: the target filename
+  """
+  directory, name = os.path.split(filename)
+  name = name[:len(name) - len(_getExtensions(name))]
+  return os.path.join(directory if output_dir is None else output_dir,
+                      name + _TARGET_EXTENSIONS[to])
+  pass
+
+
+def _benchFile(filename: str, options: dict):  # ------------------------------------ _benchFile >>
+  """
+  Times loading a file and saving it to a temporary file of the same format, keeping the best of
+  the repeated runs.
+
+  :param filename: the eML filename
+  :param options: repeats
+  :return: dict of the file size, the best load and save seconds and the load phases
+  """
+  import tempfile
+
+  load_seconds = save_seconds = float('inf')
+  phases = dict()
+  with tempfile.TemporaryDirectory() as directory:
+    # the temporary file keeps the extensions selecting the format and compression
+    target = os.path.join(directory, 'bench' + _getExtensions(os.path.basename(filename)))
+    for repeat in range(max(options['repeats'], 1)):
+      start = time.perf_counter()
+      eml = eML(filename, instrument=True)
+      elapsed = time.perf_counter() - start
+      if elapsed < load_seconds:
+        load_seconds = elapsed
+        phases = eml.getStats()['load'].phases
+      start = time.perf_counter()
+      eml.saveAs(target)
+      save_seconds = min(save_seconds, time.perf_counter() - start)
+  return {'bytes': os.path.getsize(filename), 'load_s': load_seconds, 'save_s': save_seconds,
+          'load_phases': phases}
+  pass
+
+
+def _convertFile(filename: str, options: dict):  # -------------------------------- _convertFile >>
+  """
+  Converts a file to another format.
+
+  :param filename: the source filename
+  :param options: to, output_dir, overwrite and compact_layout
+  :return: dict of the target filename
+  """
+  target = getTargetFilename(filename, options['to'], options['output_dir'])
+  if os.path.abspath(target) == os.path.abspath(filename):
+    raise Exception('eML convert error: ' + filename + ' is already in the ' + options['to']
+                    + ' format')
+  if os.path.exists(target) and not options['overwrite']:
+    raise Exception('eML convert error: ' + target + ' exists, use --overwrite to replace it')
+  if options['output_dir'] is not None:
+    os.makedirs(options['output_dir'], exist_ok=True)
+  convertFile(filename, target, options['compact_layout'])
+  return {'target': target}
+  pass
+
+
+def _inspectFile(filename: str, options: dict):  # -------------------------------- _inspectFile >>
+  """
+  Reads the header and the identifiers of a file without decoding any of the values.
+
+  :param filename: the eML filename
+  :param options: unused
+  :return: dict of the file size, header meta data and identifiers
+  """
+  meta, identifiers = eML.peek(filename)
+  meta = {key: value.isoformat() if hasattr(value, 'isoformat') else value
+          for key, value in meta.items()}
+  return {'bytes': os.path.getsize(filename), 'meta': meta, 'identifiers': identifiers}
+  pass
+
+
+def _validateFile(filename: str, options: dict):  # ------------------------------ _validateFile >>
+  """
+  Checks the checksums of the entries of a file, then loads it decoding every value.
+
+  :param filename: the eML, JSON or npz filename
+  :param options: quick, only check the checksums
+  :return: dict of the warnings and the number of identifiers loaded
+  """
+  warnings = list()
+  extension = os.path.splitext(filename)[1].lower()
+  if extension not in ('.json', '.npz'):
+    # text files without a header are read as empty files
+    if 'version' not in eML.peek(filename)[0]:
+      raise Exception('eML validate error: ' + filename + ' has no eML Header')
+    try:
+      corrupted = eML.verify(filename)
+    except Exception as error:
+      # files without an index, or written before checksums were kept, are still loaded
+      if 'damaged' in str(error):
+        raise
+      warnings.append('checksums not checked, ' + str(error))
+    else:
+      if len(corrupted) > 0:
+        raise Exception('eML validate error: corrupted ' + ', '.join(map(str, corrupted)))
+  if options['quick']:
+    return {'warnings': warnings}
+
+  eml = readFile(filename)
+  for identifier, identifiertype in eml.identifiers.items():
+    # the columns of tables are only decoded when they are accessed
+    if identifiertype == 'table':
+      eml.getTable(identifier)
+  return {'warnings': warnings, 'identifiers': len(eml.identifiers)}
+  pass
+
+
+def _getExtensions(name: str):  # ----------------------------------------------- _getExtensions >>
+  """
+  Gets the trailing format and compression extensions of a filename, such as .eml.gz.
+
+  :param name: the filename without its directory
+  :return: the extensions, empty if the filename has none of them
+  """
+  stem, extension = os.path.splitext(name)
+  extensions = ''
+  while extension.lower() in _SOURCE_EXTENSIONS and stem != '':
+    extensions = extension + extensions
+    stem, extension = os.path.splitext(stem)
+  return extensions
+  pass
+
+
+def _printResult(command: str, result: dict, options: dict):  # ------------------- _printResult >>
+  """
+  Prints the result of a file to stdout.
+
+  :param command: the subcommand, inspect, validate, convert or bench
+  :param result: the result dict of the file, see runFile
+  :param options: the options of the subcommand
+  """
+  filename = result['filename']
+  match command:
+    case 'inspect':
+      if options['json']:
+        print(json.dumps(result))
+        return
+      print(filename + '  ' + _formatBytes(result['bytes']) + '  version '
+            + str(result['meta'].get('version')) + '  last update '
+            + str(result['meta'].get('last update')))
+      for identifier, identifiertype in result['identifiers'].items():
+        print('  %-30s %s' % (identifier, identifiertype))
+    case 'validate':
+      for warning in result['warnings']:
+        print(filename + ': warning ' + warning)
+      print(filename + ': ok')
+    case 'convert':
+      print(filename + ' -> ' + result['target'])
+    case 'bench':
+      megabytes = result['bytes'] / (1024 * 1024)
+      print('%s  %s  load %.4fs %.1f MB/s  save %.4fs %.1f MB/s' %
+            (filename, _formatBytes(result['bytes']), result['load_s'],
+             megabytes / max(result['load_s'], 1e-9), result['save_s'],
+             megabytes / max(result['save_s'], 1e-9)))
+      print('  load phases ' + ', '.join(phase + ' %.4fs' % seconds
+                                         for phase, seconds in result['load_phases'].items()))
+  pass
+
+
+def _formatBytes(nbytes: int):  # ------------------------------------------------- _formatBytes >>
+  """
+  :param nbytes: number of bytes
+  :return: the number of bytes in B, KB, MB or GB
+  """
+  for unit in ('B', 'KB', 'MB'):
+    if nbytes < 1024:
+      return '%.0f %s' % (nbytes, unit) if unit == 'B' else '%.1f %s' % (nbytes, unit)
+    nbytes /= 1024
+  return '%.1f GB' % nbytes
+  pass
+
+
+class _Progress:  # ================================================================ _Progress >>>
+  """
+  Writes the number of files completed and failed to stderr. On a terminal the line is rewritten in
+  place, otherwise a line is written as each file completes.
+  """
+
+  def __init__(self, total: int, quiet: bool = False):  # ----------------------------- __init__ >>
+    """
+
+    :param total: number of files in the batch
+    :param quiet: write nothing
+    """
+    self.total = total
+    self.quiet = quiet
+    self.completed = 0
+    self.failed = 0
+    self.start_time = time.perf_counter()
+    self.interactive = sys.stderr.isatty()
+    pass
+
+  def finish(self):  # ------------------------------------------------------------------ finish >>
+    """
+    Ends the progress line.
+    """
+    if not self.quiet and self.interactive and self.total > 0:
+      sys.stderr.write('\n')
+      sys.stderr.flush()
+    pass
+
+  def update(self, result: dict):  # ---------------------------------------------------- update >>
+    """
+    Records a completed file.
+
+    :param result: the result dict of the file, see runFile
+    """
+    self.completed += 1
+    if result['error'] is not None:
+      self.failed += 1
+    if self.quiet:
+      return
+    line = '[%d/%d] %d failed, %.1fs  %s' % (self.completed, self.total, self.failed,
+                                            time.perf_counter() - self.start_time,
+                                            result['filename'])
+    if self.interactive:
+      sys.stderr.write('\r\x1b[K' + line)
+    else:
+      sys.stderr.write(line + '\n')
+    sys.stderr.flush()
+    pass
+
+
+# the function run on each file by each subcommand, see runFile
+_COMMANDS = {'inspect': _inspectFile, 'validate': _validateFile, 'convert': _convertFile,
+             'bench': _benchFile}
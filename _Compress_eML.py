@@ -0,0 +1,128 @@
+"""
+            _Compress_eML of the eML system
+
+                 created on 10/19/2026
+    Copyright (c) 2026 Turtle Bay Geophysical LLC
+                ALL RIGHTS RESERVED.
+
+ Questions and comments can be directed to: Support@TurtleBayGeophysical.com
+
+  Licensed under the Attribution-NonCommercial-ShareAlike 4.0 International
+  (CC BY-NC-SA 4.0) (the "License"); you may not use this file except in
+  compliance with the License.
+
+  You may obtain a copy of the License at
+
+      https://creativecommons.org/licenses/by-nc-sa/4.0/
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+"""
+import io
+import os
+
+# compression applied on save by the extension of the filename, gzip, lzma and bz2 are imported by
+# the functions using them so that plain files do not pay for importing them
+_EXTENSIONS = {'.gz': 'gzip', '.xz': 'lzma', '.bz2': 'bz2'}
+
+# leading bytes of each compression format, files are decompressed on load by their contents
+# rather than their name
+_MAGIC = {b'\x1f\x8b': 'gzip', b'\xfd7zXZ\x00': 'lzma', b'BZh': 'bz2'}
+
+# gzip level written, level 9 is several times slower for files a few percent smaller
+_GZIP_LEVEL = 6
+
+
+def getCompression(eml_filename: str):  # --------------------------------------- getCompression >>
+  """
+  Gets the compression applied when a file is saved.
+
+  :param eml_filename: the eml filename
+  :return: gzip, lzma or bz2 for filenames ending in .gz, .xz or .bz2, None otherwise
+  """
+  return _EXTENSIONS.get(os.path.splitext(eml_filename)[1].lower())
+  pass
+
+
+def detectCompression(file):  # ---------------------------------------------- detectCompression >>
+  """
+  Detects the compression of an open file from its leading bytes without moving its position.
+
+  :param file: file opened for buffered binary reading at its start
+  :return: gzip, lzma or bz2, None if the file is not compressed
+  """
+  head = file.peek(6)[:6]
+  for magic, compression in _MAGIC.items():
+    if head.startswith(magic):
+      return compression
+  return None
+  pass
+
+
+def openRead(eml_filename: str):  # --------------------------------------------------- openRead >>
+  """
+  Opens a file for binary reading, compressed files are decompressed as they are read and are never
+  held in memory as a whole. Decompressed files only seek forward cheaply.
+
+  :param eml_filename: the eml filename
+  :return: the open file and its compression, None if the file is not compressed
+  """
+  file = open(eml_filename, 'rb')
+  compression = detectCompression(file)
+  if compression is None:
+    return file, None
+
+  file.close()
+  match compression:
+    case 'gzip':
+      import gzip
+      return gzip.open(eml_filename, 'rb'), compression
+    case 'lzma':
+      import lzma
+      return lzma.open(eml_filename, 'rb'), compression
+    case 'bz2':
+      import bz2
+      return bz2.open(eml_filename, 'rb'), compression
+  pass
+
+
+def openText(eml_filename: str):  # --------------------------------------------------- openText >>
+  """
+  Opens a file for reading utf-8 text, compressed files are decompressed as they are read.
+
+  :param eml_filename: the eml filename
+  :return: the open file and its compression, None if the file is not compressed
+  """
+  file, compression = openRead(eml_filename)
+  return io.TextIOWrapper(file, encoding='utf-8'), compression
+  pass
+
+
+def compressFile(file, compression: str = None):  # ------------------------------- compressFile >>
+  """
+  Wraps a file opened for binary writing so that the bytes written are compressed as they are
+  written. Closing the wrapper completes the compressed data, the file itself is left open.
+  Compressed files can not seek.
+
+  :param file: file opened for binary writing
+  :param compression: gzip, lzma or bz2, None returns the file itself
+  :return: the file to be written
+  """
+  match compression:
+    case None:
+      return file
+    case 'gzip':
+      import gzip
+      # the name of the file is left out of the header, it is usually a temporary name
+      return gzip.GzipFile(filename='', mode='wb', compresslevel=_GZIP_LEVEL, fileobj=file)
+    case 'lzma':
+      import lzma
+      return lzma.LZMAFile(file, 'wb')
+    case 'bz2':
+      import bz2
+      return bz2.BZ2File(file, 'wb')
+  raise Exception('eML save error: unknown compression ' + str(compression))
+  pass
@@ -0,0 +1,355 @@
+"""
+             _Convert_eML of the eML system
+
+                 created on 10/19/2026
+    Copyright (c) 2026 Turtle Bay Geophysical LLC
+                ALL RIGHTS RESERVED.
+
+ Questions and comments can be directed to: Support@TurtleBayGeophysical.com
+
+  Licensed under the Attribution-NonCommercial-ShareAlike 4.0 International
+  (CC BY-NC-SA 4.0) (the "License"); you may not use this file except in
+  compliance with the License.
+
+  You may obtain a copy of the License at
+
+      https://creativecommons.org/licenses/by-nc-sa/4.0/
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+
+  Converts eML files to and from other formats, chosen by the extension of the filename:
+
+    .eml, .beml, .eml.gz, .eml.xz, .eml.bz2   the eML formats, see eML.save
+    .json                                     typed JSON, readable without eML
+    .npz                                      numpy arrays, readable with numpy.load
+
+  A JSON file holds the header, the identifier types and the values. Values JSON can represent are
+  written as they are and every other value is tagged with its type:
+
+    {"eML Header": {"version": 0.01, "lamguage": "python", "creation date": "2024-07-28T16:13:20",
+                    "last update": "2024-07-28T16:13:20"},
+     "identifiers": {"depth": "float", "visited": "set"},
+     "data": {"depth": 12.5, "visited": {"$type": "set", "value": ["A1", "A2"]}}}
+
+  An npz file holds each array of a bool, numeric, str or structured data type as an array of its
+  own, and every other identifier in the typed JSON held by its __eml__ array. npz files written
+  by numpy alone are read as one array identifier per array.
+"""
+import base64
+import json
+import os
+from datetime import date, datetime
+
+from _LazyNumpy_eML import np, isArray, isNumpyLoaded
+from _Table_eML import _Table_eML
+
+# name of the array of an npz file holding the typed JSON of the identifiers that are not arrays
+_NPZ_JSON = '__eml__'
+
+# key tagging the JSON objects that hold a value JSON can not represent directly
+_TYPE_KEY = '$type'
+
+
+def readFile(eml_filename: str):  # --------------------------------------------------- readFile >>
+  """
+  Reads a file of any of the supported formats.
+
+  :param eml_filename: the existing filename
+  :return: eML instance holding the contents of the file
+  """
+  from eML import eML
+
+  if not os.path.exists(eml_filename):
+    raise Exception('eML convert error: ' + eml_filename + ' does not exist')
+  reader = _READERS.get(getExtension(eml_filename))
+  if reader is None:
+    return eML(eml_filename)
+  return reader(eml_filename)
+  pass
+
+
+def writeFile(eml, eml_filename: str, compact_layout: bool = False):  # -------------- writeFile >>
+  """
+  Writes an eML instance to any of the supported formats.
+
+  :param eml: the eML instance
+  :param eml_filename: the filename to be written, its extension selects the format
+  :param compact_layout: write the compact layout of the text eML format, see _Write_eML
+  """
+  writer = _WRITERS.get(getExtension(eml_filename))
+  if writer is None:
+    eml.save(eml_filename, compact_layout=compact_layout)
+  else:
+    writer(eml, eml_filename)
+  pass
+
+
+def convertFile(source_filename: str, target_filename: str,  # --------------------- convertFile >>
+                compact_layout: bool = False):
+  """
+  Converts a file between any two of the supported formats.
+
+  :param source_filename: the existing filename
+  :param target_filename: the filename to be written, its extension selects the format
+  :param compact_layout: write the compact layout of the text eML format, see _Write_eML
+  """
+  writeFile(readFile(source_filename), target_filename, compact_layout)
+  pass
+
+
+def getExtension(eml_filename: str):  # ------------------------------------------- getExtension >>
+  """
+  :param eml_filename: the filename
+  :return: the lower case extension of the filename, including the dot
+  """
+  return os.path.splitext(eml_filename)[1].lower()
+  pass
+
+
+def readJson(json_filename: str):  # -------------------------------------------------- readJson >>
+  """
+  Reads a typed JSON file written by writeJson.
+
+  :param json_filename: the JSON filename
+  :return: eML instance holding the contents of the file
+  """
+  with open(json_filename, encoding='utf-8') as file:
+    return _fromDocument(json.load(file), dict())
+  pass
+
+
+def writeJson(eml, json_filename: str):  # ------------------------------------------- writeJson >>
+  """
+  Writes an eML instance as typed JSON.
+
+  :param eml: the eML instance
+  :param json_filename: the JSON filename to be written
+  """
+  document = _toDocument(eml, eml.identifiers)
+  with open(json_filename, 'w', encoding='utf-8') as file:
+    json.dump(document, file, ensure_ascii=False)
+  pass
+
+
+def readNpz(npz_filename: str):  # ----------------------------------------------------- readNpz >>
+  """
+  Reads an npz file, written by writeNpz or by numpy alone. Pickled object arrays are never
+  loaded.
+
+  :param npz_filename: the npz filename
+  :return: eML instance holding the contents of the file
+  """
+  with np.load(npz_filename, allow_pickle=False) as npz:
+    arrays = {name: npz[name] for name in npz.files if name != _NPZ_JSON}
+    if _NPZ_JSON in npz.files:
+      return _fromDocument(json.loads(str(npz[_NPZ_JSON])), arrays)
+
+  from eML import eML
+
+  eml = eML()
+  eml.setMany({name: ('array', array) for name, array in arrays.items()}, infer_types=False)
+  return eml
+  pass
+
+
+def writeNpz(eml, npz_filename: str):  # ---------------------------------------------- writeNpz >>
+  """
+  Writes an eML instance as an npz file. Arrays of a bool, numeric, str or structured data type are
+  written as arrays, every other identifier is written to the typed JSON of the __eml__ array.
+
+  :param eml: the eML instance
+  :param npz_filename: the npz filename to be written
+  """
+  arrays = dict()
+  others = dict()
+  for identifier, identifiertype in eml.identifiers.items():
+    value = eml._getValue(identifier)
+    if identifiertype == 'array' and value.dtype != object and identifier != _NPZ_JSON:
+      arrays[identifier] = value
+    else:
+      others[identifier] = identifiertype
+
+  document = _toDocument(eml, others)
+  document['identifiers'] = dict(eml.identifiers)
+  arrays[_NPZ_JSON] = np.array(json.dumps(document, ensure_ascii=False))
+  # np.savez appends .npz to names without it
+  with open(npz_filename, 'wb') as file:
+    np.savez(file, **arrays)
+  pass
+
+
+def encodeValue(value):  # --------------------------------------------------------- encodeValue >>
+  """
+  Encodes a value as JSON, tagging the values JSON can not represent directly with their type.
+
+  :param value: the value of an identifier or an element of one
+  :return: the JSON value
+  """
+  if value is None or isinstance(value, (bool, str, int, float)):
+    if isinstance(value, int) and not isinstance(value, bool) and abs(value) >= 2 ** 53:
+      # JSON readers other than python's hold numbers as doubles
+      return {_TYPE_KEY: 'int', 'value': str(value)}
+    if isinstance(value, float) and (value != value or abs(value) == float('inf')):
+      # nan and infinity are not JSON numbers
+      return {_TYPE_KEY: 'float', 'value': repr(value)}
+    return value
+  if isinstance(value, list):
+    return [encodeValue(element) for element in value]
+  if isinstance(value, dict):
+    if all(isinstance(key, str) for key in value) and _TYPE_KEY not in value:
+      return {key: encodeValue(element) for key, element in value.items()}
+    return {_TYPE_KEY: 'dict', 'value': [[encodeValue(key), encodeValue(element)]
+                                         for key, element in value.items()]}
+  if isinstance(value, (tuple, set, frozenset)):
+    return {_TYPE_KEY: type(value).__name__, 'value': [encodeValue(element) for element in value]}
+  if isinstance(value, complex):
+    return {_TYPE_KEY: 'complex', 'value': [value.real, value.imag]}
+  if isinstance(value, datetime):
+    return {_TYPE_KEY: 'datetime', 'value': value.isoformat()}
+  if isinstance(value, date):
+    return {_TYPE_KEY: 'date', 'value': value.isoformat()}
+  if isinstance(value, bytes):
+    return {_TYPE_KEY: 'bytes', 'value': base64.b64encode(value).decode('ascii')}
+  if isinstance(value, _Table_eML):
+    return {_TYPE_KEY: 'table', 'value': {name: encodeValue(column)
+                                          for name, column in value.getColumns().items()}}
+  if isArray(value):
+    if value.dtype.names is not None:
+      elements = [encodeValue(list(record)) for record in value.ravel().tolist()]
+    else:
+      elements = [encodeValue(element) for element in value.ravel().tolist()]
+    return {_TYPE_KEY: 'array', 'dtype': np.lib.format.dtype_to_descr(value.dtype),
+            'shape': list(value.shape), 'value': elements}
+  if isNumpyLoaded() and isinstance(value, np.generic):
+    return encodeValue(value.item())
+  raise Exception('eML convert error: values of type ' + type(value).__name__
+                  + ' can not be written as JSON')
+  pass
+
+
+def decodeValue(value):  # --------------------------------------------------------- decodeValue >>
+  """
+  Decodes a JSON value written by encodeValue.
+
+  :param value: the JSON value
+  :return: the value of the identifier or of the element
+  """
+  if isinstance(value, list):
+    return [decodeValue(element) for element in value]
+  if not isinstance(value, dict):
+    return value
+  if _TYPE_KEY not in value:
+    return {key: decodeValue(element) for key, element in value.items()}
+
+  tagged = value['value']
+  match value[_TYPE_KEY]:
+    case 'int':
+      return int(tagged)
+    case 'float':
+      return float(tagged)
+    case 'dict':
+      return {decodeValue(key): decodeValue(element) for key, element in tagged}
+    case 'tuple':
+      return tuple(decodeValue(element) for element in tagged)
+    case 'set':
+      return {decodeValue(element) for element in tagged}
+    case 'frozenset':
+      return frozenset(decodeValue(element) for element in tagged)
+    case 'complex':
+      return complex(tagged[0], tagged[1])
+    case 'datetime':
+      return datetime.fromisoformat(tagged)
+    case 'date':
+      return date.fromisoformat(tagged)
+    case 'bytes':
+      return base64.b64decode(tagged)
+    case 'table':
+      return {name: decodeValue(column) for name, column in tagged.items()}
+    case 'array':
+      dtype = np.lib.format.descr_to_dtype(_toDescr(value['dtype']))
+      elements = [decodeValue(element) for element in tagged]
+      if dtype.names is not None:
+        elements = [tuple(record) for record in elements]
+      if dtype == object:
+        arrayout = np.empty(len(elements), dtype=object)
+        arrayout[:] = elements
+      else:
+        arrayout = np.array(elements, dtype=dtype)
+      return arrayout.reshape(value['shape'])
+  raise Exception('eML convert error: unknown JSON value type ' + str(value[_TYPE_KEY]))
+  pass
+
+
+def _fromDocument(document: dict, arrays: dict):  # ------------------------------ _fromDocument >>
+  """
+  Creates an eML instance from a typed JSON document.
+
+  :param document: the decoded JSON document, see writeJson
+  :param arrays: identifier -> array of the arrays held outside the document, see writeNpz
+  :return: eML instance holding the contents of the document
+  """
+  from eML import eML
+
+  eml = eML()
+  for key, value in document.get('eML Header', dict()).items():
+    if key in ('creation date', 'last update'):
+      value = datetime.fromisoformat(value)
+    eml.eml_meta_data[key] = value
+
+  data = document.get('data', dict())
+  mapping = dict()
+  for identifier, identifiertype in document.get('identifiers', dict()).items():
+    if identifier in arrays:
+      mapping[identifier] = (identifiertype, arrays[identifier])
+    else:
+      mapping[identifier] = (identifiertype, decodeValue(data[identifier]))
+  eml.setMany(mapping, infer_types=False)
+  return eml
+  pass
+
+
+def _toDescr(descr):  # --------------------------------------------------------------- _toDescr >>
+  """
+  Restores the tuples of a structured data type description read back from JSON, which only has
+  lists.
+
+  :param descr: the data type description, see numpy.lib.format.dtype_to_descr
+  :return: the data type description
+  """
+  if isinstance(descr, str):
+    return descr
+  fields = list()
+  for field in descr:
+    field = list(field)
+    field[1] = _toDescr(field[1])
+    if len(field) > 2:
+      field[2] = tuple(field[2])
+    fields.append(tuple(field))
+  return fields
+  pass
+
+
+def _toDocument(eml, identifiers: dict):  # ---------------------------------------- _toDocument >>
+  """
+  Creates the typed JSON document of some of the identifiers of an eML instance.
+
+  :param eml: the eML instance
+  :param identifiers: identifier -> identifier type of the identifiers to be written
+  :return: the JSON document
+  """
+  header = dict()
+  for key, value in eml.eml_meta_data.items():
+    header[key] = value.isoformat() if isinstance(value, datetime) else value
+  data = {identifier: encodeValue(eml._getValue(identifier)) for identifier in identifiers}
+  return {'eML Header': header, 'identifiers': dict(identifiers), 'data': data}
+  pass
+
+
+# the formats other than eML by the extension of their filenames, the eML formats are written by
+# eML.save. A new format only needs a reader returning an eML instance and a writer taking one
+_READERS = {'.json': readJson, '.npz': readNpz}
+_WRITERS = {'.json': writeJson, '.npz': writeNpz}
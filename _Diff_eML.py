@@ -0,0 +1,236 @@
+"""
+              _Diff_eML of the eML system
+
+                 created on 10/19/2026
+    Copyright (c) 2026 Turtle Bay Geophysical LLC
+                ALL RIGHTS RESERVED.
+
+ Questions and comments can be directed to: Support@TurtleBayGeophysical.com
+
+  Licensed under the Attribution-NonCommercial-ShareAlike 4.0 International
+  (CC BY-NC-SA 4.0) (the "License"); you may not use this file except in
+  compliance with the License.
+
+  You may obtain a copy of the License at
+
+      https://creativecommons.org/licenses/by-nc-sa/4.0/
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+
+  Changes are reported as (path, change, a value, b value) tuples. The path starts with the
+  identifier followed by the keys of nested dicts and the indices of nested lists, and the change
+  is added, removed or changed:
+
+    (('stations', 'A1', 'x'), 'changed', 1.5, 2.5)
+    (('south',), 'added', None, -12.5)
+"""
+from __future__ import annotations
+
+from _Binary_eML import _Read_beML, isBinary, readIndex as readBinaryIndex
+from _FileLock_eML import getSignature
+from _LazyNumpy_eML import np, isArray
+from _Read_eML import _Read_eML, readIndex as readTextIndex
+
+# stands in for the value of a key held by only one of the dicts being compared
+_MISSING = object()
+
+
+class _Diff_eML:  # ================================================================ _Diff_eML >>>
+  """
+  Structural difference between two eML files. The top level entries are first compared by the
+  length and checksum held for them in the index of each file, only the entries whose bytes differ
+  are decoded and compared value by value, so the cost follows the size of the changes rather
+  than the size of the files.
+
+  Files without an index and text files written with back-references, where the bytes of an entry
+  do not define its value, are decoded completely.
+  """
+
+  def __init__(self, a_filename: str, b_filename: str):  # ---------------------------- __init__ >>
+    """
+
+    :param a_filename: the eml filename compared against
+    :param b_filename: the eml filename compared
+    """
+    # identifier -> identifier type of every entry of each file
+    self.identifiers_a = dict()
+    self.identifiers_b = dict()
+
+    # identifier -> value of the entries decoded from each file
+    self.values_a = dict()
+    self.values_b = dict()
+
+    # list of (path, change, a value, b value) tuples in the order of the entries of a, followed by
+    # the entries only held by b
+    self.changes = list()
+
+    # the index and the entries of each file are read separately, so both files are read again if
+    # either was replaced in between
+    while True:
+      signatures = (getSignature(a_filename), getSignature(b_filename))
+      for decoded in (self.identifiers_a, self.identifiers_b, self.values_a, self.values_b):
+        decoded.clear()
+      index_a = self._readIndex(a_filename)
+      index_b = self._readIndex(b_filename)
+      if index_a is None or index_b is None:
+        self._decodeAll(a_filename, b_filename)
+      else:
+        self._decodeChanged(a_filename, index_a, b_filename, index_b)
+      if (getSignature(a_filename), getSignature(b_filename)) == signatures:
+        break
+
+    for identifier, identifiertype in self.identifiers_a.items():
+      if identifier not in self.identifiers_b:
+        self.changes.append(((identifier,), 'removed', self.values_a[identifier], None))
+      elif identifier in self.values_a:
+        if identifiertype != self.identifiers_b[identifier]:
+          self.changes.append(((identifier,), 'changed', self.values_a[identifier],
+                               self.values_b[identifier]))
+        else:
+          compareValues((identifier,), self.values_a[identifier], self.values_b[identifier],
+                        self.changes)
+    for identifier in self.identifiers_b:
+      if identifier not in self.identifiers_a:
+        self.changes.append(((identifier,), 'added', None, self.values_b[identifier]))
+    pass
+
+  def _decodeAll(self, a_filename: str, b_filename: str):  # ------------------------ _decodeAll >>
+    """
+    Decodes every entry of both files.
+
+    :param a_filename: the eml filename compared against
+    :param b_filename: the eml filename compared
+    """
+    for filename, identifiers, values in ((a_filename, self.identifiers_a, self.values_a),
+                                          (b_filename, self.identifiers_b, self.values_b)):
+      reader = _Read_beML if isBinary(filename) else _Read_eML
+      eml_meta_data, file_identifiers, eml_data = reader(filename).getExistingData()
+      identifiers.update(file_identifiers)
+      values.update(eml_data)
+    pass
+
+  def _decodeChanged(self, a_filename: str, index_a: dict,  # ------------------- _decodeChanged >>
+                     b_filename: str, index_b: dict):
+    """
+    Decodes the entries whose identifier type, length or checksum differ between the files along
+    with the entries only held by one of them.
+
+    :param a_filename: the eml filename compared against
+    :param index_a: index of a, see _readIndex
+    :param b_filename: the eml filename compared
+    :param index_b: index of b, see _readIndex
+    """
+    ranges_a = list()
+    ranges_b = list()
+    for identifier, entry in index_a.items():
+      self.identifiers_a[identifier] = entry[0]
+      other = index_b.get(identifier)
+      # the offsets of the entries following a change in length move, so they are not compared
+      if other is None or (other[0], other[2], other[3]) != (entry[0], entry[2], entry[3]):
+        ranges_a.append(entry[1:3])
+        if other is not None:
+          ranges_b.append(other[1:3])
+    for identifier, entry in index_b.items():
+      self.identifiers_b[identifier] = entry[0]
+      if identifier not in index_a:
+        ranges_b.append(entry[1:3])
+
+    for filename, ranges, values in ((a_filename, ranges_a, self.values_a),
+                                     (b_filename, ranges_b, self.values_b)):
+      if len(ranges) > 0:
+        reader = _Read_beML if isBinary(filename) else _Read_eML
+        values.update(reader(filename, ranges=ranges).eml_data)
+    pass
+
+  def _readIndex(self, eml_filename: str):  # --------------------------------------- _readIndex >>
+    """
+    Reads the index of a file without decoding any of its entries.
+
+    :param eml_filename: the eml filename
+    :return: dict of identifier -> (identifier type, offset, length, checksum), None if the entries
+             of the file can not be compared by their checksums
+    """
+    if isBinary(eml_filename):
+      entries = readBinaryIndex(eml_filename)
+      references = False
+    else:
+      entries, references, compact_layout = readTextIndex(eml_filename)
+    if entries is None or references or any(entry[4] is None for entry in entries):
+      return None
+    return {entry[0]: entry[1:5] for entry in entries}
+    pass
+
+
+def compareValues(path: tuple, valuea, valueb, changes: list):  # ---------------- compareValues >>
+  """
+  Compares two values, descending into dicts and into lists of equal length. The nested values are
+  held on an explicit stack rather than by recursion, so there is no limit on the nesting depth.
+
+  :param path: path of the values
+  :param valuea: the value compared against
+  :param valueb: the value compared
+  :param changes: list the (path, change, a value, b value) tuples are appended to
+  """
+  stack = [(path, valuea, valueb)]
+  while len(stack) > 0:
+    path, valuea, valueb = stack.pop()
+    if valuea is _MISSING:
+      changes.append((path, 'added', None, valueb))
+    elif valueb is _MISSING:
+      changes.append((path, 'removed', valuea, None))
+    elif type(valuea) is not type(valueb):
+      changes.append((path, 'changed', valuea, valueb))
+
+    elif isinstance(valuea, dict):
+      nested = [(path + (key,), value, valueb.get(key, _MISSING)) for key, value in valuea.items()]
+      nested.extend((path + (key,), _MISSING, value) for key, value in valueb.items()
+                    if key not in valuea)
+      # the nested values are pushed in reverse so that the changes follow the order of the keys
+      stack.extend(reversed(nested))
+
+    elif isinstance(valuea, list) and len(valuea) == len(valueb):
+      stack.extend((path + (index,), valuea[index], valueb[index])
+                   for index in range(len(valuea) - 1, -1, -1))
+
+    elif not isEqual(valuea, valueb):
+      changes.append((path, 'changed', valuea, valueb))
+  pass
+
+
+def isEqual(valuea, valueb):  # -------------------------------------------------------- isEqual >>
+  """
+  Compares two values strictly, values of different types are never equal, arrays are compared
+  element-wise and not-a-number floats are equal to one another.
+
+  :param valuea: the first value
+  :param valueb: the second value
+  :return: True if the values are equal
+  """
+  stack = [(valuea, valueb)]
+  while len(stack) > 0:
+    valuea, valueb = stack.pop()
+    if type(valuea) is not type(valueb):
+      return False
+    if isinstance(valuea, dict):
+      if valuea.keys() != valueb.keys():
+        return False
+      stack.extend((value, valueb[key]) for key, value in valuea.items())
+    elif isinstance(valuea, (list, tuple)):
+      if len(valuea) != len(valueb):
+        return False
+      stack.extend(zip(valuea, valueb))
+    elif isArray(valuea):
+      if valuea.dtype != valueb.dtype or valuea.shape != valueb.shape \
+          or not np.array_equal(valuea, valueb, equal_nan=valuea.dtype.kind in 'fc'):
+        return False
+    elif isinstance(valuea, (float, complex)):
+      if valuea != valueb and not (valuea != valuea and valueb != valueb):
+        return False
+    elif valuea != valueb:
+      return False
+  return True
+  pass
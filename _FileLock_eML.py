@@ -0,0 +1,128 @@
+"""
+            _FileLock_eML of the eML system
+
+                 created on 10/19/2026
+    Copyright (c) 2026 Turtle Bay Geophysical LLC
+                ALL RIGHTS RESERVED.
+
+ Questions and comments can be directed to: Support@TurtleBayGeophysical.com
+
+  Licensed under the Attribution-NonCommercial-ShareAlike 4.0 International
+  (CC BY-NC-SA 4.0) (the "License"); you may not use this file except in
+  compliance with the License.
+
+  You may obtain a copy of the License at
+
+      https://creativecommons.org/licenses/by-nc-sa/4.0/
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+"""
+import os
+
+try:
+  import fcntl
+except ImportError:
+  # saves are not serialized where fcntl is not available, files are still replaced atomically
+  fcntl = None
+
+
+class _FileLock_eML:  # ======================================================== _FileLock_eML >>>
+  """
+  Advisory lock serializing the processes saving an eML file. A save writes the new file alongside
+  the existing one and renames it over the existing file once complete, so readers never see a
+  partly written file and never need to lock it. Readers that open a file more than once compare
+  its signature before and after, see getSignature, and read it again if it was replaced.
+
+  flock locks belong to the opened file rather than its name, so the name is checked once the
+  lock is held and the lock is taken again if the file was replaced whilst waiting for it.
+  """
+
+  def __init__(self, eml_filename: str):  # ------------------------------------------- __init__ >>
+    """
+
+    :param eml_filename: the eml filename being saved
+    """
+    self.eml_filename = eml_filename
+
+    # descriptor of the locked file, None whilst the lock is not held
+    self.descriptor = None
+    pass
+
+  def acquire(self):  # ---------------------------------------------------------------- acquire >>
+    """
+    Acquires the lock, waiting whilst another process is saving the file. The directory of the
+    file is locked instead whilst the file does not exist yet, so the processes creating it are
+    serialized too. Nothing is locked if fcntl is not available.
+    """
+    if fcntl is None:
+      return
+    while True:
+      creating = False
+      try:
+        descriptor = os.open(self.eml_filename, os.O_RDONLY)
+      except FileNotFoundError:
+        try:
+          descriptor = os.open(os.path.dirname(self.eml_filename) or '.', os.O_RDONLY)
+        except FileNotFoundError:
+          # the save fails as the directory does not exist
+          return
+        creating = True
+      fcntl.flock(descriptor, fcntl.LOCK_EX)
+
+      current = getSignature(self.eml_filename)
+      if creating and current is None:
+        self.descriptor = descriptor
+        return
+      if not creating and current is not None and current[:2] == getSignature(descriptor)[:2]:
+        self.descriptor = descriptor
+        return
+
+      # the file was created, replaced or removed whilst waiting, closing it releases the lock
+      os.close(descriptor)
+    pass
+
+  def release(self):  # ---------------------------------------------------------------- release >>
+    """
+    Releases the lock if it is held.
+    """
+    if self.descriptor is not None:
+      fcntl.flock(self.descriptor, fcntl.LOCK_UN)
+      os.close(self.descriptor)
+      self.descriptor = None
+    pass
+
+  def __enter__(self):  # ------------------------------------------------------------ __enter__ >>
+    """
+    :return: this lock once it has been acquired
+    """
+    self.acquire()
+    return self
+    pass
+
+  def __exit__(self, *exception):  # -------------------------------------------------- __exit__ >>
+    """
+    Releases the lock.
+    """
+    self.release()
+    pass
+
+
+def getSignature(eml_file):  # ---------------------------------------------------- getSignature >>
+  """
+  Gets the signature used to detect that a file has changed or has been replaced. Files are
+  replaced rather than rewritten in place, so a file holding the same signature before and after
+  it is read has been read from a single version.
+
+  :param eml_file: the eml filename, or the descriptor of an opened file
+  :return: (device, inode, size, mtime), None if the file does not exist
+  """
+  try:
+    stat = os.stat(eml_file)
+  except OSError:
+    return None
+  return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+  pass
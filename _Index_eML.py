@@ -0,0 +1,310 @@
+"""
+             _Index_eML of the eML system
+
+                 created on 10/19/2026
+    Copyright (c) 2026 Turtle Bay Geophysical LLC
+                ALL RIGHTS RESERVED.
+
+ Questions and comments can be directed to: Support@TurtleBayGeophysical.com
+
+  Licensed under the Attribution-NonCommercial-ShareAlike 4.0 International
+  (CC BY-NC-SA 4.0) (the "License"); you may not use this file except in
+  compliance with the License.
+
+  You may obtain a copy of the License at
+
+      https://creativecommons.org/licenses/by-nc-sa/4.0/
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+"""
+from __future__ import annotations
+
+import hashlib
+import zlib
+from datetime import date, datetime
+
+from _LazyNumpy_eML import np, isNumpyLoaded
+from _Table_eML import _Table_eML
+
+# pickle is imported by fingerprintValue, it is slow to import and is only needed once a container,
+# array or table is saved
+
+
+# bytes read at a time whilst checksumming or copying a range of a file
+_CHUNK_BYTES = 1024 * 1024
+
+# entry types given a fingerprint, primitives are cheaper to encode again than to fingerprint
+_FINGERPRINTED_TYPES = {'array', 'dict', 'frozen set', 'list', 'set', 'table', 'tuple'}
+
+# element types sets of which are fingerprinted in sorted order, each group is totally ordered
+_ORDERED_TYPES = ({bool, int, float}, {str}, {bytes}, {datetime}, {date})
+
+
+class _Fingerprint:  # ========================================================== _Fingerprint >>>
+  """
+  File like object hashing everything pickled to it, so values are fingerprinted without holding
+  their pickle in memory.
+  """
+
+  def __init__(self):  # -------------------------------------------------------------- __init__ >>
+    """
+
+    """
+    self.hash = hashlib.blake2b(digest_size=16)
+    pass
+
+  def write(self, data):  # -------------------------------------------------------------- write >>
+    """
+    :param data: bytes, or a buffer of a large array, written by the pickler
+    """
+    self.hash.update(data)
+    pass
+
+
+class _WrittenStream:  # ====================================================== _WrittenStream >>>
+  """
+  Stands in for a list or dict stream once a save has consumed it. The written entry is copied
+  from the file by later saves and read back from it by the getters.
+  """
+
+  def __init__(self, eml_filename: str, signature, binary: bool):  # ------------------ __init__ >>
+    """
+
+    :param eml_filename: the eml filename the stream was written to
+    :param signature: signature of the file once it was written, see _FileLock_eML.getSignature
+    :param binary: True if the file is in the beML format
+    """
+    self.eml_filename = eml_filename
+    self.signature = signature
+    self.binary = binary
+    pass
+
+  def getSaveError(self, identifier):  # ------------------------------------------ getSaveError >>
+    """
+    :param identifier: the identifier of the stream
+    :return: message of the exception raised when the stream can not be copied from its file
+    """
+    return ('eML save error: the stream ' + str(identifier) + ' was consumed when it was saved to '
+            + self.eml_filename + '. It is only copied from that file whilst the file is unchanged'
+            + ' and saved again in the same format and layout, set the stream again to write it')
+    pass
+
+
+def checksumRange(file, offset: int, length: int):  # ---------------------------- checksumRange >>
+  """
+  Checksums a range of an open file without decoding it.
+
+  :param file: file opened for binary reading
+  :param offset: offset of the range
+  :param length: number of bytes in the range
+  :return: CRC-32 of the range
+  """
+  file.seek(offset)
+  checksum = 0
+  while length > 0:
+    data = file.read(min(length, _CHUNK_BYTES))
+    if len(data) == 0:
+      # the file is shorter than the range, which never matches
+      return None
+    checksum = zlib.crc32(data, checksum)
+    length -= len(data)
+  return checksum
+  pass
+
+
+def copyRange(source, target, offset: int, length: int):  # -------------------------- copyRange >>
+  """
+  Copies a range of an open file to another, used to write an unchanged entry without encoding it.
+
+  :param source: file opened for binary reading
+  :param target: file opened for binary writing
+  :param offset: offset of the range within source
+  :param length: number of bytes in the range
+  """
+  source.seek(offset)
+  while length > 0:
+    data = source.read(min(length, _CHUNK_BYTES))
+    if len(data) == 0:
+      raise Exception('eML save error: ' + str(source.name) + ' changed whilst it was being copied')
+    target.write(data)
+    length -= len(data)
+  pass
+
+
+def fingerprintValue(entrytype: str, value):  # ------------------------------- fingerprintValue >>
+  """
+  Fingerprints the in-memory value of a top level entry, equal values of the same type have equal
+  fingerprints regardless of which objects they share. Values are pickled without the memo for
+  this, and values that can not be pickled have no fingerprint.
+
+  :param entrytype: the entry type recorded for the identifier
+  :param value: the value of the entry
+  :return: 16 byte blake2b digest, None if the entry is not fingerprinted
+  """
+  if entrytype not in _FINGERPRINTED_TYPES:
+    return None
+  if isinstance(value, _Table_eML):
+    # the columns not yet accessed are decoded, as they would be to encode the table
+    value = value.getColumns()
+
+  import pickle
+
+  try:
+    fingerprint = _pickleValue(entrytype, value, None)
+    if _holdsSet(value):
+      # sets are pickled in iteration order, which for str elements changes with the hash seed of
+      # each process, so values holding a set are pickled again with their sets sorted
+      fingerprint = _pickleValue(entrytype, value, _getSortedSet)
+  except (pickle.PicklingError, RecursionError, TypeError, ValueError, AttributeError):
+    return None
+  return fingerprint
+  pass
+
+
+def _pickleValue(entrytype: str, value, persistent_id):  # ------------------------ _pickleValue >>
+  """
+  Pickles a value without the memo into a blake2b digest, see fingerprintValue.
+
+  :param entrytype: the entry type recorded for the identifier
+  :param value: the value of the entry
+  :param persistent_id: persistent_id of the pickler, None to pickle the value as it is
+  :return: 16 byte blake2b digest
+  """
+  import copyreg
+  import pickle
+
+  fingerprint = _Fingerprint()
+  fingerprint.write(entrytype.encode('utf-8'))
+  pickler = pickle.Pickler(fingerprint, protocol=5)
+  pickler.fast = True
+  if isNumpyLoaded():
+    pickler.dispatch_table = dict(copyreg.dispatch_table)
+    pickler.dispatch_table[np.ndarray] = _reduceArray
+  if persistent_id is not None:
+    # persistent_id is called for every object, sets are only passed to it and not to the
+    # dispatch_table
+    pickler.persistent_id = persistent_id
+  pickler.dump(value)
+  return fingerprint.hash.digest()
+  pass
+
+
+def _getSortedSet(value):  # ----------------------------------------------------- _getSortedSet >>
+  """
+  Replaces a set with its elements in an order that does not depend on the hash seed, used as the
+  persistent_id of the pickler of fingerprintValue.
+
+  :param value: any object being pickled
+  :return: the set type and its sorted elements, None for values that are not sets
+  """
+  if type(value) not in (set, frozenset):
+    return None
+  types = set(map(type, value))
+  if any(types <= ordered for ordered in _ORDERED_TYPES):
+    return type(value).__name__, sorted(value)
+  # sets of containers or of mixed types are ordered by the fingerprints of their elements
+  digests = [fingerprintValue('list', [element]) for element in value]
+  if None in digests:
+    raise TypeError('set holds a value that can not be fingerprinted')
+  return type(value).__name__, [element for digest, element in
+                                sorted(zip(digests, value), key=lambda pair: pair[0])]
+  pass
+
+
+def _holdsSet(value):  # ------------------------------------------------------------- _holdsSet >>
+  """
+  Checks whether a value is, or holds, a set or frozenset. The elements of the containers of each
+  level of the value are gathered in one call, so the value is checked without a python loop over
+  its elements. The value must not hold itself, as it has been pickled without the memo first.
+
+  :param value: the value of an entry
+  :return: True if a set or frozenset is found
+  """
+  import gc
+
+  if type(value) in (set, frozenset):
+    return True
+  level = [value]
+  while len(level) > 0:
+    elements = gc.get_referents(*level)
+    types = set(map(type, elements))
+    if set in types or frozenset in types:
+      return True
+    if types.isdisjoint((dict, list, tuple)):
+      return False
+    level = [element for element in elements if type(element) in (dict, list, tuple)]
+  return False
+  pass
+
+
+def encodeTextIndex(entries: list, references: bool = False,  # ---------------- encodeTextIndex >>
+                    compact_layout: bool = False):
+  """
+  Encodes the index line written after the entries of a text eML file. The index holds one field
+  per entry in the order the entries were written.
+
+  :param entries: list of (offset, length, checksum, fingerprint) tuples
+  :param references: True if the entries were written with back-references, the index is then
+                     marked so that the bytes of an entry are not taken to define its value
+  :param compact_layout: True if the entries were written without aligning the elements of their
+                         containers, the index is then marked so that saves in the aligned layout
+                         do not copy them
+  :return: eML Index [references] [compact] | checksum offset length fingerprint | ...
+  """
+  fields = ['eML Index' + (' references' if references else '')
+            + (' compact' if compact_layout else '')]
+  for offset, length, checksum, fingerprint in entries:
+    fields.append('%08x %d %d %s' % (checksum, offset, length,
+                                     '-' if fingerprint is None else fingerprint.hex()))
+  return ' | '.join(fields)
+  pass
+
+
+def decodeTextIndex(fields: list):  # ------------------------------------------ decodeTextIndex >>
+  """
+  Decodes the index line of a text eML file.
+
+  :param fields: the stripped | separated fields of the index line
+  :return: list of (offset, length, checksum, fingerprint) tuples
+  """
+  entries = list()
+  for field in fields[1:]:
+    checksum, offset, length, fingerprint = field.split()
+    entries.append((int(offset), int(length), int(checksum, 16),
+                    None if fingerprint == '-' else bytes.fromhex(fingerprint)))
+  return entries
+  pass
+
+
+def decodeTextIndexMarks(fields: list):  # -------------------------------- decodeTextIndexMarks >>
+  """
+  Decodes the marks following eML Index on the index line of a text eML file.
+
+  :param fields: the stripped | separated fields of the index line
+  :return: True if the entries were written with back-references and True if they were written in
+           the compact layout, see encodeTextIndex
+  """
+  marks = fields[0].split()[2:]
+  return 'references' in marks, 'compact' in marks
+  pass
+
+
+def _reduceArray(value: np.ndarray):  # ------------------------------------------- _reduceArray >>
+  """
+  Reduces an array for its fingerprint. The data of arrays not holding objects is replaced by its
+  digest, as pickle marks the data of read-only arrays, such as the arrays of the process wide
+  cache, differently from the data of writeable arrays.
+
+  :param value: the array
+  :return: reduce tuple of the array
+  """
+  if value.dtype.hasobject:
+    return value.__reduce_ex__(5)
+  data = np.ascontiguousarray(value).reshape(-1).view(np.uint8)
+  return tuple, ((str(value.dtype.descr), value.shape,
+                  hashlib.blake2b(data, digest_size=16).digest()),)
+  pass
@@ -0,0 +1,73 @@
+"""
+           _LazyNumpy_eML of the eML system
+
+                 created on 10/19/2026
+    Copyright (c) 2026 Turtle Bay Geophysical LLC
+                ALL RIGHTS RESERVED.
+
+ Questions and comments can be directed to: Support@TurtleBayGeophysical.com
+
+  Licensed under the Attribution-NonCommercial-ShareAlike 4.0 International
+  (CC BY-NC-SA 4.0) (the "License"); you may not use this file except in
+  compliance with the License.
+
+  You may obtain a copy of the License at
+
+      https://creativecommons.org/licenses/by-nc-sa/4.0/
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+
+  numpy takes longer to import than the rest of the eML system together, yet files holding only
+  primitives and containers never need it. The eML modules import the np stand-in defined here
+  instead of numpy itself, so numpy is only imported once an array is read or written.
+"""
+import sys
+
+
+class _LazyNumpy_eML:  # ======================================================= _LazyNumpy_eML >>>
+  """
+  Stands in for the numpy module. The first attribute looked up imports numpy and copies its
+  namespace onto the stand-in, so later lookups cost the same as they do on numpy itself.
+  """
+
+  def __getattr__(self, name: str):  # --------------------------------------------- __getattr__ >>
+    """
+    Imports numpy, only called for attributes not yet copied onto the stand-in.
+
+    :param name: name of the numpy attribute
+    :return: the numpy attribute
+    """
+    import numpy
+    self.__dict__.update(vars(numpy))
+    return getattr(numpy, name)
+    pass
+
+
+def isNumpyLoaded():  # ---------------------------------------------------------- isNumpyLoaded >>
+  """
+  Checks whether numpy has been imported by anyone within this process. A value can only be a numpy
+  array or scalar if numpy has been imported, so the checks for numpy values are skipped otherwise.
+
+  :return: True if numpy has been imported, False otherwise
+  """
+  return 'numpy' in sys.modules
+  pass
+
+
+def isArray(value):  # ----------------------------------------------------------------- isArray >>
+  """
+  Checks whether a value is a numpy array without importing numpy.
+
+  :param value: the value to be checked
+  :return: True if value is a numpy array, False otherwise
+  """
+  return 'numpy' in sys.modules and isinstance(value, np.ndarray)
+  pass
+
+
+# the stand-in shared by the eML modules, used in place of numpy
+np = _LazyNumpy_eML()
@@ -0,0 +1,109 @@
+"""
+              _Lock_eML of the eML system
+
+                 created on 10/19/2026
+    Copyright (c) 2026 Turtle Bay Geophysical LLC
+                ALL RIGHTS RESERVED.
+
+ Questions and comments can be directed to: Support@TurtleBayGeophysical.com
+
+  Licensed under the Attribution-NonCommercial-ShareAlike 4.0 International
+  (CC BY-NC-SA 4.0) (the "License"); you may not use this file except in
+  compliance with the License.
+
+  You may obtain a copy of the License at
+
+      https://creativecommons.org/licenses/by-nc-sa/4.0/
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+"""
+import threading
+
+
+class _Lock_eML:  # ================================================================ _Lock_eML >>>
+  """
+  Reader/writer lock of a thread safe eML instance. Any number of threads may read at once, a
+  thread writing excludes every other thread. Waiting writers are given preference over new
+  readers so that a steady stream of readers can not starve them.
+
+  The lock is reentrant, a thread holding the lock may read or write again whilst it holds it. A
+  thread reading may not go on to write, as two readers doing so would wait on each other forever.
+  """
+
+  def __init__(self):  # -------------------------------------------------------------- __init__ >>
+    """
+
+    """
+    self.condition = threading.Condition(threading.Lock())
+
+    # number of threads reading, the thread writing and the number of threads waiting to write
+    self.readers = 0
+    self.writer = None
+    self.waiting_writers = 0
+
+    # per thread depth and mode of the lock held, used to make the lock reentrant
+    self.held = threading.local()
+    pass
+
+  def acquireRead(self):  # -------------------------------------------------------- acquireRead >>
+    """
+    Acquires the lock for reading, waiting whilst a thread is writing or waiting to write.
+    """
+    held = self.held
+    depth = getattr(held, 'depth', 0)
+    if depth > 0:
+      held.depth = depth + 1
+      return
+
+    with self.condition:
+      while self.writer is not None or self.waiting_writers > 0:
+        self.condition.wait()
+      self.readers += 1
+    held.depth = 1
+    held.writing = False
+    pass
+
+  def acquireWrite(self):  # ------------------------------------------------------ acquireWrite >>
+    """
+    Acquires the lock for writing, waiting until no other thread is reading or writing.
+    """
+    held = self.held
+    depth = getattr(held, 'depth', 0)
+    if depth > 0:
+      if not held.writing:
+        raise Exception('eML error: a thread reading an eML instance can not also write to it')
+      held.depth = depth + 1
+      return
+
+    with self.condition:
+      self.waiting_writers += 1
+      try:
+        while self.writer is not None or self.readers > 0:
+          self.condition.wait()
+      finally:
+        self.waiting_writers -= 1
+      self.writer = threading.get_ident()
+    held.depth = 1
+    held.writing = True
+    pass
+
+  def release(self):  # ---------------------------------------------------------------- release >>
+    """
+    Releases the lock acquired by this thread for either reading or writing.
+    """
+    held = self.held
+    held.depth -= 1
+    if held.depth > 0:
+      return
+
+    with self.condition:
+      if held.writing:
+        self.writer = None
+      else:
+        self.readers -= 1
+      self.condition.notify_all()
+    pass
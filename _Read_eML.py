@@ -20,11 +20,26 @@
   See the License for the specific language governing permissions and
   limitations under the License.
 """
+import base64
+import functools
+import os
+import sys
+import time
 from datetime import datetime, date
 
-import numpy as np
+from _Compress_eML import openRead, openText
+from _Index_eML import checksumRange, decodeTextIndex, decodeTextIndexMarks
+from _LazyNumpy_eML import np
+from _Table_eML import _Table_eML, decodeTextColumn
+from _Stats_eML import _Stats_eML
+from _SharedArrays_eML import _SharedArrays_eML
+from _Tokenize_eML import _Tokenize_eML, tokenizeHead
 
-import eStringUtils
+# containers written one element per line when their elements do not share a primitive type
+_NESTED_TYPES = {'dict', 'list', 'set', 'tuple', 'frozenset'}
+
+# characters read at a time whilst peeking, the head of every top level line must fit within it
+_PEEK_CHUNK = 64 * 1024
 
 
 class _Read_eML:
@@ -37,12 +52,19 @@ class _Read_eML:
       dict, list, set, tuple, and FrozenSet
   """
 
-  def __init__(self, eML_filename):  # ------------------------------------------------ __init__ >>
+  def __init__(self, eML_filename, stats: _Stats_eML = None,  # ---------------------- __init__ >>
+               shared_arrays: _SharedArrays_eML = None, ranges: list = None):
     """
     Loads all information within the eML_filename. The routine reads all lines and then decomposing
     them. The individual elements can be downloaded using the get methods for each type.
 
     :param eML_filename: name of the eml file
+    :param stats: optional statistics collected whilst loading, None disables the instrumentation
+    :param shared_arrays: optional shared memory the top level arrays are attached from or shared
+                          through, None decodes every array locally
+    :param ranges: optional (offset, length) byte ranges of the entries to be loaded, taken from
+                   readIndex. Only the header and those entries are read. None loads the whole
+                   file
     """
     self.eml_meta_data = dict()
 
@@ -50,31 +72,87 @@ class _Read_eML:
 
     self.identifiers = dict()
 
-    with open(eML_filename) as file:
-      self.linesin = [line.rstrip() for line in file]
+    self.shared_arrays = shared_arrays
+
+    # values labelled for back-referencing, label -> decoded value
+    self.references = dict()
 
-    while len(self.linesin) > 0:
-      # reads through all of the lines of the eML_filename
-      line = self.linesin.pop(0)
+    # strings up to this length are interned so that repeated values share a single object
+    self.intern_length = 64
 
-      if 'eML Header' in line:
-        header = line.split('|')
-        self.eml_meta_data['version'] = float(header[1].strip())
-        self.eml_meta_data['lamguage'] = header[2].strip()
-        self.eml_meta_data['creation date'] = datetime.strptime(header[3].strip(),
-                                                                '%m/%d/%Y %H:%M:%S.%f')
-        self.eml_meta_data['last update'] = datetime.strptime(header[4].strip(),
-                                                              '%m/%d/%Y %H:%M:%S.%f')
+    # index of the entries read from the eML Index line, identifier -> (offset, length, checksum,
+    # fingerprint). It is empty for files written without an index
+    self.entries = dict()
 
-      elif ':=' in line:
-        # all base lines have a := within the line
-        tmp = line.split(':=')
-        name = tmp[0].strip()
-        format_n_value = tmp[1].strip()
+    # True if the index marks the file as written in the compact layout, see _Write_eML
+    self.compact_layout = False
 
-        format, value = self._getFormatValue(format_n_value)
+    self.stats = stats
+    if stats is not None:
+      self._instrument()
+      start = time.perf_counter()
 
-        self.eml_data[name] = self._decomposeEntry(format, value)
+    compression = None
+    if ranges is None:
+      file, compression = openText(eML_filename)
+      if compression is None:
+        with file:
+          lines = [line.rstrip() for line in file]
+      else:
+        # compressed files are tokenized whilst they are decompressed, so the decompressed text is
+        # never held as a whole
+        lines = _streamLines(file)
+    else:
+      with open(eML_filename, 'rb') as file:
+        lines = [file.readline().decode('utf-8').rstrip()]
+        for offset, length in ranges:
+          file.seek(offset)
+          # every entry ends with a newline, splitlines would also split on unicode separators
+          text = file.read(length).decode('utf-8')
+          lines.extend(line.rstrip() for line in text.split('\n')[:-1])
+
+    if stats is not None:
+      stats.addTime('io', time.perf_counter() - start)
+      stats.count('bytes', os.path.getsize(eML_filename))
+
+    # every line is taken apart by the tokenizer
+    self.tokens = _Tokenize_eML(lines, stats)
+
+    while True:
+      # reads through all of the top level lines of the eML_filename
+      token = self.tokens.nextEntry()
+      if token is None:
+        break
+
+      if token[0] == 'header':
+        self.eml_meta_data.update(self._decodeHeader(token[1]))
+
+      elif token[0] == 'index':
+        # the fields of the index follow the order the entries were written in. The offsets of a
+        # compressed file can not be read from directly, so its entries are not indexed
+        index = decodeTextIndex(token[1])
+        self.compact_layout = decodeTextIndexMarks(token[1])[1]
+        if len(index) == len(self.identifiers) and compression is None:
+          self.entries = dict(zip(self.identifiers.keys(), index))
+
+      else:
+        if stats is not None:
+          start = time.perf_counter()
+
+        kind, name, format, value = token
+
+        if shared_arrays is not None and format[0] == 'array':
+          self.eml_data[name] = shared_arrays.getArray(
+            name, lambda: self._decomposeEntry(format, value))
+        else:
+          self.eml_data[name] = self._decomposeEntry(format, value)
+        self.identifiers[name] = self._getIdentifierType(format[0].strip())
+
+        if stats is not None:
+          stats.timeIdentifier(name, time.perf_counter() - start)
+
+    if stats is not None:
+      stats.count('lines', self.tokens.position)
     pass
 
   def getExistingData(self):  # --------------------------------------------- getExistingData >>
@@ -85,6 +163,19 @@ class _Read_eML:
     return self.eml_meta_data, self.identifiers, self.eml_data
     pass
 
+  @staticmethod
+  def _decodeHeader(header: list):  # -------------------------------------------- _decodeHeader >>
+    """
+    Decodes the fields of the eML Header line.
+
+    :param header: the stripped | separated fields of the header line
+    :return: dict of the header meta data
+    """
+    return {'version': float(header[1]), 'lamguage': header[2],
+            'creation date': datetime.strptime(header[3], '%m/%d/%Y %H:%M:%S.%f'),
+            'last update': datetime.strptime(header[4], '%m/%d/%Y %H:%M:%S.%f')}
+    pass
+
   def _decomposeArray(self, array_format: str, valuein):  # -------------- _decomposeArray >>
     """
     Decomposes a list
@@ -93,18 +184,26 @@ class _Read_eML:
     :param valuein: the list (string)
     :return: the decomposed list
     """
+    if array_format[1] == 'record':
+      return self._decomposeRecordArray(array_format, valuein)
+
     tmparraydim = array_format[2][1:-1].split(',')
     arraydim = list()
     for dim in tmparraydim:
-      arraydim.append(int(dim))
+      # one dimensional shapes are written with a trailing comma, e.g. (5,)
+      if len(dim.strip()) > 0:
+        arraydim.append(int(dim))
+    if valuein.startswith(' '):
+      # the space written after the format is not part of the first element
+      valuein = valuein[1:]
     strvalues = valuein.split('|')
 
     if len(array_format[1]) == 0:
       # this is an object array
       arrayout = np.zeros(len(strvalues), dtype=object)
       for ii  in range(len(strvalues)):
-        format, value = self._getFormatValue(strvalues[ii])
-        arrayout[ii] = self._decomposePrimitive(format, value)
+        format, value = self.tokens.splitElement(strvalues[ii])
+        arrayout[ii] = self._decomposePrimitive(format[0], value)
       pass
     else:
       # this is a constant type array
@@ -113,29 +212,66 @@ class _Read_eML:
     return arrayout.reshape(arraydim)
     pass
 
-  def _decomposeDict(self, number_of_elements: int, dictin: str):  # ----------- _decomposeDict >>
+  def _decomposeCompact(self, elementtype: str, valuein: str):  # ------------ _decomposeCompact >>
     """
-    Decomposes a Dict
+    Decomposes the elements of a compact list, set, tuple or frozenset in bulk, e.g. 1|2|3 of
+    <list|3|int>1|2|3.
 
-    :param number_of_elements: the number of elements in the Dict (string)
-    :param dictin: the Dict (string)
-    :return: the decomposed Set
+    :param elementtype: the primitive type shared by all of the elements
+    :param valuein: the | separated elements (string)
+    :return: list of the decomposed elements
     """
-    dictout = dict()
-
-    # decompose initial value
-    keyvalue, valueformat, value = self._decomposeKeyValue(dictin)
+    return self._convertCompactValues(elementtype, valuein.split('|'))
+    pass
 
-    dictout[keyvalue] = self._decomposeEntry(valueformat, value)
+  def _decomposeCompactDict(self, keytype: str, valuetype: str,  # ------- _decomposeCompactDict >>
+                            dictin: str):
+    """
+    Decomposes the pairs of a compact dict in bulk, e.g. a|1.5|b|2.5 of
+    <dict|2|str|float>a|1.5|b|2.5.
 
-    for ii in range(number_of_elements - 1):
-      currline = self.linesin.pop(0)
+    :param keytype: the primitive type shared by all of the keys
+    :param valuetype: the primitive type shared by all of the values
+    :param dictin: the | separated key value pairs (string)
+    :return: the decomposed dict
+    """
+    strpairs = dictin.split('|')
+    keys = self._convertCompactValues(keytype, strpairs[0::2])
+    if keytype == 'str':
+      keys = map(sys.intern, keys)
+    return dict(zip(keys, self._convertCompactValues(valuetype, strpairs[1::2])))
+    pass
 
-      keyvalue, valueformat, value = self._decomposeKeyValue(currline)
+  def _convertCompactValues(self, elementtype: str,  # ------------------- _convertCompactValues >>
+                            strvalues: list):
+    """
+    Converts the elements of a compact container from strings in bulk.
 
-      dictout[keyvalue] = self._decomposeEntry(valueformat, value)
+    :param elementtype: the primitive type shared by all of the elements
+    :param strvalues: list of the element strings
+    :return: list of the converted elements
+    """
+    if self.stats is not None:
+      self.stats.countEntry(elementtype, len(strvalues))
 
-    return dictout
+    match elementtype:
+      case 'bool':
+        return [value == 'True' for value in strvalues]
+      case 'int':
+        return list(map(int, strvalues))
+      case 'float':
+        return list(map(float, strvalues))
+      case 'complex':
+        return list(map(complex, strvalues))
+      case 'str':
+        intern_length = self.intern_length
+        return [sys.intern(value) if len(value) <= intern_length else value for value in strvalues]
+      case 'datetime':
+        return [datetime.strptime(value, '%m/%d/%Y %H:%M:%S.%f') for value in strvalues]
+      case 'date':
+        return [datetime.strptime(value, '%m/%d/%Y').date() for value in strvalues]
+      case _:
+        raise Exception('Read_eML error: invalid compact element type ' + str(elementtype))
     pass
 
   def _decomposeEntry(self, format, value):  # --------------------------------- _decomposeEntry >>
@@ -156,14 +292,34 @@ class _Read_eML:
         case 'array':
           return self._decomposeArray(format, value)
         case 'dict':
-          return self._decomposeDict(int(format[1]), value)
+          if len(format) > 3:
+            return self._decomposeCompactDict(format[2], format[3], value)
+          return self._decomposeNested(format, value)
+        case 'frozenset':
+          if len(format) > 2:
+            return frozenset(self._decomposeCompact(format[2], value))
+          return self._decomposeNested(format, value)
         case 'list':
-          return self._decomposeList(int(format[1]), value)
+          if len(format) > 2:
+            return self._decomposeCompact(format[2], value)
+          return self._decomposeNested(format, value)
         case 'set':
-          return self._decomposeSet(int(format[1]), value)
+          if len(format) > 2:
+            return set(self._decomposeCompact(format[2], value))
+          return self._decomposeNested(format, value)
+        case 'table':
+          return self._decomposeTable(int(format[1]), int(format[2]), value)
         case 'tuple':
-          return self._decomposeTuple(int(format[1]), value)
+          if len(format) > 2:
+            return tuple(self._decomposeCompact(format[2], value))
+          return self._decomposeNested(format, value)
+        case 'ref':
+          return self.references[int(value)]
         case _:
+          if self._isNested(format):
+            return self._decomposeNested(format, value)
+          if '&' in format[0]:
+            return self._decomposeLabelled(format, value)
           raise Exception(
             'Read_eML format error: format ' + str(format) + ' is not supported')
     pass
@@ -178,7 +334,7 @@ class _Read_eML:
     """
     match (format):
       case 'bool':
-        return bool(value)
+        return value == 'True'
       case 'byte':
         return bytes(list[value])
       case 'int':
@@ -188,6 +344,8 @@ class _Read_eML:
       case 'complex':
         return complex(value)
       case 'str':
+        if len(value) <= self.intern_length:
+          return sys.intern(value)
         return value
       case 'datetime':
         return datetime.strptime(value, '%m/%d/%Y %H:%M:%S.%f')
@@ -197,120 +355,211 @@ class _Read_eML:
         raise Exception('Read_eML error: invalid primitive type ' + str(format))
     pass
 
-  def _decomposeList(self, number_of_elements: int, valuein):  # --------------- _decomposeList >>
+  def _decomposeLabelled(self, format, value):  # --------------------------- _decomposeLabelled >>
     """
-    Decomposes a list
+    Decomposes a value labelled for back-referencing, e.g. <str&3> or <dict&4 |2>, and records it
+    so that later <ref>label entries share it.
 
-    :param number_of_elements: the number of elements in the list
-    :param valuein: the list (string)
-    :return: the decomposed list
+    :param format: the format of the entry with the label appended to the data type
+    :param value: the string value of the entry
+    :return: the decomposed value
     """
-    listout = list()
-
-    # decompose initial value
-    format, value = self._getFormatValue(valuein)
-
-    listout.append(self._decomposeEntry(format, value))
-
-    for ii in range(int(number_of_elements) - 1):
-      currline = self.linesin.pop(0).strip()
-
-      format, value = self._getFormatValue(currline)
-
-      listout.append(self._decomposeEntry(format, value))
-
-    return listout
+    datatype, label = format[0].split('&')
+    if datatype == 'str':
+      valueout = value
+    else:
+      valueout = self._decomposeEntry([datatype] + format[1:], value)
+    self.references[int(label)] = valueout
+    return valueout
     pass
 
-  def _decomposeSet(self, number_of_elements: int, valuein: str):  # ------------- _decomposeSet >>
+  def _decomposeNested(self, format, value):  # ------------------------------- _decomposeNested >>
     """
-    Decomposes a Set
+    Decomposes a dict, list, set, tuple or frozenset written one element per line, along with all
+    of the containers nested within it. The containers being decomposed are held on an explicit
+    stack rather than by recursion, so there is no limit on the nesting depth.
 
-    :param number_of_elements: the number of elements in the Set (string)
-    :param valuein: the value of the Set (string)
-    :return: the decomposed Set
+    :param format: the format of the container, the data type may carry a back-reference label
+    :param value: the first element of the container (string)
+    :return: the decomposed container
     """
-    setout = set()
-
-    # decompose initial value
-    format, value = self._getFormatValue(valuein)
-
-    setout.add(self._decomposeEntry(format, value))
-
-    for ii in range(number_of_elements - 1):
-      currline = self.linesin.pop(0).strip()
-
-      format, value = self._getFormatValue(currline)
-
-      setout.add(self._decomposeEntry(format, value))
-
-    return setout
+    stats = self.stats
+
+    # each frame holds the data type, label, elements remaining, elements decoded so far and the
+    # key of the dict entry being decoded
+    stack = list()
+    while True:
+      if len(format) == 2 and self._isNested(format):
+        datatype, separator, label = format[0].strip().partition('&')
+        frame = [datatype, label, int(format[1]), dict() if datatype == 'dict' else list(), None]
+        if stats is not None:
+          stats.countEntry(datatype)
+          stats.enterContainer()
+        if frame[2] > 0:
+          stack.append(frame)
+          if datatype == 'dict':
+            keytype, key, format, value = self.tokens.splitPair(value)
+            frame[4] = self._decomposeKey(keytype, key)
+          else:
+            format, value = self.tokens.splitElement(value)
+          continue
+        # streamed containers may be empty
+        valueout = self._closeNested(frame)
+      else:
+        valueout = self._decomposeEntry(format, value)
+
+      # adds the decoded value to its container, closing every container that is now complete
+      while len(stack) > 0:
+        frame = stack[-1]
+        if frame[0] == 'dict':
+          frame[3][frame[4]] = valueout
+        else:
+          frame[3].append(valueout)
+        frame[2] -= 1
+        if frame[2] > 0:
+          break
+        stack.pop()
+        valueout = self._closeNested(frame)
+      else:
+        return valueout
+
+      if frame[0] == 'dict':
+        keytype, key, format, value = self.tokens.nextPair()
+        frame[4] = self._decomposeKey(keytype, key)
+      else:
+        format, value = self.tokens.nextElement()
     pass
 
-  def _decomposeFrozenSet(self, number_of_elements: int, valuein: str):  # -- _decomposeFrozenSet >>
+  def _closeNested(self, frame: list):  # ----------------------------------------- _closeNested >>
     """
-    Decomposes a Frozenset
+    Converts the elements of a completely decoded container to its data type and records it for
+    back-referencing when it is labelled.
 
-    :param number_of_elements: the number of elements in the Frozenset (string)
-    :param valuein: the value of the Frozenset (string)
-    :return: the decomposed Frozenset
+    :param frame: the stack frame of the container, see _decomposeNested
+    :return: the decomposed container
     """
-    setout = set()
-
-    # decompose initial value
-    format, value = self._getFormatValue(valuein)
-
-    setout.add(self._decomposeEntry(format, value))
-
-    for ii in range(number_of_elements - 1):
-      currline = self.linesin.pop(0).strip()
-
-      format, value = self._getFormatValue(currline)
-
-      setout.add(self._decomposeEntry(format, value))
-
-    return frozenset(setout)
+    datatype, label, remaining, valueout, key = frame
+    match datatype:
+      case 'set':
+        valueout = set(valueout)
+      case 'tuple':
+        valueout = tuple(valueout)
+      case 'frozenset':
+        valueout = frozenset(valueout)
+    if len(label) > 0:
+      self.references[int(label)] = valueout
+    if self.stats is not None:
+      self.stats.exitContainer()
+    return valueout
     pass
 
-  def _decomposeTuple(self, number_of_elements: int, valuein: str):  # --------- _decomposeTuple >>
+  def _decomposeRecordArray(self, array_format, valuein: str):  # -------- _decomposeRecordArray >>
     """
-    Decomposes a Tuple
+    Decomposes a structured array, the records are decoded in bulk from base64.
 
-    :param number_of_elements: the number of elements in the Tuple (string)
-    :param valuein: the Tuple (string)
-    :return: the decomposed Set
+    :param array_format: the array format holding the shape and the field layout
+    :param valuein: base64 of the packed little endian records
+    :return: the decomposed structured array
     """
-    listout = list()
+    arraydim = [int(dim) for dim in array_format[2][1:-1].split(',') if len(dim.strip()) > 0]
+
+    fields = list()
+    for spec in array_format[3].split(','):
+      name, fieldtype = spec.split(':')
+      shape = ()
+      if '[' in fieldtype:
+        fieldtype, dims = fieldtype[:-1].split('[')
+        shape = tuple(int(dim) for dim in dims.split('x'))
+      fields.append((name, '<' + fieldtype, shape))
+
+    data = base64.b64decode(valuein.strip())
+    return np.frombuffer(data, dtype=np.dtype(fields)).reshape(arraydim).copy()
+    pass
 
-    # decompose initial value
-    format, value = self._getFormatValue(valuein)
+  def _decomposeTable(self, number_of_columns: int, number_of_rows: int,  # ---- _decomposeTable >>
+                      valuein: str):
+    """
+    Decomposes a Table. The columns are only decoded when they are first accessed.
 
-    listout.append(self._decomposeEntry(format, value))
+    :param number_of_columns: the number of columns in the Table
+    :param number_of_rows: the number of rows in the Table
+    :param valuein: the first column of the Table (string)
+    :return: the decomposed Table
+    """
+    tableout = _Table_eML()
+    tableout.nrows = number_of_rows
+
+    for ii in range(number_of_columns):
+      if ii == 0:
+        format, value = self.tokens.splitElement(valuein)
+      else:
+        format, value = self.tokens.nextElement()
+      tableout.addEncodedColumn(format[1], number_of_rows,
+                                functools.partial(decodeTextColumn, format[2], value,
+                                                  number_of_rows))
+
+    return tableout
+    pass
 
-    for ii in range(number_of_elements - 1):
-      currline = self.linesin.pop(0).strip()
+  def _decomposeKey(self, keytype: str, key: str):  # ---------------------------- _decomposeKey >>
+    """
+    Decomposes the key of a dict entry.
 
-      format, value = self._getFormatValue(currline)
+    :param keytype: the primitive type of the key
+    :param key: the key (string)
+    :return: the decomposed key
+    """
+    keyvalue = self._decomposePrimitive(keytype, key)
+    if type(keyvalue) is str:
+      # keys repeat across the dicts of a file, so every key is interned regardless of its length
+      keyvalue = sys.intern(keyvalue)
+    return keyvalue
+    pass
 
-      listout.append(self._decomposeEntry(format, value))
+  @staticmethod
+  def _getIdentifierType(format: str):  # ----------------------------------- _getIdentifierType >>
+    """
+    Converts the format of a top level entry to the identifier type used by eML and _Write_eML.
 
-    return tuple(listout)
+    :param format: the format of the top level entry
+    :return: the identifier type
+    """
+    match format:
+      case 'str':
+        return 'string'
+      case 'frozenset':
+        return 'frozen set'
+      case _:
+        return format
     pass
 
-  def _decomposeKeyValue(self, dictin: str):  # ---------------------------- _decomposeKeyValue >>
+  def _instrument(self):  # -------------------------------------------------------- _instrument >>
     """
-
-    :param dictin:
-    :return:
+    Wraps the decoding methods of this instance so that they are timed and counted by self.stats,
+    the tokenizer times itself. This is only called when instrumentation has been requested.
     """
-    # tmp = arrayin.split('|')
-    key = eStringUtils.beforeFirst(dictin, '|').strip()
-    value = eStringUtils.afterFirst(dictin, '|').strip()
-    # value = tmp[1:]
-    keyformat, keyvalue = self._getFormatValue(key)
-    keyvalue = self._decomposePrimitive(keyformat[0], keyvalue)
-    valueformat, value = self._getFormatValue(value)
-    return keyvalue, valueformat, value
+    stats = self.stats
+    decompose_entry = self._decomposeEntry
+    decompose_primitive = self._decomposePrimitive
+
+    def countedDecomposeEntry(format, value):
+      # labelled entries are counted once their label has been removed, nested containers are
+      # counted by _decomposeNested as each of them is opened
+      if self._isPrimitive(format[0]) or '&' in format[0] or self._isNested(format):
+        return decompose_entry(format, value)
+      stats.countEntry(format[0].strip())
+      stats.enterContainer()
+      try:
+        return decompose_entry(format, value)
+      finally:
+        stats.exitContainer()
+
+    def countedDecomposePrimitive(format, value):
+      stats.countEntry(format)
+      return decompose_primitive(format, value)
+
+    self._decomposeEntry = stats.timed('decode', countedDecomposeEntry)
+    self._decomposePrimitive = countedDecomposePrimitive
     pass
 
   def _isPrimitive(self, format):  # ---------------------------------------------- _isPrimitive >>
@@ -327,19 +576,15 @@ class _Read_eML:
         return False
     pass
 
-  def _getFormatValue(self, format_n_value: str):  # -------------------------- _getFormatValue >>
+  def _isNested(self, format):  # ---------------------------------------------------- _isNested >>
     """
+    determines if the input format is a container written one element per line, rather than a
+    compact container written on a single line
 
-    :param format_n_value:
-    :return:
+    :param format: format of the data in question
+    :return: True if it is decomposed by _decomposeNested, False otherwise
     """
-    indx1 = format_n_value.find('<')
-    indx2 = format_n_value.find('>')
-    format = format_n_value[indx1 + 1:indx2].split('|')
-
-    value = format_n_value[indx2 + 1:]
-
-    return format, value
+    return len(format) == 2 and format[0].strip().partition('&')[0] in _NESTED_TYPES
     pass
 
   def _convertConstantTypeArray(self, format: str,  # ---------------- _convertConstantTypeArray >>
@@ -353,7 +598,7 @@ class _Read_eML:
     # python language data types
     match format:
       case 'bool':
-        arrayout = np.array(list(map(bool, strvalues)), dtype=bool)
+        arrayout = np.array([value.strip() == 'True' for value in strvalues], dtype=bool)
       case 'int':
         arrayout = np.array(list(map(int, strvalues)), dtype=int)
       case 'float':
@@ -421,3 +666,157 @@ class _Read_eML:
 
     return arrayout
     pass
+
+
+def peek(eML_filename: str):  # ----------------------------------------------------------- peek >>
+  """
+  Reads the header meta data and the identifiers of an eML file without decoding any of the values.
+  The identifiers of files with an eML Index are read from the head of each indexed entry, see
+  readIndex. Otherwise only the head of each top level line is tokenized, the elements of
+  containers are indented and the remainder of long lines is read in chunks and skipped.
+
+  :param eML_filename: name of the eml file
+  :return: eml_meta_data, identifiers
+  """
+  eml_meta_data = dict()
+  identifiers = dict()
+  try:
+    entries = readIndex(eML_filename)[0]
+  except Exception:
+    # an index that no longer matches the entries, e.g. of a file edited by hand, is not used
+    entries = None
+  file, compression = openText(eML_filename)
+  with file:
+    if entries is not None:
+      token = tokenizeHead(file.readline(_PEEK_CHUNK).rstrip())
+      if token is not None and token[0] == 'header':
+        eml_meta_data.update(_Read_eML._decodeHeader(token[1]))
+      for identifier, identifiertype, offset, length, checksum, fingerprint in entries:
+        identifiers[identifier] = identifiertype
+      return eml_meta_data, identifiers
+
+    at_line_start = True
+    while True:
+      chunk = file.readline(_PEEK_CHUNK)
+      if chunk == '':
+        break
+
+      if at_line_start and not chunk[0].isspace():
+        token = tokenizeHead(chunk.rstrip())
+        if token is not None and token[0] == 'header':
+          eml_meta_data.update(_Read_eML._decodeHeader(token[1]))
+        elif token is not None:
+          identifiers[token[1]] = _Read_eML._getIdentifierType(token[2][0].strip())
+      at_line_start = chunk.endswith('\n')
+  return eml_meta_data, identifiers
+  pass
+
+
+def readIndex(eML_filename: str):  # ------------------------------------------------- readIndex >>
+  """
+  Reads the eML Index line of a text eML file along with the identifier of each entry. Only the
+  head of each entry is read, none of the values are decoded.
+
+  :param eML_filename: name of the eml file
+  :return: list of (identifier, identifier type, offset, length, checksum, fingerprint) tuples,
+           True if the entries were written with back-references and True if they were written in
+           the compact layout. None, False and False if the file has no eML Index or is compressed,
+           the entries of a compressed file can not be read without decompressing the ones before
+  """
+  file, compression = openRead(eML_filename)
+  with file:
+    if compression is not None:
+      return None, False, False
+    line = _readLastLine(file).decode('utf-8', errors='replace')
+    if not line.startswith('eML Index'):
+      return None, False, False
+    fields = [field.strip() for field in line.split('|')]
+
+    entries = list()
+    for offset, length, checksum, fingerprint in decodeTextIndex(fields):
+      file.seek(offset)
+      head = file.read(min(length, _PEEK_CHUNK)).decode('utf-8', errors='replace')
+      token = tokenizeHead(head.split('\n', 1)[0])
+      if token is None or token[0] != 'entry':
+        raise Exception('Read_eML format error: the eML Index of ' + eML_filename
+                        + ' does not match its entries')
+      entries.append((token[1], _Read_eML._getIdentifierType(token[2][0].strip()), offset, length,
+                      checksum, fingerprint))
+  return (entries,) + decodeTextIndexMarks(fields)
+  pass
+
+
+def verify(eML_filename: str):  # ------------------------------------------------------- verify >>
+  """
+  Checks every entry of an eML file against the checksum held for it in the eML Index line, the
+  bytes of the entries are checksummed without being decoded.
+
+  :param eML_filename: name of the eml file
+  :return: list of the identifiers of the entries not matching their checksum, the position of the
+           entry is listed when its identifier can not be read
+  """
+  file, compression = openRead(eML_filename)
+  with file:
+    # the entries follow each other, so a compressed file is decompressed once to find its last
+    # line and once more whilst it is checksummed
+    line = _readLastLine(file, compression is not None).decode('utf-8', errors='replace')
+    if not line.startswith('eML Index'):
+      raise Exception('Read_eML verify error: ' + eML_filename + ' has no eML Index')
+    try:
+      index = decodeTextIndex([field.strip() for field in line.split('|')])
+    except ValueError:
+      raise Exception('Read_eML verify error: the eML Index of ' + eML_filename + ' is damaged')
+
+    corrupted = list()
+    for position, (offset, length, checksum, fingerprint) in enumerate(index):
+      if checksumRange(file, offset, length) == checksum:
+        continue
+      file.seek(offset)
+      head = file.read(min(length, _PEEK_CHUNK)).decode('utf-8', errors='replace')
+      token = tokenizeHead(head.split('\n', 1)[0])
+      corrupted.append(token[1] if token is not None and token[0] == 'entry' else position)
+  return corrupted
+  pass
+
+
+def _readLastLine(file, compressed: bool = False):  # ---------------------------- _readLastLine >>
+  """
+  Reads the last line of a file without reading the rest of the file.
+
+  :param file: file opened for binary reading
+  :param compressed: True if the file is decompressed as it is read, every line is then read and
+                     the file is rewound
+  :return: the last line without its trailing whitespace
+  """
+  if compressed:
+    line = b''
+    for line in file:
+      pass
+    file.seek(0)
+    return line.rstrip()
+
+  position = file.seek(0, os.SEEK_END)
+  tail = b''
+  while position > 0:
+    size = min(_PEEK_CHUNK, position)
+    position -= size
+    file.seek(position)
+    tail = file.read(size) + tail
+    start = tail.rfind(b'\n', 0, len(tail) - 1)
+    if start >= 0:
+      return tail[start + 1:].rstrip()
+  return tail.rstrip()
+  pass
+
+
+def _streamLines(file):  # -------------------------------------------------------- _streamLines >>
+  """
+  Produces the lines of an open file one at a time and closes the file once they are exhausted.
+
+  :param file: file opened for reading text
+  :return: generator of the lines without their trailing whitespace
+  """
+  with file:
+    for line in file:
+      yield line.rstrip()
+  pass
@@ -0,0 +1,258 @@
+"""
+          _SharedArrays_eML of the eML system
+
+                 created on 10/19/2026
+    Copyright (c) 2026 Turtle Bay Geophysical LLC
+                ALL RIGHTS RESERVED.
+
+ Questions and comments can be directed to: Support@TurtleBayGeophysical.com
+
+  Licensed under the Attribution-NonCommercial-ShareAlike 4.0 International
+  (CC BY-NC-SA 4.0) (the "License"); you may not use this file except in
+  compliance with the License.
+
+  You may obtain a copy of the License at
+
+      https://creativecommons.org/licenses/by-nc-sa/4.0/
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+"""
+from __future__ import annotations
+
+import ast
+import hashlib
+import json
+import os
+import time
+
+from _LazyNumpy_eML import np
+
+# multiprocessing is imported by the functions using it, it is slow to import and is only needed
+# once arrays are shared
+
+
+# layout of each shared memory block:
+#   byte 0            ready flag, set to 1 once the array has been completely copied in
+#   bytes 1 - 3       unused
+#   bytes 4 - 7       length of the JSON description
+#   bytes 8 - 255     JSON description of the dtype and shape of the array
+#   bytes 256 -       the array data in C order
+_HEADER_BYTES = 256
+
+# shared memory blocks opened by this process, name -> (SharedMemory, created by this process)
+_opened_blocks = dict()
+
+
+class _SharedArrays_eML:  # ================================================ _SharedArrays_eML >>>
+  """
+  Shares the decoded arrays of an eML file between processes. The first process to decode an array
+  copies it into a multiprocessing.shared_memory block named after the file and identifier. Any
+  other process loading the same version of the same file attaches a read-only, zero copy view of
+  the block instead of decoding the array again.
+
+  Blocks outlive the process that created them. They are removed by the process that created
+  them with releaseSharedArrays, or by any process from the file they were shared for with
+  unlinkArrays. Object arrays can not be shared and are always decoded.
+  """
+
+  def __init__(self, eml_filename: str, wait_seconds: float = 5.0):  # ---------------- __init__ >>
+    """
+
+    :param eml_filename: the eml filename being loaded
+    :param wait_seconds: how long to wait for another process that is copying an array into a block
+                         before decoding the array locally
+    """
+    stat = os.stat(eml_filename)
+    self.file_key = os.path.realpath(eml_filename) + '|' + str(stat.st_size) + '|' \
+                    + str(stat.st_mtime_ns)
+    self.wait_seconds = wait_seconds
+    pass
+
+  def getArray(self, identifier, decode):  # ------------------------------------------ getArray >>
+    """
+    Gets an array from shared memory, decoding it and sharing it if no other process has.
+
+    :param identifier: the user supplied identifier of the array
+    :param decode: function decoding the array from the eML file
+    :return: read-only array
+    """
+    name = self._getBlockName(identifier)
+
+    arrayout = self._attach(name)
+    if arrayout is not None:
+      return arrayout
+
+    arrayout = decode()
+    if arrayout.dtype == object:
+      return arrayout
+
+    return self._share(name, arrayout)
+    pass
+
+  def unlinkArrays(self, identifiers):  # ----------------------------------------- unlinkArrays >>
+    """
+    Removes the shared memory blocks of arrays of this version of the file, whichever process
+    created them. Processes with a block open keep their views of it, the memory is freed once they
+    have all closed it.
+
+    :param identifiers: the user supplied identifiers of the arrays
+    :return: number of blocks that were removed
+    """
+    from multiprocessing import resource_tracker, shared_memory
+
+    removed = 0
+    for identifier in identifiers:
+      name = self._getBlockName(identifier)
+      if name in _opened_blocks:
+        block = _opened_blocks[name][0]
+        # the block is removed here, so releaseSharedArrays must not remove it again
+        _opened_blocks[name] = (block, False)
+      else:
+        try:
+          block = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+          continue
+        resource_tracker.unregister(block._name, 'shared_memory')
+      try:
+        # unlink hands the block back to the resource tracker, which expects to know about it
+        resource_tracker.register(block._name, 'shared_memory')
+        block.unlink()
+        removed += 1
+      except FileNotFoundError:
+        pass
+      if name not in _opened_blocks:
+        block.close()
+    return removed
+    pass
+
+  def _attach(self, name: str):  # ----------------------------------------------------- _attach >>
+    """
+    Attaches to an existing shared memory block, waiting for it to become ready.
+
+    :param name: name of the shared memory block
+    :return: read-only view of the shared array, None if the block does not exist or never became
+             ready
+    """
+    from multiprocessing import resource_tracker, shared_memory
+
+    if name in _opened_blocks:
+      block = _opened_blocks[name][0]
+    else:
+      try:
+        block = shared_memory.SharedMemory(name=name)
+      except FileNotFoundError:
+        return None
+      # attaching must not hand the block to the resource tracker, which would remove it when this
+      # process exits
+      resource_tracker.unregister(block._name, 'shared_memory')
+      _opened_blocks[name] = (block, False)
+
+    deadline = time.monotonic() + self.wait_seconds
+    while block.buf[0] != 1:
+      if time.monotonic() > deadline:
+        return None
+      time.sleep(0.001)
+
+    return self._view(block)
+    pass
+
+  def _getBlockName(self, identifier):  # ---------------------------------------- _getBlockName >>
+    """
+    Gets the name of the shared memory block for an identifier of this version of the file.
+
+    :param identifier: the user supplied identifier of the array
+    :return: name of the shared memory block
+    """
+    digest = hashlib.blake2b((self.file_key + '|' + str(identifier)).encode('utf-8'),
+                             digest_size=10).hexdigest()
+    return 'eml_' + digest
+    pass
+
+  def _share(self, name: str, arrayin: np.ndarray):  # ---------------------------------- _share >>
+    """
+    Copies a decoded array into a new shared memory block.
+
+    :param name: name of the shared memory block
+    :param arrayin: the decoded array
+    :return: read-only view of the shared array
+    """
+    # the dtype is described by its descr so that the fields of structured arrays are kept
+    description = json.dumps({'dtype': repr(np.lib.format.dtype_to_descr(arrayin.dtype)),
+                              'shape': list(arrayin.shape)})
+    description = description.encode('utf-8')
+    if len(description) > _HEADER_BYTES - 8:
+      return arrayin
+
+    from multiprocessing import resource_tracker, shared_memory
+
+    try:
+      block = shared_memory.SharedMemory(name=name, create=True,
+                                         size=_HEADER_BYTES + max(arrayin.nbytes, 1))
+    except FileExistsError:
+      # another process created the block first
+      arrayout = self._attach(name)
+      return arrayout if arrayout is not None else arrayin
+    resource_tracker.unregister(block._name, 'shared_memory')
+    _opened_blocks[name] = (block, True)
+
+    block.buf[4:8] = len(description).to_bytes(4, 'little')
+    block.buf[8:8 + len(description)] = description
+    shared = np.ndarray(arrayin.shape, dtype=arrayin.dtype, buffer=block.buf, offset=_HEADER_BYTES)
+    shared[...] = arrayin
+    del shared
+    block.buf[0] = 1
+
+    return self._view(block)
+    pass
+
+  def _view(self, block):  # ------------------------------------------------------------- _view >>
+    """
+    Creates a read-only array view of a ready shared memory block.
+
+    :param block: the shared memory block
+    :return: read-only view of the shared array
+    """
+    length = int.from_bytes(bytes(block.buf[4:8]), 'little')
+    description = json.loads(bytes(block.buf[8:8 + length]).decode('utf-8'))
+    dtype = np.lib.format.descr_to_dtype(ast.literal_eval(description['dtype']))
+    arrayout = np.ndarray(description['shape'], dtype=dtype,
+                          buffer=block.buf, offset=_HEADER_BYTES)
+    arrayout.flags.writeable = False
+    return arrayout
+    pass
+
+
+def releaseSharedArrays(unlink: bool = False):  # -------------------------- releaseSharedArrays >>
+  """
+  Closes every shared memory block opened by this process. Blocks still referenced by an array view
+  are left open.
+
+  :param unlink: also remove the blocks created by this process so that the memory is freed once
+                 every process has closed them
+  :return: number of blocks that were closed
+  """
+  from multiprocessing import resource_tracker
+
+  closed = 0
+  for name in list(_opened_blocks.keys()):
+    block, created = _opened_blocks[name]
+    if unlink and created:
+      try:
+        # unlink hands the block back to the resource tracker, which expects to know about it
+        resource_tracker.register(block._name, 'shared_memory')
+        block.unlink()
+      except FileNotFoundError:
+        pass
+    try:
+      block.close()
+    except BufferError:
+      # an array view of the block is still alive
+      continue
+    del _opened_blocks[name]
+    closed += 1
+  return closed
+  pass
@@ -0,0 +1,177 @@
+"""
+             _Stats_eML of the eML system
+
+                 created on 10/19/2026
+    Copyright (c) 2026 Turtle Bay Geophysical LLC
+                ALL RIGHTS RESERVED.
+
+ Questions and comments can be directed to: Support@TurtleBayGeophysical.com
+
+  Licensed under the Attribution-NonCommercial-ShareAlike 4.0 International
+  (CC BY-NC-SA 4.0) (the "License"); you may not use this file except in
+  compliance with the License.
+
+  You may obtain a copy of the License at
+
+      https://creativecommons.org/licenses/by-nc-sa/4.0/
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+"""
+import time
+
+
+class _Stats_eML:  # ============================================================== _Stats_eML >>>
+  """
+  Holds the instrumentation collected whilst loading or saving an eML file. Instrumentation is
+  opt-in, _Read_eML and _Write_eML only wrap their hot paths when they are handed a _Stats_eML
+  instance so there is no overhead when it is disabled.
+
+  The phases timed are:
+    load: io, tokenize, decode
+    save: encode, write
+  """
+
+  def __init__(self, operation: str, eml_filename: str = None):  # -------------------- __init__ >>
+    """
+
+    :param operation: the operation being measured, load or save
+    :param eml_filename: the eML filename being loaded or saved
+    """
+    self.operation = operation
+    self.eml_filename = eml_filename
+
+    # seconds spent in each of the phases
+    self.phases = dict()
+
+    # lines and bytes read or written
+    self.counters = {'lines': 0, 'bytes': 0}
+
+    # number of entries of each data type, including the keys and elements of containers
+    self.entry_types = dict()
+
+    # current and maximum container nesting depth
+    self.depth = 0
+    self.max_depth = 0
+
+    # seconds spent on each of the top level identifiers
+    self.identifier_times = dict()
+
+    # the statistics are created as the load or save starts
+    self.start_time = time.perf_counter()
+    self.total_time = 0.0
+
+    # phases currently being timed, used to keep the phase times exclusive
+    self._phase_stack = list()
+    pass
+
+  def addTime(self, phase: str, seconds: float):  # ------------------------------------ addTime >>
+    """
+    Adds time to one of the phases.
+
+    :param phase: name of the phase
+    :param seconds: elapsed seconds to be added
+    """
+    self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+    pass
+
+  def asDict(self):  # ------------------------------------------------------------------ asDict >>
+    """
+    :return: the collected statistics as a plain dict suitable for a metrics system
+    """
+    return {'operation': self.operation, 'eml_filename': self.eml_filename,
+            'total_time': self.total_time, 'phases': dict(self.phases),
+            'counters': dict(self.counters), 'entry_types': dict(self.entry_types),
+            'max_depth': self.max_depth, 'identifier_times': dict(self.identifier_times)}
+    pass
+
+  def count(self, counter: str, amount: int = 1):  # ------------------------------------- count >>
+    """
+    Increments one of the counters.
+
+    :param counter: name of the counter
+    :param amount: amount to be added
+    """
+    self.counters[counter] = self.counters.get(counter, 0) + amount
+    pass
+
+  def countEntry(self, entrytype: str, amount: int = 1):  # ------------------------- countEntry >>
+    """
+    Increments the number of entries of the specified data type.
+
+    :param entrytype: the eML data type of the entry
+    :param amount: number of entries to be added
+    """
+    self.entry_types[entrytype] = self.entry_types.get(entrytype, 0) + amount
+    pass
+
+  def enterContainer(self):  # -------------------------------------------------- enterContainer >>
+    """
+    Records that a container is being decoded or encoded.
+    """
+    self.depth += 1
+    if self.depth > self.max_depth:
+      self.max_depth = self.depth
+    pass
+
+  def exitContainer(self):  # ---------------------------------------------------- exitContainer >>
+    """
+    Records that a container has been completely decoded or encoded.
+    """
+    self.depth -= 1
+    pass
+
+  def timeIdentifier(self, identifier, seconds: float):  # ---------------------- timeIdentifier >>
+    """
+    Records the time spent on a top level identifier.
+
+    :param identifier: the user supplied identifier
+    :param seconds: elapsed seconds
+    """
+    self.identifier_times[identifier] = self.identifier_times.get(identifier, 0.0) + seconds
+    pass
+
+  def timed(self, phase: str, function):  # ---------------------------------------------- timed >>
+    """
+    Wraps a function so that the time spent within it is added to a phase. Phase times are
+    exclusive, time spent in a nested phase is not counted against the enclosing phase. Nested
+    calls within the same phase are only timed once.
+
+    :param phase: name of the phase
+    :param function: function to be timed
+    :return: the wrapped function
+    """
+    stack = self._phase_stack
+
+    def wrapper(*args, **kwargs):
+      if len(stack) > 0 and stack[-1][0] == phase:
+        return function(*args, **kwargs)
+
+      # each stack frame holds the phase and the time spent in its nested phases
+      frame = [phase, 0.0]
+      stack.append(frame)
+      start = time.perf_counter()
+      try:
+        return function(*args, **kwargs)
+      finally:
+        elapsed = time.perf_counter() - start
+        stack.pop()
+        self.addTime(phase, elapsed - frame[1])
+        if len(stack) > 0:
+          stack[-1][1] += elapsed
+
+    return wrapper
+    pass
+
+  def __repr__(self):  # -------------------------------------------------------------- __repr__ >>
+    """
+    :return: one line summary of the statistics
+    """
+    phases = ', '.join(phase + ' %.6fs' % seconds for phase, seconds in self.phases.items())
+    return ('_Stats_eML(' + self.operation + ' ' + str(self.eml_filename) + ': total %.6fs'
+            % self.total_time + ', ' + phases + ', lines ' + str(self.counters['lines'])
+            + ', bytes ' + str(self.counters['bytes']) + ', max depth ' + str(self.max_depth) + ')')
+    pass
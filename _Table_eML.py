@@ -0,0 +1,325 @@
+"""
+             _Table_eML of the eML system
+
+                 created on 10/19/2026
+    Copyright (c) 2026 Turtle Bay Geophysical LLC
+                ALL RIGHTS RESERVED.
+
+ Questions and comments can be directed to: Support@TurtleBayGeophysical.com
+
+  Licensed under the Attribution-NonCommercial-ShareAlike 4.0 International
+  (CC BY-NC-SA 4.0) (the "License"); you may not use this file except in
+  compliance with the License.
+
+  You may obtain a copy of the License at
+
+      https://creativecommons.org/licenses/by-nc-sa/4.0/
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+
+  A table holds record style data column-wise, one typed column per field. In a text eML file each
+  column is written on a single line:
+
+    stations := <table|3|2> <column|name|str>A1|A2
+                            <column|x|float64>1.5|2.5
+                            <column|surveyed|datetime>07/28/2024 16:13:20.604821|...
+
+  The table format holds the number of columns and the number of rows. Columns of bool and numeric
+  data types use the name of the numpy data type, str, datetime and date are used for the rest.
+"""
+from __future__ import annotations
+
+import copy
+import threading
+from datetime import date, datetime
+
+from _LazyNumpy_eML import np
+
+
+class _Table_eML:  # ============================================================== _Table_eML >>>
+  """
+  Columnar table of equal length numpy arrays. Columns read from a file are only decoded when they
+  are first accessed, so reading some of the columns of a table skips decoding the rest. The
+  decoding is guarded by a lock of the table, so threads reading the same table decode each column
+  once.
+  """
+
+  def __init__(self):  # -------------------------------------------------------------- __init__ >>
+    """
+
+    """
+    # column name -> decoded numpy array, None until an encoded column is accessed
+    self.columns = dict()
+
+    # column name -> function decoding a column that has not been accessed yet
+    self.decoders = dict()
+
+    self.nrows = 0
+
+    # guards decoding the columns, which replaces their decoders with the decoded arrays
+    self.lock = threading.Lock()
+    pass
+
+  @staticmethod
+  def fromData(columns_or_records):  # ------------------------------------------------ fromData >>
+    """
+    Creates a table from user supplied columns or records.
+
+    :param columns_or_records: dict of column name -> sequence of values, or a list of dicts
+                               sharing the same keys
+    :return: the table
+    """
+    if isinstance(columns_or_records, _Table_eML):
+      return copy.deepcopy(columns_or_records)
+
+    table = _Table_eML()
+    if isinstance(columns_or_records, dict):
+      for name, values in columns_or_records.items():
+        table.addColumn(name, values)
+      return table
+
+    records = list(columns_or_records)
+    if len(records) == 0:
+      return table
+    names = list(records[0].keys())
+    for record in records:
+      if record.keys() != records[0].keys():
+        raise Exception('eML table error: records do not share the same fields ' + str(names))
+    for name in names:
+      table.addColumn(name, [record[name] for record in records])
+    return table
+    pass
+
+  def addColumn(self, name: str, values):  # ----------------------------------------- addColumn >>
+    """
+    Adds a column of values to the table.
+
+    :param name: the column name
+    :param values: sequence or one dimensional numpy array of values sharing a data type
+    """
+    self._checkName(name)
+    if isinstance(values, np.ndarray):
+      column = values
+    else:
+      values = list(values)
+      datatypes = {type(value) for value in values}
+      if len(datatypes) > 1 and not datatypes <= {int, float}:
+        raise Exception('eML table error: column ' + name + ' mixes the data types '
+                        + str(sorted(datatype.__name__ for datatype in datatypes)))
+      if len(datatypes) == 1 and datatypes <= {datetime, date}:
+        column = np.empty(len(values), dtype=object)
+        column[:] = values
+      else:
+        column = np.asarray(values)
+
+    if column.ndim != 1:
+      raise Exception('eML table error: column ' + name + ' is not one dimensional')
+    getColumnType(column)
+    if len(self.columns) > 0 and len(column) != self.nrows:
+      raise Exception('eML table error: column ' + name + ' has ' + str(len(column))
+                      + ' rows, the table has ' + str(self.nrows))
+
+    self.nrows = len(column)
+    self.columns[name] = column
+    self.decoders.pop(name, None)
+    pass
+
+  def addEncodedColumn(self, name: str, nrows: int, decode):  # --------------- addEncodedColumn >>
+    """
+    Adds a column read from a file that is decoded when it is first accessed.
+
+    :param name: the column name
+    :param nrows: the number of rows of the column
+    :param decode: function returning the decoded numpy array
+    """
+    self.nrows = nrows
+    self.columns[name] = None
+    self.decoders[name] = decode
+    pass
+
+  def getColumn(self, name: str):  # ------------------------------------------------- getColumn >>
+    """
+    Gets a column, decoding it if it has not been accessed before.
+
+    :param name: the column name
+    :return: the column as a numpy array
+    """
+    if name not in self.columns:
+      raise Exception('eML table error: column ' + str(name) + ' does not exist')
+    if name in self.decoders:
+      with self.lock:
+        # another thread may have decoded the column whilst this one waited for the lock
+        decode = self.decoders.get(name)
+        if decode is not None:
+          self.columns[name] = decode()
+          del self.decoders[name]
+    return self.columns[name]
+    pass
+
+  def getColumnNames(self):  # -------------------------------------------------- getColumnNames >>
+    """
+    :return: list of the column names in the order they were added
+    """
+    return list(self.columns.keys())
+    pass
+
+  def getColumns(self, columns: list = None):  # ------------------------------------ getColumns >>
+    """
+    Gets several columns, only the requested columns are decoded.
+
+    :param columns: names of the columns, all of the columns if None
+    :return: dict of column name -> numpy array
+    """
+    if columns is None:
+      columns = self.getColumnNames()
+    return {name: self.getColumn(name) for name in columns}
+    pass
+
+  def _checkName(self, name):  # ---------------------------------------------------- _checkName >>
+    """
+    Checks that a column name can be written to the column format.
+
+    :param name: the column name
+    """
+    if not isinstance(name, str) or any(character in name for character in '<>|\n\r'):
+      raise Exception('eML table error: column name ' + repr(name)
+                      + ' must be a string without <, >, |, newlines or carriage returns')
+    pass
+
+  def __deepcopy__(self, memo):  # ------------------------------------------------ __deepcopy__ >>
+    """
+    Copies the decoded columns, the decoders of the columns not yet accessed are shared.
+
+    :param memo: deepcopy memo
+    :return: the copied table
+    """
+    table = _Table_eML()
+    with self.lock:
+      table.columns = {name: None if column is None else column.copy()
+                       for name, column in self.columns.items()}
+      table.decoders = dict(self.decoders)
+    table.nrows = self.nrows
+    return table
+    pass
+
+  def __eq__(self, other):  # ----------------------------------------------------------- __eq__ >>
+    """
+    :param other: the table being compared
+    :return: True if both tables hold the same columns in the same order with equal values
+    """
+    if not isinstance(other, _Table_eML):
+      return False
+    if self.getColumnNames() != other.getColumnNames() or self.nrows != other.nrows:
+      return False
+    for name in self.columns:
+      mine = self.getColumn(name)
+      theirs = other.getColumn(name)
+      if getColumnType(mine) != getColumnType(theirs) or not np.array_equal(mine, theirs):
+        return False
+    return True
+    pass
+
+  def __len__(self):  # ---------------------------------------------------------------- __len__ >>
+    """
+    :return: the number of rows of the table
+    """
+    return self.nrows
+    pass
+
+  def __repr__(self):  # -------------------------------------------------------------- __repr__ >>
+    """
+    :return: one line summary of the table
+    """
+    return '_Table_eML(' + str(self.nrows) + ' rows: ' + ', '.join(self.columns.keys()) + ')'
+    pass
+
+
+def getColumnType(column: np.ndarray):  # ---------------------------------------- getColumnType >>
+  """
+  Gets the type name written to the column format for a column.
+
+  :param column: the column
+  :return: numpy data type name for bool and numeric columns, otherwise str, datetime or date
+  """
+  if column.dtype.kind in 'biufc':
+    return column.dtype.name
+  if column.dtype.kind == 'U':
+    return 'str'
+  if column.dtype == object:
+    datatypes = {type(value) for value in column}
+    if datatypes <= {datetime}:
+      return 'datetime'
+    if datatypes <= {date}:
+      return 'date'
+  raise Exception('eML table error: columns of ' + str(column.dtype)
+                  + ' are not supported, use bool, numeric, str, datetime or date values')
+  pass
+
+
+def encodeTextColumn(column: np.ndarray):  # ---------------------------------- encodeTextColumn >>
+  """
+  Encodes a column for a text eML file.
+
+  :param column: the column
+  :return: the column type and the | separated values
+  """
+  columntype = getColumnType(column)
+  match columntype:
+    case 'str':
+      values = column.tolist()
+      for value in values:
+        if '|' in value or '\n' in value or '\r' in value:
+          raise Exception('eML table error: str column values can not hold | or newlines')
+      # the reader strips trailing whitespace from each line
+      if len(values) > 0 and values[-1] != values[-1].rstrip():
+        raise Exception('eML table error: the last value of a str column can not end in '
+                        'whitespace')
+    case 'datetime':
+      values = [value.strftime('%m/%d/%Y %H:%M:%S.%f') for value in column]
+    case 'date':
+      values = [value.strftime('%m/%d/%Y') for value in column]
+    case _:
+      values = map(str, column.tolist())
+  return columntype, '|'.join(values)
+  pass
+
+
+def decodeTextColumn(columntype: str, text: str, nrows: int):  # -------------- decodeTextColumn >>
+  """
+  Decodes a column of a text eML file.
+
+  :param columntype: the column type written to the column format
+  :param text: the | separated values
+  :param nrows: the number of rows of the column
+  :return: the column as a numpy array
+  """
+  match columntype:
+    case 'str':
+      if nrows == 0:
+        return np.zeros(0, dtype=str)
+      return np.array(text.split('|'), dtype=str)
+    case 'datetime':
+      column = np.empty(nrows, dtype=object)
+      if nrows > 0:
+        column[:] = [datetime.strptime(value, '%m/%d/%Y %H:%M:%S.%f') for value in text.split('|')]
+      return column
+    case 'date':
+      column = np.empty(nrows, dtype=object)
+      if nrows > 0:
+        column[:] = [datetime.strptime(value, '%m/%d/%Y').date() for value in text.split('|')]
+      return column
+
+  dtype = np.dtype(columntype)
+  if nrows == 0:
+    return np.zeros(0, dtype=dtype)
+  values = text.split('|')
+  if dtype.kind == 'b':
+    return np.array(values) == 'True'
+  if dtype.kind == 'c':
+    return np.array(list(map(complex, values)), dtype=dtype)
+  return np.array(values).astype(dtype)
+  pass
@@ -0,0 +1,177 @@
+"""
+             _Tokenize_eML of the eML system
+
+                 created on 10/19/2026
+    Copyright (c) 2026 Turtle Bay Geophysical LLC
+                ALL RIGHTS RESERVED.
+
+ Questions and comments can be directed to: Support@TurtleBayGeophysical.com
+
+  Licensed under the Attribution-NonCommercial-ShareAlike 4.0 International
+  (CC BY-NC-SA 4.0) (the "License"); you may not use this file except in
+  compliance with the License.
+
+  You may obtain a copy of the License at
+
+      https://creativecommons.org/licenses/by-nc-sa/4.0/
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+"""
+import re
+
+from _Stats_eML import _Stats_eML
+
+
+# top level entry, identifier := <format>value
+_ENTRY = re.compile(r'\s*(.*?)\s*:=\s*<([^>]*)>(.*)')
+
+# element of a container, <format>value
+_ELEMENT = re.compile(r'\s*<([^>]*)>(.*)')
+
+# head of a top level entry, identifier := <format>, the value is not scanned
+_HEAD = re.compile(r'\s*(.*?)\s*:=\s*<([^>]*)>')
+
+# entry of a dict, <key type>key|<value format>value
+_PAIR = re.compile(r'\s*<([^>]*)>([^|]*?)\s*\|\s*<([^>]*)>(.*)')
+
+
+class _Tokenize_eML:  # ========================================================= _Tokenize_eML >>>
+  """
+  Splits the lines of an eML file into tokens, the single front end of _Read_eML. Each line is
+  taken apart by one precompiled pattern in a single pass, and the lines are consumed through an
+  iterator so that they can also be produced whilst the file is being read.
+
+  The tokens are:
+    header:  ('header', fields) for the eML Header line
+    index:   ('index', fields) for the eML Index line following the entries
+    entry:   ('entry', identifier, format, value) for a top level identifier := <format>value line
+    element: (format, value) for an element of a container
+    pair:    (key type, key, value format, value) for an entry of a dict
+
+  where format is the list of the | separated fields between < and >, e.g. ['list', '3'] or
+  ['array', 'int', '(2, 3)'].
+  """
+
+  def __init__(self, lines, stats: _Stats_eML = None):  # ----------------------------- __init__ >>
+    """
+
+    :param lines: list or iterable of the lines of the eML file with their trailing whitespace
+                  removed
+    :param stats: optional statistics collected whilst loading, None disables the instrumentation
+    """
+    self.lines = iter(lines)
+
+    # number of lines tokenized so far
+    self.position = 0
+
+    if stats is not None:
+      self.nextEntry = stats.timed('tokenize', self.nextEntry)
+      self.nextElement = stats.timed('tokenize', self.nextElement)
+      self.nextPair = stats.timed('tokenize', self.nextPair)
+      self.splitElement = stats.timed('tokenize', self.splitElement)
+      self.splitPair = stats.timed('tokenize', self.splitPair)
+    pass
+
+  def nextElement(self):  # -------------------------------------------------------- nextElement >>
+    """
+    Tokenizes the next line as an element of a container.
+
+    :return: format, value
+    """
+    line = next(self.lines, None)
+    self.position += 1
+    if line is None:
+      raise Exception('Read_eML format error: element expected at line ' + str(self.position)
+                      + ' past the end of the file')
+    return self.splitElement(line)
+    pass
+
+  def nextEntry(self):  # ------------------------------------------------------------ nextEntry >>
+    """
+    Tokenizes the next top level line, lines that are neither the header nor an entry are skipped.
+
+    :return: a header, index or entry token, None once every line has been tokenized
+    """
+    for line in self.lines:
+      self.position += 1
+
+      if line.startswith('eML Header'):
+        return 'header', [field.strip() for field in line.split('|')]
+      if line.startswith('eML Index'):
+        return 'index', [field.strip() for field in line.split('|')]
+
+      match = _ENTRY.match(line)
+      if match is not None:
+        identifier, format, value = match.groups()
+        return 'entry', identifier, format.split('|'), value
+    return None
+    pass
+
+  def nextPair(self):  # -------------------------------------------------------------- nextPair >>
+    """
+    Tokenizes the next line as an entry of a dict.
+
+    :return: key type, key, value format, value
+    """
+    line = next(self.lines, None)
+    self.position += 1
+    if line is None:
+      raise Exception('Read_eML format error: dict entry expected at line ' + str(self.position)
+                      + ' past the end of the file')
+    return self.splitPair(line)
+    pass
+
+  def splitElement(self, text: str):  # ------------------------------------------- splitElement >>
+    """
+    Tokenizes an element of a container, either a line of its own or the remainder of the line
+    holding the header of the container.
+
+    :param text: <format>value
+    :return: format, value
+    """
+    match = _ELEMENT.match(text)
+    if match is None:
+      raise Exception('Read_eML format error: element expected at line ' + str(self.position)
+                      + ': ' + text)
+    return match.group(1).split('|'), match.group(2)
+    pass
+
+  def splitPair(self, text: str):  # ------------------------------------------------- splitPair >>
+    """
+    Tokenizes an entry of a dict, either a line of its own or the remainder of the line holding
+    the header of the dict.
+
+    :param text: <key type>key|<value format>value
+    :return: key type, key, value format, value
+    """
+    match = _PAIR.match(text)
+    if match is None:
+      raise Exception('Read_eML format error: dict entry expected at line ' + str(self.position)
+                      + ': ' + text)
+    keytype, key, valueformat, value = match.groups()
+    return keytype, key, valueformat.split('|'), value
+    pass
+
+
+def tokenizeHead(line: str):  # --------------------------------------------------- tokenizeHead >>
+  """
+  Tokenizes the head of a top level line without scanning its value, used to list the entries of
+  a file without decoding them.
+
+  :param line: a top level line, or its leading part for very long lines
+  :return: ('header', fields) for the eML Header line, ('entry', identifier, format) for an entry,
+           None otherwise
+  """
+  if line.startswith('eML Header'):
+    return 'header', [field.strip() for field in line.split('|')]
+
+  match = _HEAD.match(line)
+  if match is None:
+    return None
+  identifier, format = match.groups()
+  return 'entry', identifier, format.split('|')
+  pass
@@ -21,10 +21,26 @@
   See the License for the specific language governing permissions and
   limitations under the License.
 """
+from __future__ import annotations
+
+import base64
 import os
+import time
+import zlib
 from datetime import date, datetime
 
-import numpy as np
+from _Compress_eML import compressFile
+from _LazyNumpy_eML import np, isNumpyLoaded
+from _Index_eML import _WrittenStream, checksumRange, copyRange, encodeTextIndex, \
+  fingerprintValue
+from _Stats_eML import _Stats_eML
+from _Table_eML import _Table_eML, encodeTextColumn
+
+# marks the end of the elements of a container being appended
+_EXHAUSTED = object()
+
+# entries written directly to the file, their element counts are back-patched
+_STREAM_TYPES = {'list stream', 'dict stream'}
 
 
 class _Write_eML:  # ================================================================ Write_eML >>>v
@@ -38,13 +54,28 @@ class _Write_eML:  # ===========================================================
   """
 
   def __init__(self, eml_filename: str, eml_meta_data: dict,
-               identifiers: dict, eml_data: dict):
+               identifiers: dict, eml_data: dict, stats: _Stats_eML = None,
+               references: bool = False, source=None, source_entries: dict = None,
+               compact_layout: bool = False, compression: str = None):
     """
     converts the entries into the relative string equivalents and outputs the data to the eML file.
 
     :param eml_filename: the fully qualified eML filename
     :param eml_meta_data: the meta data of the eML file
     :param eml_data: the user specified data of the eML file
+    :param stats: optional statistics collected whilst saving, None disables the instrumentation
+    :param references: write repeated long strings and containers once and refer back to them
+                       afterwards with <ref>label
+    :param source: an existing text eML file opened in binary mode, the unchanged entries are
+                   copied from it
+    :param source_entries: index of the entries of source, identifier -> (offset, length,
+                           checksum, fingerprint). Entries whose fingerprint is unchanged are copied
+                           rather than encoded
+    :param compact_layout: start the lines following the first line of a container with a single
+                           blank rather than aligning them with its first element. The nesting is
+                           carried by the element counts, so both layouts are read the same way
+    :param compression: compress the file with gzip, lzma or bz2 as it is written, None writes it
+                        uncompressed. The offsets of the index are those of the uncompressed text
     """
     self.eml_filename = eml_filename
 
@@ -57,41 +88,45 @@ class _Write_eML:  # ===========================================================
 
     self.current_version = 0.10
 
+    # top level entry types that are not containers
+    self._primitive_entry_types = {'bool', 'int', 'float', 'complex', 'string', 'date', 'datetime'}
+
+    # width of the zero padded element count written for streamed containers. The count is
+    # back-patched once the stream has been exhausted so it must have a fixed width.
+    self.stream_count_width = 12
+
     self.linesout = list()
-    self.linesout.append('eML Header | ' + str(self.eml_meta_data['version']) + ' | '
-                         + self.eml_meta_data['lamguage'] + ' | '
-                         + self.eml_meta_data['creation date'].strftime(
-      '%m/%d/%Y %H:%M:%S.%f') + ' | '
-                         + self.eml_meta_data['last update'].strftime('%m/%d/%Y %H:%M:%S.%f'))
 
-    for id, entrytype in identifiers.items():
-      match entrytype:
-        case 'array':
-          self.setArray(id, self.eml_data[id])
-        case 'bool':
-          self.setBoolean(id, self.eml_data[id])
-        case 'int':
-          self.setInt(id, self.eml_data[id])
-        case 'float':
-          self.setFloat(id, self.eml_data[id])
-        case 'complex':
-          self.setComplex(id, self.eml_data[id])
-        case 'string':
-          self.setString(id, self.eml_data[id])
-        case 'date':
-          self.setDate(id, self.eml_data[id])
-        case 'datetime':
-          self.setDateTime(id, self.eml_data[id])
-        case 'dict':
-          self.setDict(id, self.eml_data[id])
-        case 'list':
-          self.setList(id, self.eml_data[id])
-        case 'set':
-          self.setSet(id, self.eml_data[id])
-        case 'tuple':
-          self.setTuple(id, self.eml_data[id])
-        case _:
-          raise Exception('Write error: invalid entry type ' + str(entrytype))
+    # back-references, labels maps the key of each value already written to its label and is None
+    # when back-references are disabled. Strings shorter than min_reference_length are cheaper to
+    # repeat than to reference.
+    self.labels = dict() if references else None
+    self.reference_counts = dict()
+    self.min_reference_length = 16
+
+    # blank prefixes aligning the elements of containers, length -> prefix. A compact layout
+    # prefixes every line following the first line of an entry with a single blank, which is all
+    # that marks it as a continuation line
+    self.compact_layout = compact_layout
+    self.paddings = dict()
+
+    self.compression = compression
+
+    # the file unchanged entries are copied from and the index of its entries
+    self.source = source
+    self.source_entries = source_entries if source_entries is not None else dict()
+
+    # index of the entries written, identifier -> (offset, length, checksum, fingerprint). The
+    # index is written on the last line of the file, see _Index_eML
+    self.entries = dict()
+
+    # bytes written to the file and the checksum of the bytes written for the current entry
+    self.position = 0
+    self.checksum = 0
+
+    self.stats = stats
+    if stats is not None:
+      self._instrument()
     pass
 
   def setArray(self, identifier, value: np.ndarray):  # ------------------------------- setArray >>
@@ -101,11 +136,23 @@ class _Write_eML:  # ===========================================================
     :param identifier: user defined identifier for this array
     :param value: the array to be output to a string
     """
+    if value.dtype.names is not None:
+      self._setRecordArray(identifier, value)
+      return
+
     datatype = self._getArrayDataType(value)
     currline = identifier + ' := ' + '<array|' + datatype + '|' + str(value.shape) + '> '
     bufferlength = len(currline)
 
     farray = value.flatten()
+    if datatype == 'str':
+      for item in farray:
+        if '|' in item or '\n' in item or '\r' in item:
+          raise Exception('Write eML error: str array elements can not hold | or newlines')
+      # the reader strips trailing whitespace from each line
+      if len(farray) > 0 and farray[-1] != farray[-1].rstrip():
+        raise Exception('Write eML error: the last element of a str array can not end in '
+                        'whitespace')
 
     isfirst = True
     for item in farray:
@@ -170,21 +217,47 @@ class _Write_eML:  # ===========================================================
     :param identifier: user specified string naming the dict for subsequent retrieval
     :param dictin: Input dict to be written to the eML file
     """
+    compact = self._getCompactPairs(dictin)
+    if compact is not None:
+      self.linesout.append(identifier + ' := <dict|' + str(len(dictin)) + '|' + compact[0] + '|'
+                           + compact[1] + '>' + compact[2])
+      return
+
     currline = identifier + ' := <dict|' + str(len(dictin)) + '>'
+    self._appendElements(currline, dictin.items(), True)
+    pass
+
+  def setDictStream(self, identifier, pairs, file):  # --------------------------- setDictStream >>
+    """
+    Writes the key/value pairs produced by an iterable directly to the open eML file. The number of
+    pairs is unknown until the iterable is exhausted, so a fixed width count is written first and
+    back-patched once all of the pairs have been written.
+
+    :param identifier: user specified string naming the dict for subsequent retrieval
+    :param pairs: iterable producing (key, value) tuples
+    :param file: the open eML file being written
+    """
+    currline = identifier + ' := <dict|'
+    count_offset = file.tell() + len(currline.encode('utf-8'))
+    currline = currline + '0' * self.stream_count_width + '>'
+    padding = self._getPadding(len(currline))
 
-    starting_line_length = len(currline)
-    for key, value in dictin.items():
-      # append the key/value data type if appropriate '
+    count = 0
+    for key, value in pairs:
       currline = currline + self._appendPrimitive(key) + '|'
 
-      if self._isPrimitive(value):
-        # the current value is a primative, append it to the current line
-        self.linesout.append(currline + self._appendPrimitive(value))
-      else:
-        self._appendContainer(currline, value)
+      self._appendElement(currline, value)
+      self._flush(file)
+
+      currline = padding
+      count += 1
 
-      currline = ' ' * starting_line_length
-      pass
+    if count == 0:
+      self.linesout.append(currline)
+      self._flush(file)
+
+    self._patchStreamCount(file, count_offset, count)
+    pass
 
   def setFloat(self, identifier, value):  # -------------------------------- setFloat >>
     """
@@ -203,16 +276,14 @@ class _Write_eML:  # ===========================================================
     :param identifier: identifier for this frozenset value
     :param value:  value to be written to the eml file
     """
-    currline = identifier + ' := ' + '<frozenset|' + str(len(value)) + '> '
-    bufferlength = len(currline)
-
-    for item in value:
-      if self._isPrimitive(item):
-        self.linesout.append(currline + self._appendPrimitive(item))
-      else:
-        self._appendContainer(currline, item)
+    compact = self._getCompactValues(value)
+    if compact is not None:
+      self.linesout.append(identifier + ' := ' + '<frozenset|' + str(len(value)) + '|' + compact[0]
+                           + '>' + compact[1])
+      return
 
-      currline = ' ' * bufferlength
+    currline = identifier + ' := ' + '<frozenset|' + str(len(value)) + '> '
+    self._appendElements(currline, value)
     pass
 
   def setInt(self, identifier, value):  # -------------------------------- setInt >>
@@ -232,16 +303,44 @@ class _Write_eML:  # ===========================================================
     :param identifier: user defined identifier for this set
     :param value: the list to be output to a string
     """
+    compact = self._getCompactValues(value)
+    if compact is not None:
+      self.linesout.append(identifier + ' := ' + '<list|' + str(len(value)) + '|' + compact[0]
+                           + '>' + compact[1])
+      return
+
     currline = identifier + ' := ' + '<list|' + str(len(value)) + '> '
-    bufferlength = len(currline)
+    self._appendElements(currline, value)
+    pass
 
-    for item in value:
-      if self._isPrimitive(item):
-        self.linesout.append(currline + self._appendPrimitive(item))
-      else:
-        self._appendContainer(currline, item)
+  def setListStream(self, identifier, iterable, file):  # ------------------------ setListStream >>
+    """
+    Writes the elements produced by an iterable directly to the open eML file. The number of
+    elements is unknown until the iterable is exhausted, so a fixed width count is written first
+    and back-patched once all of the elements have been written.
+
+    :param identifier: user defined identifier for this list
+    :param iterable: iterable producing the elements of the list
+    :param file: the open eML file being written
+    """
+    currline = identifier + ' := ' + '<list|'
+    count_offset = file.tell() + len(currline.encode('utf-8'))
+    currline = currline + '0' * self.stream_count_width + '> '
+    padding = self._getPadding(len(currline))
+
+    count = 0
+    for item in iterable:
+      self._appendElement(currline, item)
+      self._flush(file)
 
-      currline = ' ' * bufferlength
+      currline = padding
+      count += 1
+
+    if count == 0:
+      self.linesout.append(currline)
+      self._flush(file)
+
+    self._patchStreamCount(file, count_offset, count)
     pass
 
   def setSet(self, identifier, value: set):  # ------------------------------------------ setSet >>
@@ -251,16 +350,15 @@ class _Write_eML:  # ===========================================================
     :param identifier: user defined identifier for this set
     :param value: the set to be output to a string
     """
-    currline = identifier + ' := ' + '<set|' + str(len(value)) + '> '
+    compact = self._getCompactValues(value)
+    if compact is not None:
+      self.linesout.append(identifier + ' := ' + '<set|' + str(len(value)) + '|' + compact[0]
+                           + '>' + compact[1])
+      return
 
-    for item in value:
-      if self._isPrimitive(item):
-        self.linesout.append(currline + self._appendPrimitive(item))
-      else:
-        self._appendContainer(currline, item)
-
-      currline = ' ' * len(currline)
-      pass
+    currline = identifier + ' := ' + '<set|' + str(len(value)) + '> '
+    self._appendElements(currline, value)
+    pass
 
   def setString(self, identifier, value):  # -------------------------------- setString >>
     """
@@ -272,6 +370,27 @@ class _Write_eML:  # ===========================================================
     self.linesout.append(identifier + ' := ' + self._appendPrimitive(value))
     pass
 
+  def setTable(self, identifier, value: _Table_eML):  # ------------------------------- setTable >>
+    """
+    Converts a table to string for output to linesout, one line per column.
+
+    :param identifier: user defined identifier for this table
+    :param value: the table to be output to a string
+    """
+    names = value.getColumnNames()
+    currline = identifier + ' := ' + '<table|' + str(len(names)) + '|' + str(len(value)) + '> '
+    bufferlength = len(currline)
+
+    if len(names) == 0:
+      self.linesout.append(currline)
+
+    for name in names:
+      columntype, text = encodeTextColumn(value.getColumn(name))
+      self.linesout.append(currline + '<column|' + name + '|' + columntype + '>' + text)
+
+      currline = self._getPadding(bufferlength)
+    pass
+
   def setTuple(self, identifier, value: tuple):  # ------------------------------------ setTuple >>
     """
     Converts a tuple to string for output to linesout.
@@ -279,25 +398,22 @@ class _Write_eML:  # ===========================================================
     :param identifier: user defined identifier for this tuple
     :param value: the tuple to be output to a string
     """
-    currline = identifier + ' := ' + '<tuple|' + str(len(value)) + '> '
-
-    for item in value:
-      if self._isPrimitive(item):
-        self.linesout.append(currline + self._appendPrimitive(item))
-      else:
-        self._appendContainer(currline, item)
+    compact = self._getCompactValues(value)
+    if compact is not None:
+      self.linesout.append(identifier + ' := ' + '<tuple|' + str(len(value)) + '|' + compact[0]
+                           + '>' + compact[1])
+      return
 
-      currline = ' ' * len(currline)
-      pass
+    currline = identifier + ' := ' + '<tuple|' + str(len(value)) + '> '
+    self._appendElements(currline, value)
+    pass
 
   def save(self):  # -------------------------------------------------------------------- save >>
     """
     saves the generated eml string to the file specified and closes the file
     """
-    file = open(self.eml_filename, 'w')
-    for nextline in self.linesout:
-      file.write(nextline + "\n")
-    file.close()
+    with open(self.eml_filename, 'wb') as file, compressFile(file, self.compression) as written:
+      self._writeEntries(written)
     pass
 
   def saveAs(self):  # ------------------------------------------------------------------ saveAs >>
@@ -307,51 +423,113 @@ class _Write_eML:  # ===========================================================
     if os.path.exists(self.eml_filename):
       raise Exception('eML save error: eml filename specified already exists, use saveAs instead')
 
-    file = open(self.eml_filename, 'w')
-    for nextline in self.linesout:
-      file.write(nextline + "\n")
-    file.close()
+    with open(self.eml_filename, 'wb') as file, compressFile(file, self.compression) as written:
+      self._writeEntries(written)
     pass
 
-  def _appendContainer(self, currline, value):  # ----------------------------- _appendContainer >>
+  def _appendContainer(self, currline, value, label: str = ''):  # ------------ _appendContainer >>
     """
     The input currline already has the key info assigned to it. Just need to append the new value.
     In this case the value is another container.
 
     :param currline: current line of text being created
     :param value: a container to be appended to the text file
-    :return:
+    :param label: back-reference label of the container, empty if it is not referenced
+    :return: the line holding the header of the container when its elements still need to be
+             appended, None if the container was written on a single line
     """
     if isinstance(value, list):
-      self._appendList2Existing(currline, value)
+      return self._appendList2Existing(currline, value, label)
     elif isinstance(value, set):
-      self._appendSet2Existing(currline, value)
+      return self._appendSet2Existing(currline, value, label)
     elif isinstance(value, dict):
-      self._appendDict2Existing(currline, value)
+      return self._appendDict2Existing(currline, value, label)
     elif isinstance(value, tuple):
-      self._appendTuple2Existing(currline, value)
+      return self._appendTuple2Existing(currline, value, label)
     elif isinstance(value, frozenset):
-      self._appendFrozenSet2Existing(currline, value)
+      return self._appendFrozenSet2Existing(currline, value, label)
     pass
 
-  def _appendDict2Existing(self, currline: str, value: dict):  # --------- _appendDict2Existing >>
+  def _appendElement(self, currline: str, value):  # ---------------------------- _appendElement >>
     """
-    Appends a dict to an existing container element.
+    Appends an element of a container, or the value of a dict entry, to the current line along
+    with every container nested within it.
 
     :param currline: the current line being constructed for output
-    :param value: the input list to be decomposed to strings
+    :param value: the element to be appended
     """
-    currline = currline + '<dict |' + str(len(value)) + '>'
-    starting_currline_length = len(currline)
+    self._appendElements(currline, (value,))
+    pass
 
-    for key, value in value.items():
-      currline = currline + self._appendPrimitive(key) + '|'
+  def _appendElements(self, currline: str, elements,  # ------------------------ _appendElements >>
+                      isdict: bool = False):
+    """
+    Appends the elements of a container one per line, the first element following the header of
+    the container on currline. The containers being appended are held on an explicit stack rather
+    than by recursion, so there is no limit on the nesting depth.
 
-      if self._isPrimitive(value):
-        self.linesout.append(currline + self._appendPrimitive(value))
-      else:
-        self._appendContainer(currline, value)
-      currline = ' ' * starting_currline_length
+    :param currline: the line holding the header of the container
+    :param elements: the elements of the container, or the (key, value) pairs of a dict
+    :param isdict: True if elements holds the (key, value) pairs of a dict
+    """
+    # each frame holds the line the next element is appended to, an iterator over the elements,
+    # whether they are dict pairs, whether any element has been appended yet and the id of the
+    # nested container
+    stack = [[currline, iter(elements), isdict, False, None]]
+    # ids of the nested containers being appended, a container holding itself would never end
+    open_ids = set()
+    while len(stack) > 0:
+      frame = stack[-1]
+      element = next(frame[1], _EXHAUSTED)
+      if element is _EXHAUSTED:
+        stack.pop()
+        open_ids.discard(frame[4])
+        if not frame[3]:
+          # empty containers keep their header line
+          self.linesout.append(frame[0])
+        if len(stack) > 0 and self.stats is not None:
+          self.stats.exitContainer()
+        continue
+
+      currline = frame[0]
+      if not frame[3]:
+        # the elements following the first are aligned with it
+        frame[0] = self._getPadding(len(currline))
+        frame[3] = True
+
+      if frame[2]:
+        key, element = element
+        currline = currline + self._appendPrimitive(key) + '|'
+
+      if id(element) in open_ids:
+        raise Exception('eML error: a ' + type(element).__name__
+                        + ' contains itself and can not be written')
+      header = self._appendValue(currline, element)
+      if header is not None:
+        open_ids.add(id(element))
+        if isinstance(element, dict):
+          stack.append([header, iter(element.items()), True, False, id(element)])
+        else:
+          stack.append([header, iter(element), False, False, id(element)])
+    pass
+
+  def _appendDict2Existing(self, currline: str, value: dict,  # ----------- _appendDict2Existing >>
+                           label: str = ''):
+    """
+    Appends the header of a dict to an existing container element.
+
+    :param currline: the current line being constructed for output
+    :param value: the input list to be decomposed to strings
+    :param label: back-reference label of the container, empty if it is not referenced
+    :return: the line holding the header, None if the container was written on a single line
+    """
+    compact = self._getCompactPairs(value)
+    if compact is not None:
+      self.linesout.append(currline + '<dict' + label + ' |' + str(len(value)) + '|' + compact[0]
+                           + '|' + compact[1] + '>' + compact[2])
+      return None
+
+    return currline + '<dict' + label + ' |' + str(len(value)) + '>'
     pass
 
   def _appendDictKey(self, key):  # ---------------------------- _appendDictKey >>
@@ -386,40 +564,42 @@ class _Write_eML:  # ===========================================================
     return lineout
     pass
 
-  def _appendFrozenSet2Existing(self, currline: str, value):  # ------ _appendFrozenSet2Existing >>
+  def _appendFrozenSet2Existing(self, currline: str, value,  # ------- _appendFrozenSet2Existing >>
+                                label: str = ''):
     """
-    Appends a frozenset to an existing container element.
+    Appends the header of a frozenset to an existing container element.
 
     :param currline: the current line being constructed for output
     :param value: the input frozenset to be decomposed to strings
+    :param label: back-reference label of the container, empty if it is not referenced
+    :return: the line holding the header, None if the container was written on a single line
     """
-    currline = currline + '<frozenset |' + str(len(value)) + '>'
-    bufferlength = len(currline)
+    compact = self._getCompactValues(value)
+    if compact is not None:
+      self.linesout.append(currline + '<frozenset' + label + ' |' + str(len(value)) + '|'
+                           + compact[0] + '>' + compact[1])
+      return None
 
-    for item in value:
-      if self._isPrimitive(item):
-        self.linesout.append(currline + self._appendPrimitive(item))
-      else:
-        self._appendContainer(currline, item)
-      currline = ' ' * bufferlength
+    return currline + '<frozenset' + label + ' |' + str(len(value)) + '>'
     pass
 
-  def _appendList2Existing(self, currline: str, value):  # ---------- _appendList2Existing >>
+  def _appendList2Existing(self, currline: str, value,  # ----------------- _appendList2Existing >>
+                           label: str = ''):
     """
-    Appends a list to an existing container element.
+    Appends the header of a list to an existing container element.
 
     :param currline: the current line being constructed for output
     :param value: the input list to be decomposed to strings
+    :param label: back-reference label of the container, empty if it is not referenced
+    :return: the line holding the header, None if the container was written on a single line
     """
-    currline = currline + '<list |' + str(len(value)) + '>'
-    bufferlength = len(currline)
+    compact = self._getCompactValues(value)
+    if compact is not None:
+      self.linesout.append(currline + '<list' + label + ' |' + str(len(value)) + '|' + compact[0]
+                           + '>' + compact[1])
+      return None
 
-    for item in value:
-      if self._isPrimitive(item):
-        self.linesout.append(currline + self._appendPrimitive(item))
-      else:
-        self._appendContainer(currline, item)
-      currline = ' ' * bufferlength
+    return currline + '<list' + label + ' |' + str(len(value)) + '>'
     pass
 
   def _appendPrimitive(self, value):  # --------------------------------------- _appendPrimitive >>
@@ -449,43 +629,242 @@ class _Write_eML:  # ===========================================================
                         + ' is not currently supported')
     pass
 
-  def _appendSet2Existing(self, currline: str, value: set):  # ------------- _appendSet2Existing >>
+  def _appendSet2Existing(self, currline: str, value: set,  # -------------- _appendSet2Existing >>
+                          label: str = ''):
     """
-    Appends a set to an existing container element.
+    Appends the header of a set to an existing container element.
 
     :param currline: the current line being constructed for output
     :param value: the input list to be decomposed to strings
+    :param label: back-reference label of the container, empty if it is not referenced
+    :return: the line holding the header, None if the container was written on a single line
     """
-    currline = currline + '<set |' + str(len(value)) + '>'
-    bufferlength = len(currline)
+    compact = self._getCompactValues(value)
+    if compact is not None:
+      self.linesout.append(currline + '<set' + label + ' |' + str(len(value)) + '|' + compact[0]
+                           + '>' + compact[1])
+      return None
 
-    isfirst = True
-    for item in value:
-      if self._isPrimitive(item):
-        self.linesout.append(currline + self._appendPrimitive(item))
-      else:
-        self._appendContainer(currline, item)
-
-      currline = ' ' * bufferlength
+    return currline + '<set' + label + ' |' + str(len(value)) + '>'
     pass
 
-  def _appendTuple2Existing(self, currline: str, value: tuple):  # ------- _appendTuple2Existing >>
+  def _appendTuple2Existing(self, currline: str, value: tuple,  # -------- _appendTuple2Existing >>
+                            label: str = ''):
     """
-    Appends a tuple to an existing container element.
+    Appends the header of a tuple to an existing container element.
 
     :param currline: the current line being constructed for output
     :param value: the input list to be decomposed to strings
+    :param label: back-reference label of the container, empty if it is not referenced
+    :return: the line holding the header, None if the container was written on a single line
     """
-    currline = currline + '<tuple |' + str(len(value)) + '>'
-    bufferlength = len(currline)
+    compact = self._getCompactValues(value)
+    if compact is not None:
+      self.linesout.append(currline + '<tuple' + label + ' |' + str(len(value)) + '|' + compact[0]
+                           + '>' + compact[1])
+      return None
+
+    return currline + '<tuple' + label + ' |' + str(len(value)) + '>'
+    pass
 
-    for item in value:
-      if self._isPrimitive(item):
-        self.linesout.append(currline + self._appendPrimitive(item))
+  def _appendValue(self, currline: str, value):  # -------------------------------- _appendValue >>
+    """
+    Appends an element of a container, or the value of a dict entry, to the current line. Nested
+    containers only have their header appended, their elements are appended by _appendElements.
+    When back-references are enabled a value that has already been written is replaced by a reference
+    to its label, and the first occurrence of a repeated value is labelled.
+
+    :param currline: the current line being constructed for output
+    :param value: the element to be appended
+    :return: the line holding the header of a nested container whose elements still need to be
+             appended, None otherwise
+    """
+    label = ''
+    if self.labels is not None:
+      key = self._getReferenceKey(value)
+      if key is not None:
+        if key in self.labels:
+          self.linesout.append(currline + '<ref>' + str(self.labels[key]))
+          return None
+        if self.reference_counts.get(key, 0) > 1:
+          self.labels[key] = len(self.labels) + 1
+          label = '&' + str(self.labels[key])
+
+    if self._isPrimitive(value):
+      if len(label) > 0:
+        self.linesout.append(currline + '<str' + label + '>' + value)
       else:
-        self._appendContainer(currline, item)
+        self.linesout.append(currline + self._appendPrimitive(value))
+      return None
+    return self._appendContainer(currline, value, label)
+    pass
+
+  def _encodeEntry(self, id, entrytype: str, file):  # ---------------------------- _encodeEntry >>
+    """
+    Converts a single top level entry to its string equivalent.
+
+    :param id: the user specified identifier
+    :param entrytype: the entry type recorded for the identifier
+    :param file: the open eML file, streamed entries are written directly to it
+    """
+    match entrytype:
+      case 'array':
+        self.setArray(id, self.eml_data[id])
+      case 'bool':
+        self.setBoolean(id, self.eml_data[id])
+      case 'int':
+        self.setInt(id, self.eml_data[id])
+      case 'float':
+        self.setFloat(id, self.eml_data[id])
+      case 'complex':
+        self.setComplex(id, self.eml_data[id])
+      case 'string':
+        self.setString(id, self.eml_data[id])
+      case 'date':
+        self.setDate(id, self.eml_data[id])
+      case 'datetime':
+        self.setDateTime(id, self.eml_data[id])
+      case 'dict':
+        self.setDict(id, self.eml_data[id])
+      case 'dict stream':
+        self.setDictStream(id, self.eml_data[id], file)
+      case 'frozen set':
+        self.setFrozenSet(id, self.eml_data[id])
+      case 'list':
+        self.setList(id, self.eml_data[id])
+      case 'list stream':
+        self.setListStream(id, self.eml_data[id], file)
+      case 'set':
+        self.setSet(id, self.eml_data[id])
+      case 'table':
+        self.setTable(id, self.eml_data[id])
+      case 'tuple':
+        self.setTuple(id, self.eml_data[id])
+      case _:
+        raise Exception('Write error: invalid entry type ' + str(entrytype))
+    pass
+
+  def _countReferences(self):  # ---------------------------------------------- _countReferences >>
+    """
+    Counts how many times each value that can be back-referenced appears within the top level
+    containers. The contents of a container are only counted the first time it is seen since they
+    are only written once.
+    """
+    self.reference_counts = dict()
+    stack = list()
+    for id, entrytype in self.identifiers.items():
+      value = self.eml_data[id]
+      if isinstance(value, dict):
+        stack.extend(value.values())
+      elif isinstance(value, (list, set, tuple, frozenset)):
+        stack.extend(value)
+
+    while len(stack) > 0:
+      value = stack.pop()
+      key = self._getReferenceKey(value)
+      if key is None:
+        continue
+      count = self.reference_counts.get(key, 0) + 1
+      self.reference_counts[key] = count
+      if count == 1:
+        if isinstance(value, dict):
+          stack.extend(value.values())
+        elif not isinstance(value, str):
+          stack.extend(value)
+    pass
+
+  def _flush(self, file):  # ------------------------------------------------------------ _flush >>
+    """
+    Writes all of the pending lines to the open eML file and clears them.
+
+    :param file: the open eML file being written
+    """
+    if len(self.linesout) == 0:
+      return
+    data = ('\n'.join(self.linesout) + '\n').encode('utf-8')
+    file.write(data)
+    self.position += len(data)
+    self.checksum = zlib.crc32(data, self.checksum)
+    self.linesout.clear()
+    pass
+
+  def _encodeCompact(self, value):  # ------------------------------------------- _encodeCompact >>
+    """
+    Converts the elements of a container to strings when they all share one primitive type.
 
-      currline = ' ' * bufferlength
+    :param value: the elements
+    :return: (element type, list of element strings), None if the elements can not be compacted
+    """
+    if len(value) == 0:
+      return None
+    datatypes = set(map(type, value))
+    if len(datatypes) != 1:
+      return None
+
+    match datatypes.pop().__name__:
+      case 'bool':
+        elementtype, strvalues = 'bool', list(map(str, value))
+      case 'int':
+        elementtype, strvalues = 'int', list(map(str, value))
+      case 'float':
+        elementtype, strvalues = 'float', list(map(str, value))
+      case 'complex':
+        elementtype, strvalues = 'complex', list(map(str, value))
+      case 'str':
+        # | separates the elements, and the reader strips trailing whitespace from each line
+        strvalues = list(value)
+        if any('|' in item or '\n' in item or '\r' in item for item in strvalues) \
+                or strvalues[-1] != strvalues[-1].rstrip():
+          return None
+        elementtype = 'str'
+      case 'datetime':
+        elementtype = 'datetime'
+        strvalues = [item.strftime('%m/%d/%Y %H:%M:%S.%f') for item in value]
+      case 'date':
+        elementtype = 'date'
+        strvalues = [item.strftime('%m/%d/%Y') for item in value]
+      case _:
+        return None
+
+    if self.stats is not None:
+      self.stats.countEntry(elementtype, len(strvalues))
+    return elementtype, strvalues
+    pass
+
+  def _getCompactPairs(self, value: dict):  # --------------------------------- _getCompactPairs >>
+    """
+    Encodes the pairs of a dict on a single line when all of its keys share one primitive type and
+    all of its values share one primitive type, e.g. <dict|2|str|float>a|1.5|b|2.5.
+
+    :param value: the dict
+    :return: (key type, value type, | separated key value pairs), None if the dict can not be
+             compacted
+    """
+    keys = self._encodeCompact(list(value.keys()))
+    if keys is None:
+      return None
+    values = self._encodeCompact(list(value.values()))
+    if values is None:
+      return None
+
+    strpairs = [None] * (2 * len(value))
+    strpairs[0::2] = keys[1]
+    strpairs[1::2] = values[1]
+    return keys[0], values[0], '|'.join(strpairs)
+    pass
+
+  def _getCompactValues(self, value):  # ------------------------------------- _getCompactValues >>
+    """
+    Encodes the elements of a list, set, tuple or frozenset on a single line when they all share
+    one primitive type, e.g. <list|3|int>1|2|3.
+
+    :param value: the container
+    :return: (element type, | separated elements), None if the container can not be compacted
+    """
+    compact = self._encodeCompact(value)
+    if compact is None:
+      return None
+    return compact[0], '|'.join(compact[1])
     pass
 
   def _getDataType(self, value):  # --------------------------------------------- _getDataType >>
@@ -520,6 +899,41 @@ class _Write_eML:  # ===========================================================
       raise Exception('Write eML error: Invalid primitive data type ' + str(type(value)))
     pass
 
+  def _getReferenceKey(self, value):  # --------------------------------------- _getReferenceKey >>
+    """
+    Gets the key identifying a value that can be back-referenced. Strings are shared by value once
+    they are at least min_reference_length long, containers are shared when the same object appears
+    more than once so that loading the file does not alias containers that were distinct.
+
+    :param value: an element of a container
+    :return: the key of the value, None if the value is never referenced
+    """
+    if isinstance(value, str):
+      if len(value) >= self.min_reference_length:
+        return value
+      return None
+    if isinstance(value, (list, dict, set, tuple, frozenset)):
+      return id(value)
+    return None
+    pass
+
+  def _getPadding(self, length: int):  # ------------------------------------------- _getPadding >>
+    """
+    Gets the blank prefix aligning the elements of a container with its first element. The
+    prefixes are shared by every container at the same offset.
+
+    :param length: number of blanks
+    :return: string of length blanks, a single blank for the compact layout
+    """
+    if self.compact_layout:
+      return ' '
+    padding = self.paddings.get(length)
+    if padding is None:
+      padding = ' ' * length
+      self.paddings[length] = padding
+    return padding
+    pass
+
   def _getPrimitiveDataType(self, value):  # ----------------------------- _getPrimitiveDataType >>
     """
     returns the primitive data associated with the inpuy value. Valid python values are:
@@ -543,6 +957,8 @@ class _Write_eML:  # ===========================================================
       return 'datetime'
     elif isinstance(value, date):
       return 'date'
+    elif not isNumpyLoaded():
+      raise Exception('Write eML error: Invalid primitive data type ' + str(type(value)))
     elif isinstance(value, np.bool_):
       return 'bool'
     elif isinstance(value, np.int8):
@@ -595,6 +1011,39 @@ class _Write_eML:  # ===========================================================
       raise Exception('Write eML error: Invalid primitive data type ' + str(type(value)))
     pass
 
+  def _instrument(self):  # -------------------------------------------------------- _instrument >>
+    """
+    Wraps the encoding and writing methods of this instance so that they are timed and counted by
+    self.stats. This is only called when instrumentation has been requested.
+    """
+    stats = self.stats
+    append_primitive = self._appendPrimitive
+    append_container = self._appendContainer
+    flush = self._flush
+
+    def countedAppendPrimitive(value):
+      stats.countEntry(self._getPrimitiveDataType(value))
+      return append_primitive(value)
+
+    def countedAppendContainer(currline, value, label=''):
+      stats.countEntry(type(value).__name__)
+      stats.enterContainer()
+      header = append_container(currline, value, label)
+      if header is None:
+        # containers with elements still to be appended are exited by _appendElements
+        stats.exitContainer()
+      return header
+
+    def countedFlush(file):
+      stats.count('lines', len(self.linesout))
+      return flush(file)
+
+    self._appendPrimitive = countedAppendPrimitive
+    self._appendContainer = countedAppendContainer
+    self._encodeEntry = stats.timed('encode', self._encodeEntry)
+    self._flush = stats.timed('write', countedFlush)
+    pass
+
   def _isPrimitive(self, value):  # ----------------------------------------------- _isPrimitive >>
     """
     Determines if the input value is a primitie data type.
@@ -617,6 +1066,8 @@ class _Write_eML:  # ===========================================================
       return True
     elif isinstance(value, date):
       return True
+    elif not isNumpyLoaded():
+      return False
     elif isinstance(value, np.bool_):
       return True
     elif isinstance(value, np.int8):
@@ -684,3 +1135,166 @@ class _Write_eML:  # ===========================================================
 
     return str(dt)
     pass
+
+  def _patchStreamCount(self, file, count_offset, count):  # ----------------- _patchStreamCount >>
+    """
+    Overwrites the zero padded element count of a streamed container once it is known.
+
+    :param file: the open eML file being written
+    :param count_offset: file position of the first digit of the element count
+    :param count: the number of elements written
+    """
+    countstr = str(count)
+    if len(countstr) > self.stream_count_width:
+      raise Exception('Write eML error: streamed container has too many elements ' + countstr)
+
+    end_offset = file.tell()
+    file.seek(count_offset)
+    file.write(countstr.zfill(self.stream_count_width).encode('utf-8'))
+    file.seek(end_offset)
+    pass
+
+  def _getRecordLayout(self, dtype: np.dtype):  # ----------------------------- _getRecordLayout >>
+    """
+    Gets the field layout of a structured data type written to the array format, e.g.
+    id:i4,x:f8,name:U8,offsets:f4[3x2]. Fields are written little endian without padding.
+
+    :param dtype: the structured data type
+    :return: the field layout and the packed little endian data type matching it
+    """
+    layout = list()
+    fields = list()
+    for name in dtype.names:
+      fielddtype = dtype.fields[name][0]
+      base = fielddtype.base
+      if base.names is not None or base.kind not in 'biufcUS':
+        raise Exception('Write eML error: structured array field ' + name + ' of type '
+                        + str(fielddtype) + ' is not supported')
+      if any(character in name for character in ':,|<>[]\n') or len(name) == 0:
+        raise Exception('Write eML error: structured array field name ' + repr(name)
+                        + ' can not hold : , | < > [ ] or newlines')
+
+      base = base.newbyteorder('<')
+      spec = name + ':' + base.str[1:]
+      if len(fielddtype.shape) > 0:
+        spec += '[' + 'x'.join(str(dim) for dim in fielddtype.shape) + ']'
+      layout.append(spec)
+      fields.append((name, base, fielddtype.shape))
+
+    return ','.join(layout), np.dtype(fields)
+    pass
+
+  def _setRecordArray(self, identifier, value: np.ndarray):  # ----------------- _setRecordArray >>
+    """
+    Converts a structured array to string for output to linesout. The field layout is written to
+    the array format and the data is written in bulk as base64 of the packed little endian records.
+
+    :param identifier: user defined identifier for this array
+    :param value: the structured array to be output to a string
+    """
+    layout, packed = self._getRecordLayout(value.dtype)
+    data = np.ascontiguousarray(value.astype(packed)).tobytes()
+    self.linesout.append(identifier + ' := ' + '<array|record|' + str(value.shape) + '|' + layout
+                         + '> ' + base64.b64encode(data).decode('ascii'))
+    pass
+
+  def _writeEntries(self, file):  # ---------------------------------------------- _writeEntries >>
+    """
+    Converts each of the entries to its string equivalent and writes it to the open file. The lines
+    of each entry are flushed to the file as soon as the entry has been converted.
+
+    :param file: the open eML file being written
+    """
+    self.linesout.append('eML Header | ' + str(self.eml_meta_data['version']) + ' | '
+                         + self.eml_meta_data['lamguage'] + ' | '
+                         + self.eml_meta_data['creation date'].strftime(
+      '%m/%d/%Y %H:%M:%S.%f') + ' | '
+                         + self.eml_meta_data['last update'].strftime('%m/%d/%Y %H:%M:%S.%f'))
+    self._flush(file)
+
+    if self.labels is not None:
+      self._countReferences()
+
+    source = self.source if len(self.source_entries) > 0 else None
+    stats = self.stats
+    for id, entrytype in self.identifiers.items():
+      if stats is None:
+        self._writeEntry(id, entrytype, file, source)
+      else:
+        start = time.perf_counter()
+        iscontainer = entrytype not in self._primitive_entry_types
+        if iscontainer:
+          stats.countEntry(entrytype)
+          stats.enterContainer()
+        self._writeEntry(id, entrytype, file, source)
+        if iscontainer:
+          stats.exitContainer()
+        stats.timeIdentifier(id, time.perf_counter() - start)
+
+    self.linesout.append(encodeTextIndex(list(self.entries.values()), self.labels is not None,
+                                         self.compact_layout))
+    self._flush(file)
+
+    if stats is not None:
+      stats.count('bytes', file.tell())
+    pass
+
+  def _writeEntry(self, id, entrytype: str, file, source):  # ---------------------- _writeEntry >>
+    """
+    Writes a single top level entry and adds it to the index. An entry whose fingerprint matches
+    the fingerprint stored for it in the source file is copied from the source file rather than
+    encoded.
+
+    :param id: the user specified identifier
+    :param entrytype: the entry type recorded for the identifier
+    :param file: the open eML file being written
+    :param source: the source file opened for reading, None if there is no source file
+    """
+    offset = self.position
+    self.checksum = 0
+
+    if isinstance(self.eml_data[id], _WrittenStream):
+      # a stream consumed by an earlier save can only be copied from the file it was saved to
+      stored = self.source_entries.get(id)
+      if stored is None:
+        raise Exception(self.eml_data[id].getSaveError(id))
+      copyRange(source, file, stored[0], stored[1])
+      self.position += stored[1]
+      self.entries[id] = (offset, stored[1], stored[2], None)
+      return
+
+    # entries written with back-references refer to the labels of other entries, so they are
+    # neither copied nor given a fingerprint. Primitives are cheaper to encode than to fingerprint
+    fingerprint = None
+    if self.labels is None and entrytype not in self._primitive_entry_types:
+      fingerprint = fingerprintValue(entrytype, self.eml_data[id])
+      stored = self.source_entries.get(id)
+      if fingerprint is not None and stored is not None and stored[3] == fingerprint:
+        copyRange(source, file, stored[0], stored[1])
+        self.position += stored[1]
+        self.entries[id] = (offset, stored[1], stored[2], fingerprint)
+        if self.stats is not None:
+          self.stats.count('reused entries')
+        return
+
+    if entrytype in _STREAM_TYPES and self.compression is not None:
+      # a compressed file can not seek back to the element count of a stream, so the stream is
+      # spooled to a temporary file and copied once its element count has been back-patched
+      import tempfile
+
+      with tempfile.TemporaryFile() as spool:
+        self._encodeEntry(id, entrytype, spool)
+        self._flush(spool)
+        self.checksum = checksumRange(spool, 0, self.position - offset)
+        copyRange(spool, file, 0, self.position - offset)
+    else:
+      self._encodeEntry(id, entrytype, file)
+      self._flush(file)
+
+    if entrytype in _STREAM_TYPES and self.compression is None:
+      # the back-patched element count is not part of the running checksum
+      file.flush()
+      with open(self.eml_filename, 'rb') as written:
+        self.checksum = checksumRange(written, offset, self.position - offset)
+    self.entries[id] = (offset, self.position - offset, self.checksum, fingerprint)
+    pass
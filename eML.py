@@ -20,13 +20,29 @@
   See the License for the specific language governing permissions and
   limitations under the License.
 """
+from __future__ import annotations
+
 import datetime
 import os
+import stat
+import threading
+import time
 
-import numpy as np
-
+from _LazyNumpy_eML import np, isArray
 from _Write_eML import _Write_eML
-from _Read_eML import _Read_eML
+from _Read_eML import _Read_eML, peek as peekText, readIndex as readTextIndex, \
+  verify as verifyText
+from _Stats_eML import _Stats_eML
+from _Table_eML import _Table_eML
+from _Cache_eML import _Cache_eML, shared_cache
+from _Compress_eML import detectCompression, getCompression
+from _Diff_eML import _Diff_eML, isEqual
+from _FileLock_eML import _FileLock_eML, getSignature
+from _Index_eML import _WrittenStream, fingerprintValue
+from _Lock_eML import _Lock_eML
+from _SharedArrays_eML import _SharedArrays_eML, releaseSharedArrays
+import _Binary_eML
+from _Binary_eML import _Read_beML, _Write_beML
 
 
 class eML:  # ============================================================================ eML >>>
@@ -40,12 +56,67 @@ class eML:  # ==================================================================
     Containers:
       dict, list, set, tuple, and FrozenSet
   """
-  def __init__(self, eml_filename: str = None):
+  # identifier types inferred from python types by update and setMany, in the order the types are
+  # checked against subclasses
+  _inferred_types = {bool: 'bool', int: 'int', float: 'float', complex: 'complex', str: 'string',
+                     datetime.datetime: 'datetime', datetime.date: 'date', dict: 'dict',
+                     list: 'list', set: 'set', frozenset: 'frozen set', tuple: 'tuple',
+                     _Table_eML: 'table'}
+
+  # every identifier type, including those that can only be set explicitly
+  _identifier_types = set(_inferred_types.values()) | {'array', 'list stream', 'dict stream'}
+
+  def __init__(self, eml_filename: str = None, instrument: bool = False, stats_hook=None,
+               use_cache: bool = False, shared_arrays: bool = False, binary: bool = None,
+               copy_unchanged: bool = True, thread_safe: bool = False,
+               file_locking: bool = True):
     """
 
-    :param eml_filename: the eml filename holding the eml contents
+    :param eml_filename: the eml filename holding the eml contents. gzip, xz and bz2 compressed
+                         files are decompressed as they are read
+    :param instrument: collect timing and count statistics whilst loading and saving
+    :param stats_hook: optional callable handed the _Stats_eML of every load and save, setting it
+                       also turns on the instrumentation
+    :param use_cache: use the process wide cache of parsed eML files, see configureCache
+    :param shared_arrays: share the decoded arrays with other processes loading the same file
+                          through shared memory. Shared arrays are read-only, see
+                          releaseSharedMemory
+    :param binary: save in the binary beML format rather than text. None keeps the format of an
+                   existing file, and otherwise uses beML for filenames ending in .beml. Existing
+                   files are always loaded in the format they were written in
+    :param copy_unchanged: copy the entries whose value is unchanged since the file was loaded or
+                           saved rather than encoding them again on save
+    :param thread_safe: guard the getters and setters with a reader/writer lock so that the instance
+                        can be shared between threads, see _synchronize
+    :param file_locking: serialize saves of the same file by several processes through an
+                         advisory file lock, see _FileLock_eML
     """
     self.eml_filename = eml_filename
+    self.binary = binary
+    if binary is None:
+      self.binary = eml_filename is not None and self._isBinaryFilename(eml_filename)
+    self.use_cache = use_cache
+    self.shared_arrays = shared_arrays
+    self.copy_unchanged = copy_unchanged
+    self.file_locking = file_locking
+
+    # identifiers set, updated or dropped since the file was last loaded or saved. They are never
+    # copied from the file on save, see _getSource
+    self._dirty = set()
+
+    # the file most recently loaded or saved along with its signature, format, the index of its
+    # entries and whether it was written in the compact layout, the last two None until the index
+    # is read. Entries that are unchanged since are copied from it rather than encoded on save
+    self._source = None
+
+    # guards reading back the streams consumed by a save, see _readWrittenStream
+    self._decode_lock = threading.Lock()
+
+    # instrumentation of the most recent load and save, None unless instrumentation is enabled
+    self.instrument = instrument or stats_hook is not None
+    self.stats_hook = stats_hook
+    self.load_stats = None
+    self.save_stats = None
 
     # class variables
     # holds all of the eML identifiers and data as specified by the user
@@ -64,8 +135,15 @@ class eML:  # ==================================================================
     # if there is an existing eML filename that should be used
     if eml_filename is not None:
       if os.path.exists(eml_filename):
-        reml = _Read_eML(eml_filename)
-        self.eml_meta_data, self.identifiers, self.eml_data = reml.getExistingData()
+        stats = self._startStats('load', eml_filename)
+        self._load(eml_filename, stats)
+        self.load_stats = self._finishStats(stats)
+        # an explicit format overrides the format the file was loaded from
+        if binary is not None:
+          self.binary = binary
+
+    if thread_safe:
+      self._synchronize()
     pass
 
   def exists(self, name):  # ------------------------------------------------------------ exists >>
@@ -80,12 +158,174 @@ class eML:  # ==================================================================
 
   def dropIdentifier(self, name):  # ------------------------------------------- dropIdentifier >>
     """
-    Drops/Deletes the specified key from the eml_data
+    Drops/Deletes the specified identifier and its value
 
     :param name:  user supplied identifier
     """
     if self.exists(name):
-      self.eml_data.drop(name, None)
+      del self.eml_data[name]
+      del self.identifiers[name]
+      self._dirty.add(name)
+    pass
+
+  def getStats(self):  # -------------------------------------------------------------- getStats >>
+    """
+    Get the instrumentation of the most recent load and save of this eML instance. The statistics
+    are only collected when the instance was created with instrument=True or a stats_hook.
+
+    :return: dict holding the load and save _Stats_eML, either of which may be None
+    """
+    return {'load': self.load_stats, 'save': self.save_stats}
+    pass
+
+  def setStatsHook(self, stats_hook):  # ------------------------------------------ setStatsHook >>
+    """
+    Sets the callable handed the _Stats_eML of every subsequent load and save and turns on the
+    instrumentation. None removes the hook, leaving the instrumentation state unchanged.
+
+    :param stats_hook: callable taking a single _Stats_eML argument
+    """
+    self.stats_hook = stats_hook
+    if stats_hook is not None:
+      self.instrument = True
+    pass
+
+  @staticmethod
+  def clearCache():  # -------------------------------------------------------------- clearCache >>
+    """
+    Removes every file from the process wide cache of parsed eML files and resets its statistics.
+    """
+    shared_cache.clear()
+    pass
+
+  @staticmethod
+  def configureCache(max_entries: int = None, max_bytes: int = None,  # ------- configureCache >>
+                     hash_contents: bool = None):
+    """
+    Configures the process wide cache of parsed eML files used by instances created with
+    use_cache=True. Cached files are invalidated when their size or modification time changes.
+
+    :param max_entries: maximum number of parsed files held, unchanged if None
+    :param max_bytes: maximum estimated memory held by the parsed files, unchanged if None
+    :param hash_contents: also invalidate on a change to the hash of the file contents, unchanged
+                          if None
+    """
+    shared_cache.configure(max_entries, max_bytes, hash_contents)
+    pass
+
+  @staticmethod
+  def releaseSharedMemory(unlink: bool = False,  # ------------------------- releaseSharedMemory >>
+                          eml_filenames: list = None):
+    """
+    Closes the shared memory blocks holding the arrays shared by eML instances created with
+    shared_arrays=True. Blocks still referenced by an array are left open.
+
+    :param unlink: also remove the blocks this process created
+    :param eml_filenames: also remove the blocks of the arrays of these existing eml or beML files,
+                          whichever process created them. This is normally done once by the
+                          process that owns the worker pool when the arrays are no longer needed,
+                          before the files are changed as the blocks are found from the current
+                          version of each file
+    :return: number of blocks that were closed
+    """
+    for eml_filename in eml_filenames or list():
+      identifiers = eML.peek(eml_filename)[1]
+      arrays = [identifier for identifier, identifiertype in identifiers.items()
+                if identifiertype == 'array']
+      _SharedArrays_eML(eml_filename).unlinkArrays(arrays)
+    return releaseSharedArrays(unlink)
+    pass
+
+  @staticmethod
+  def getCacheStats():  # -------------------------------------------------------- getCacheStats >>
+    """
+    :return: dict of the hit, miss, eviction and invalidation counts of the process wide cache
+    """
+    return shared_cache.getStats()
+    pass
+
+  @staticmethod
+  def peek(eml_filename: str):  # --------------------------------------------------------- peek >>
+    """
+    Gets the header meta data and the identifiers of an existing eML file without loading it.
+    None of the values are decoded, text files only have the head of each top level line read and
+    beML files only have their header and trailing index read.
+
+    :param eml_filename: the existing eml or beML filename
+    :return: dict of the header meta data (version, lamguage, creation date and last update), dict
+             of each identifier and its data type
+    """
+    if _Binary_eML.isBinary(eml_filename):
+      return _Binary_eML.peek(eml_filename)
+    return peekText(eml_filename)
+    pass
+
+  @staticmethod
+  def verify(eml_filename: str):  # ----------------------------------------------------- verify >>
+    """
+    Checks every entry of an existing eML file against the checksum stored for it when it was
+    written. The raw bytes of the entries are checksummed, none of the values are decoded.
+
+    :param eml_filename: the existing eml or beML filename
+    :return: list of the identifiers of the corrupted entries, empty if the file is intact
+    """
+    if _Binary_eML.isBinary(eml_filename):
+      return _Binary_eML.verify(eml_filename)
+    return verifyText(eml_filename)
+    pass
+
+  @staticmethod
+  def diff(a_filename: str, b_filename: str):  # ------------------------------------------ diff >>
+    """
+    Finds the differences between two existing eML files. The top level entries are compared by
+    the checksums held for them in the index of each file and only the entries that differ are
+    decoded, so the cost follows the size of the changes rather than the size of the files.
+
+    :param a_filename: the existing eml or beML filename compared against
+    :param b_filename: the existing eml or beML filename compared
+    :return: list of (path, change, a value, b value) tuples. The path is a tuple of the identifier
+             followed by the keys of nested dicts and the indices of nested lists of equal length,
+             the change is added, removed or changed
+    """
+    return _Diff_eML(a_filename, b_filename).changes
+    pass
+
+  @staticmethod
+  def merge(base_filename: str, ours_filename: str, theirs_filename: str):  # ------------ merge >>
+    """
+    Merges the changes made to two copies of an eML file. The changes theirs made to base are
+    applied to ours, a change to a path that ours also changed, or that lies within or holds a path
+    that ours changed, is a conflict and the value of ours is kept. Only the entries differing from
+    base are decoded to find the changes, see diff.
+
+    :param base_filename: the existing eml or beML filename both copies were edited from
+    :param ours_filename: the existing eml or beML filename the changes are applied to
+    :param theirs_filename: the existing eml or beML filename holding the changes to be applied
+    :return: the merged eML, which has no filename and is written with saveAs, and the list of the
+             conflicting paths
+    """
+    ours = _Diff_eML(base_filename, ours_filename)
+    theirs = _Diff_eML(base_filename, theirs_filename)
+
+    # the paths changed by ours, and every path holding one of them
+    ours_changes = {change[0]: change for change in ours.changes}
+    ours_paths = {path[:length] for path in ours_changes for length in range(1, len(path) + 1)}
+
+    merged = eML(ours_filename)
+    # the merge must not be saved over ours by accident
+    merged.eml_filename = None
+
+    conflicts = list()
+    for path, change, basevalue, value in theirs.changes:
+      if path in ours_changes and ours_changes[path][1] == change \
+          and isEqual(ours_changes[path][3], value):
+        # both made the same change
+        continue
+      if path in ours_paths or any(path[:length] in ours_changes for length in range(1, len(path))):
+        conflicts.append(path)
+        continue
+      merged._applyChange(path, change, value, theirs.identifiers_b.get(path[0]))
+    return merged, conflicts
     pass
 
   def getArray(self, name):  # --------------------------------------------------- getArray >>
@@ -96,7 +336,7 @@ class eML:  # ==================================================================
     :return: barray of the identifier
     """
     if self.exists(name):
-      return self.eml_data[name]
+      return self._getValue(name)
     else:
       return None
     pass
@@ -109,7 +349,7 @@ class eML:  # ==================================================================
     :return: boolean value of the identifier
     """
     if self.exists(name):
-      return self.eml_data[name]
+      return self._getValue(name)
     else:
       return None
     pass
@@ -122,7 +362,7 @@ class eML:  # ==================================================================
     :return: Int value of the specified identifier
     """
     if self.exists(name):
-      return self.eml_data[name]
+      return self._getValue(name)
     else:
       return None
     pass
@@ -135,7 +375,7 @@ class eML:  # ==================================================================
     :return: Dict of the specified identifier
     """
     if self.exists(name):
-      return self.eml_data[name]
+      return self._getValue(name)
     else:
       return dict()
 
@@ -147,7 +387,7 @@ class eML:  # ==================================================================
     :return: Float value of the specified identifier
     """
     if self.exists(name):
-      return self.eml_data[name]
+      return self._getValue(name)
     else:
       return None
 
@@ -159,7 +399,7 @@ class eML:  # ==================================================================
     :return: Complex value of the specified identifier
     """
     if self.exists(name):
-      return self.eml_data[name]
+      return self._getValue(name)
     else:
       return None
 
@@ -171,7 +411,7 @@ class eML:  # ==================================================================
     :return: Date value of the specified identifier
     """
     if self.exists(name):
-      return self.eml_data[name]
+      return self._getValue(name)
     else:
       return None
 
@@ -183,7 +423,7 @@ class eML:  # ==================================================================
     :return: Datetime value of the specified identifier
     """
     if self.exists(name):
-      return self.eml_data[name]
+      return self._getValue(name)
     else:
       return None
 
@@ -195,7 +435,7 @@ class eML:  # ==================================================================
     :return: List of the specified identifier
     """
     if self.exists(name):
-      return self.eml_data[name]
+      return self._getValue(name)
     else:
       return list()
 
@@ -207,7 +447,7 @@ class eML:  # ==================================================================
     :return: Set of the specified identifier
     """
     if self.exists(name):
-      return self.eml_data[name]
+      return self._getValue(name)
     else:
       return set()
 
@@ -219,10 +459,25 @@ class eML:  # ==================================================================
     :return: String value of the specified identifier
     """
     if self.exists(name):
-      return self.eml_data[name]
+      return self._getValue(name)
     else:
       return None
 
+  def getTable(self, name, columns: list = None):  # ---------------------------------- getTable >>
+    """
+    Get a previously stored table within the current eML file. Only the requested columns are
+    decoded from the file.
+
+    :param name: user supplied identifier
+    :param columns: names of the columns to get, all of the columns if None
+    :return: dict of column name -> numpy array
+    """
+    if self.exists(name):
+      return self._getValue(name).getColumns(columns)
+    else:
+      return dict()
+    pass
+
   def setArray(self, identifier, value: np.ndarray):  # -------------------------------- setBoolean >>
     """
     writes an barray to the eml file
@@ -288,7 +543,7 @@ class eML:  # ==================================================================
     """
     if identifier in self.identifiers:
       raise Exception('eML error: Identifier ' + identifier + ' already exists')
-    self.identifiers[identifier] = 'bool'
+    self.identifiers[identifier] = 'datetime'
 
     self.eml_data[identifier] = value
     pass
@@ -307,6 +562,23 @@ class eML:  # ==================================================================
     self.eml_data[identifier] = dictin
     pass
 
+  def setDictStream(self, identifier, pairs):  # --------------------------------- setDictStream >>
+    """
+    Sets an iterable of key/value pairs to be output to an eML file as a dict. The pairs are written
+    to the file as they are produced when the eML file is saved, so the dict never has to be held in
+    memory. The iterable is consumed by the save, later saves copy the written dict from the file
+    and getDict reads it back from the file.
+
+    :param identifier: user specified string naming the dict for subsequent retrieval
+    :param pairs: iterable producing (key, value) tuples
+    """
+    if identifier in self.identifiers:
+      raise Exception('eML error: Identifier ' + identifier + ' already exists')
+    self.identifiers[identifier] = 'dict stream'
+
+    self.eml_data[identifier] = pairs
+    pass
+
   def setFloat(self, identifier, value: float):  # ----------------------------------- setFloat >>
     """
     writes a float value to the eml file
@@ -363,6 +635,63 @@ class eML:  # ==================================================================
     self.eml_data[identifier] = value
     pass
 
+  def setListStream(self, identifier, iterable):  # ------------------------------ setListStream >>
+    """
+    Sets an iterable to be output to an eML file as a list. The elements are written to the file as
+    they are produced when the eML file is saved, so the list never has to be held in memory. The
+    iterable is consumed by the save, later saves copy the written list from the file and getList
+    reads it back from the file.
+
+    :param identifier: user defined identifier for this list
+    :param iterable: iterable producing the elements of the list
+    """
+    if identifier in self.identifiers:
+      raise Exception('eML error: Identifier ' + identifier + ' already exists')
+    self.identifiers[identifier] = 'list stream'
+
+    self.eml_data[identifier] = iterable
+    pass
+
+  def setMany(self, mapping: dict, infer_types: bool = True):  # ----------------------- setMany >>
+    """
+    Sets many identifiers at once, replacing the values of identifiers that already exist. Every
+    value is checked before any identifier is set, so either all of them are set or none are.
+
+    :param mapping: dict of identifier -> value, or identifier -> (identifier type, value) pairs
+                    when infer_types is False
+    :param infer_types: infer the identifier type of each value from its python type, streams
+                        can only be set with an explicit identifier type
+    """
+    # the values are None whilst they are set as they are held by mapping
+    values = None
+    if infer_types:
+      # the exact python types are looked up first, _inferType is only called for the rest
+      types = list(map(self._inferred_types.get, map(type, mapping.values())))
+      if None in set(types):
+        types = [identifiertype or self._inferType(identifier, value)
+                 for (identifier, value), identifiertype in zip(mapping.items(), types)]
+    else:
+      types = [identifiertype for identifiertype, value in mapping.values()]
+      values = [value for identifiertype, value in mapping.values()]
+      for identifier, identifiertype in zip(mapping, types):
+        if identifiertype not in self._identifier_types:
+          raise Exception('eML error: Identifier ' + str(identifier) + ' has an invalid type '
+                          + repr(identifiertype))
+    identifiertypes = set(types)
+    if 'table' in identifiertypes:
+      values = [_Table_eML.fromData(value) if identifiertype == 'table' else value
+                for identifiertype, value in zip(types, values or mapping.values())]
+
+    if len(identifiertypes) == 1:
+      self.identifiers.update(dict.fromkeys(mapping, types[0]))
+    else:
+      self.identifiers.update(zip(mapping, types))
+    self.eml_data.update(mapping if values is None else zip(mapping, values))
+    # nothing is copied on save until a file has been loaded or saved, which clears the dirty set
+    if self._source is not None:
+      self._dirty.update(mapping)
+    pass
+
   def setSet(self, identifier, value: set):  # ------------------------------------------ setSet >>
     """
     Converts a set to string for output to linesout.
@@ -391,6 +720,22 @@ class eML:  # ==================================================================
     self.eml_data[identifier] = value
     pass
 
+  def setTable(self, identifier, columns_or_records):  # ------------------------------ setTable >>
+    """
+    Sets a table of record style data to be stored column-wise, one typed column per field.
+
+    :param identifier: user specified identifier naming the table for subsequent retrieval
+    :param columns_or_records: dict of column name -> sequence or one dimensional array of values,
+                               or a list of dicts sharing the same keys. The values of a column
+                               must all be bool, numeric, str, datetime or date
+    """
+    if identifier in self.identifiers:
+      raise Exception('eML error: Identifier ' + identifier + ' already exists')
+    self.identifiers[identifier] = 'table'
+
+    self.eml_data[identifier] = _Table_eML.fromData(columns_or_records)
+    pass
+
   def setTuple(self, identifier, value: tuple):  # ------------------------------------ setTuple >>
     """
     Converts a tuple to string for output to linesout.
@@ -405,31 +750,575 @@ class eML:  # ==================================================================
     self.eml_data[identifier] = value
     pass
 
-  def save(self, eml_filename: str = None):  # -------------------------------------------- save >>
+  def update(self, identifier, value):  # ----------------------------------------------- update >>
+    """
+    Sets the value of an identifier whether or not it already exists. The identifier type is
+    inferred from the python type of the value, see setMany.
+
+    :param identifier: user supplied identifier
+    :param value: the new value of the identifier
+    """
+    identifiertype = self._inferred_types.get(type(value)) or self._inferType(identifier, value)
+    if identifiertype == 'table':
+      value = _Table_eML.fromData(value)
+    self.identifiers[identifier] = identifiertype
+    self.eml_data[identifier] = value
+    self._dirty.add(identifier)
+    pass
+
+  def save(self, eml_filename: str = None, binary: bool = None,  # ------------------------ save >>
+           references: bool = False, compact_layout: bool = False):
     """
     Writes the generated eml string to the file specified and closes the file
+
+    :param eml_filename: the eml filename to write, the filename of this instance if None. Text
+                         files whose name ends in .gz, .xz or .bz2 are compressed as they are
+                         written
+    :param binary: write the binary beML format rather than text. None uses the format of this
+                   instance when eml_filename is None, and otherwise beML for filenames ending in
+                   .beml
+    :param references: write repeated long strings and containers of the text format once and
+                       refer back to them afterwards, see _Write_eML
+    :param compact_layout: start the continuation lines of the text format with a single blank
+                           rather than aligning the elements of containers, see _Write_eML
     """
     if eml_filename is None:
       if self.eml_filename is None:
         raise Exception('eML save error: no eml filename specified for write')
       else:
         eml_filename = self.eml_filename
+        if binary is None:
+          binary = self.binary
 
-    ew = _Write_eML(eml_filename, self.eml_meta_data, self.identifiers, self.eml_data)
-    ew.save()
+    self._write(eml_filename, binary, references, compact_layout)
     pass
 
-  def saveAs(self, eml_filename: str = None):  # ---------------------------------------- saveAs >>
+  def saveAs(self, eml_filename: str = None, binary: bool = None,  # -------------------- saveAs >>
+             references: bool = False, compact_layout: bool = False):
     """
     Writes the generated eml string to the file specified and closes the file
 
+    :param eml_filename: the eml filename to write, the filename of this instance if None. Text
+                         files whose name ends in .gz, .xz or .bz2 are compressed as they are
+                         written
+    :param binary: write the binary beML format rather than text. None uses the format of this
+                   instance when eml_filename is None, and otherwise beML for filenames ending in
+                   .beml
+    :param references: write repeated long strings and containers of the text format once and
+                       refer back to them afterwards, see _Write_eML
+    :param compact_layout: start the continuation lines of the text format with a single blank
+                           rather than aligning the elements of containers, see _Write_eML
     """
     if eml_filename is None:
       if self.eml_filename is None:
         raise Exception('eML save error: no eml filename specified for write')
       else:
         eml_filename = self.eml_filename
+        if binary is None:
+          binary = self.binary
+
+    self._write(eml_filename, binary, references, compact_layout)
+    pass
+
+  def refresh(self):  # ---------------------------------------------------------------- refresh >>
+    """
+    Brings this instance up to date with its file after another process has changed it, without
+    loading the whole file again. The index of the file is read and only the identifiers that were
+    added or whose entries changed since the file was loaded, saved or last refreshed are decoded.
+    Identifiers no longer in the file are dropped. Files without an index and text files written
+    with back-references are loaded again completely.
+
+    :return: list of the identifiers that were added, changed or removed
+    """
+    if self.eml_filename is None:
+      raise Exception('eML refresh error: no eml filename to refresh from')
+    eml_filename = self.eml_filename
+
+    # the index and the entries are read separately, so both are read again if the file was
+    # replaced in between. The signature is taken before reading, so a file replaced afterwards is
+    # refreshed again
+    while True:
+      signature = self._getSignature(eml_filename)
+      if signature is None:
+        raise Exception('eML refresh error: ' + eml_filename + ' does not exist')
+      if self._source is not None and self._source[:2] == (eml_filename, signature):
+        return []
+
+      binary = _Binary_eML.isBinary(eml_filename)
+      if binary:
+        index = _Binary_eML.readIndex(eml_filename)
+        references = compact_layout = False
+      else:
+        index, references, compact_layout = readTextIndex(eml_filename)
+
+      if index is None or references or any(entry[4] is None for entry in index):
+        previous_identifiers, previous_data = self.identifiers, self.eml_data
+        self._load(eml_filename, None)
+        return [identifier for identifier in {**previous_identifiers, **self.identifiers}
+                if identifier not in previous_identifiers or identifier not in self.identifiers
+                or previous_identifiers[identifier] != self.identifiers[identifier]
+                or not isEqual(previous_data[identifier], self.eml_data[identifier])]
+
+      # the checksums of the entries are compared when the index of the previous version of the
+      # file is known, otherwise the fingerprint of the value held is compared
+      previous_entries = None
+      if self._source is not None and self._source[0] == eml_filename \
+          and self._source[2] == binary:
+        previous_entries = self._source[3]
+
+      # primitives have no fingerprint, so without the previous index they are decoded and
+      # compared
+      ranges = list()
+      unverified = set()
+      for identifier, identifiertype, offset, length, checksum, fingerprint in index:
+        if self.identifiers.get(identifier) == identifiertype:
+          previous = None if previous_entries is None else previous_entries.get(identifier)
+          if previous is not None:
+            if previous[1:3] == (length, checksum):
+              continue
+          elif fingerprint is None:
+            unverified.add(identifier)
+          elif fingerprintValue(identifiertype, self.eml_data[identifier]) == fingerprint:
+            continue
+        ranges.append((offset, length))
+
+      reader = _Read_beML if binary else _Read_eML
+      reml = reader(eml_filename, ranges=ranges)
+
+      if self._getSignature(eml_filename) == signature:
+        break
+
+    identifiers = dict()
+    eml_data = dict()
+    changed = list()
+    for entry in index:
+      identifier = entry[0]
+      identifiers[identifier] = entry[1]
+      if identifier not in reml.eml_data or (identifier in unverified
+                                             and isEqual(self.eml_data[identifier],
+                                                         reml.eml_data[identifier])):
+        eml_data[identifier] = self.eml_data[identifier]
+      else:
+        eml_data[identifier] = reml.eml_data[identifier]
+        changed.append(identifier)
+    removed = [identifier for identifier in self.identifiers if identifier not in identifiers]
+
+    self.eml_meta_data.update(reml.eml_meta_data)
+    self.identifiers = identifiers
+    self.eml_data = eml_data
+    self.binary = binary
+    self._source = (eml_filename, signature, binary, {entry[0]: entry[2:] for entry in index},
+                    compact_layout)
+    return changed + removed
+    pass
+
+  @staticmethod
+  def convertToBinary(eml_filename: str, beml_filename: str):  # --------------- convertToBinary >>
+    """
+    Converts a text eML file to the binary beML format. The header meta data, identifiers and values
+    are carried over unchanged.
+
+    :param eml_filename: the existing text eML file
+    :param beml_filename: the beML file to be written
+    """
+    eML(eml_filename, binary=False).save(beml_filename, binary=True)
+    pass
+
+  @staticmethod
+  def convertToText(beml_filename: str, eml_filename: str,  # -------------------- convertToText >>
+                    compact_layout: bool = False):
+    """
+    Converts a binary beML file to the text eML format. The header meta data, identifiers and
+    values are carried over unchanged.
+
+    :param beml_filename: the existing beML file
+    :param eml_filename: the text eML file to be written
+    :param compact_layout: write the compact layout of the text format, see _Write_eML
+    """
+    eML(beml_filename, binary=True).save(eml_filename, binary=False, compact_layout=compact_layout)
+    pass
+
+  def _applyChange(self, path: tuple, change: str, value,  # ---------------------- _applyChange >>
+                   identifiertype: str):
+    """
+    Applies a single change found by diff.
+
+    :param path: path of the change, the identifier followed by nested keys and list indices
+    :param change: added, removed or changed
+    :param value: the new value, unused when the value is removed
+    :param identifiertype: data type of the identifier once the change has been applied
+    """
+    identifier = path[0]
+    self._dirty.add(identifier)
+    if len(path) == 1:
+      if change == 'removed':
+        del self.eml_data[identifier]
+        del self.identifiers[identifier]
+      else:
+        self.eml_data[identifier] = value
+        self.identifiers[identifier] = identifiertype
+      return
+
+    container = self._getValue(identifier)
+    for key in path[1:-1]:
+      container = container[key]
+    if change == 'removed':
+      del container[path[-1]]
+    else:
+      container[path[-1]] = value
+    pass
+
+  def _finishStats(self, stats: _Stats_eML):  # ----------------------------------- _finishStats >>
+    """
+    Completes the statistics of a load or save and hands them to the stats hook.
+
+    :param stats: statistics returned by _startStats, None if instrumentation is disabled
+    :return: the completed statistics
+    """
+    if stats is None:
+      return None
+
+    stats.total_time = time.perf_counter() - stats.start_time
+    if self.stats_hook is not None:
+      self.stats_hook(stats)
+    return stats
+    pass
+
+  def _startStats(self, operation: str, eml_filename: str):  # --------------------- _startStats >>
+    """
+    Creates the statistics for a load or save when instrumentation is enabled.
+
+    :param operation: load or save
+    :param eml_filename: the eml filename being loaded or saved
+    :return: a new _Stats_eML, None if instrumentation is disabled
+    """
+    if not self.instrument:
+      return None
+
+    return _Stats_eML(operation, eml_filename)
+    pass
+
+  def _getValue(self, name):  # ------------------------------------------------------ _getValue >>
+    """
+    Gets the value of an identifier. Values loaded through the process wide cache are copies
+    owned by this instance, arrays are read-only views of the cached arrays.
+
+    :param name: user supplied identifier
+    :return: value of the identifier
+    """
+    value = self.eml_data[name]
+    if isinstance(value, _WrittenStream):
+      value = self._readWrittenStream(name, value)
+    return value
+    pass
+
+  def _load(self, eml_filename: str, stats: _Stats_eML):  # ------------------------------ _load >>
+    """
+    Loads an existing eML file, through the process wide cache when use_cache is set.
+
+    :param eml_filename: the eml filename to be loaded
+    :param stats: statistics of the load, None if instrumentation is disabled
+    """
+    shared_arrays = _SharedArrays_eML(eml_filename) if self.shared_arrays else None
+    self._dirty = set()
+
+    # the signature is taken before reading, so a file changed whilst being read is never copied
+    # from
+    source_signature = self._getSignature(eml_filename)
+
+    # the format of an existing file is always detected from its contents, not its filename
+    if _Binary_eML.isBinary(eml_filename):
+      reader = _Read_beML
+      self.binary = True
+    else:
+      reader = _Read_eML
+      self.binary = False
+
+    if not self.use_cache:
+      reml = reader(eml_filename, stats, shared_arrays)
+      self.eml_meta_data, self.identifiers, self.eml_data = reml.getExistingData()
+      self._source = (eml_filename, source_signature, self.binary, reml.entries,
+                      not self.binary and reml.compact_layout)
+      return
+
+    cached = shared_cache.get(eml_filename)
+    if cached is not None:
+      if stats is not None:
+        stats.count('cache hits')
+      self.eml_meta_data, self.identifiers, self.eml_data = cached
+      # the index is only read once an entry is copied from the file
+      self._source = (eml_filename, source_signature, self.binary, None, None)
+    else:
+      signature = shared_cache.getSignature(eml_filename)
+      reml = reader(eml_filename, stats, shared_arrays)
+      eml_meta_data, identifiers, eml_data = reml.getExistingData()
+      self._source = (eml_filename, source_signature, self.binary, reml.entries,
+                      not self.binary and reml.compact_layout)
+      shared_cache.put(eml_filename, signature, eml_meta_data, identifiers, eml_data)
+      self.eml_meta_data, self.identifiers, self.eml_data = eml_meta_data, identifiers, eml_data
+    pass
+
+  def _getSignature(self, eml_filename: str):  # --------------------------------- _getSignature >>
+    """
+    Gets the signature used to detect that a file has changed since it was loaded or saved.
+
+    :param eml_filename: the eml filename
+    :return: (device, inode, size, mtime), None if the file does not exist
+    """
+    return getSignature(eml_filename)
+    pass
+
+  def _getSnapshot(self):  # ------------------------------------------------------ _getSnapshot >>
+    """
+    Gets the entries to be written by a save and starts recording the identifiers changed after
+    it. The entries of a thread safe instance are copied whilst reading, see _synchronize.
+
+    :return: eml_meta_data, identifiers, eml_data and the identifiers changed since the last load
+             or save
+    """
+    dirty = self._dirty
+    self._dirty = set()
+    return self.eml_meta_data, self.identifiers, self.eml_data, dirty
+    pass
+
+  def _getSource(self, binary: bool, references: bool, dirty: set,  # --------------- _getSource >>
+                 compact_layout: bool):
+    """
+    Gets the file unchanged entries can be copied from whilst saving. Entries are only copied from
+    the file most recently loaded or saved when it has not changed since and is in the format being
+    written. The identifiers set, updated or dropped since are never copied. The rest are copied
+    when their fingerprint is unchanged, as their values may have been changed in place.
+
+    :param binary: True if the beML format is being written
+    :param references: True if back-references of the text format are being written
+    :param dirty: identifiers set, updated or dropped since the file was loaded or saved
+    :param compact_layout: True if the compact layout of the text format is being written
+    :return: source file opened in binary mode and the index of its entries, None and None if
+             there is no source. The source file must be closed by the caller
+    """
+    if self._source is None or not self.copy_unchanged:
+      return None, None
+    source_filename, signature, source_binary, entries, source_layout = self._source
+    if source_binary != binary or (references and not binary):
+      return None, None
+    if signature is None or self._getSignature(source_filename) != signature:
+      return None, None
+
+    # the opened file is checked rather than its name, so the entries are copied from the version
+    # of the file the index belongs to even if the file is replaced whilst saving
+    try:
+      source = open(source_filename, 'rb')
+    except OSError:
+      return None, None
+    if getSignature(source.fileno()) != signature or detectCompression(source) is not None:
+      # the offsets of the index of a compressed file are those of its decompressed text
+      source.close()
+      return None, None
+
+    if entries is None:
+      # the index of a loaded beML file, or of a file taken from the cache, is only read once it
+      # is needed
+      if source_binary:
+        index = _Binary_eML.readIndex(source_filename)
+        source_layout = False
+      else:
+        index, source_references, source_layout = readTextIndex(source_filename)
+      entries = {entry[0]: entry[2:] for entry in index or list()}
+      if self._getSignature(source_filename) != signature:
+        # the index was read from a newer version of the file
+        source.close()
+        return None, None
+      self._source = (source_filename, signature, source_binary, entries, source_layout)
+    if not binary and source_layout != compact_layout:
+      # the copied entries would keep the layout they were written in
+      source.close()
+      return None, None
+    if len(dirty) > 0:
+      entries = {identifier: entry for identifier, entry in entries.items()
+                 if identifier not in dirty}
+    if len(entries) == 0:
+      source.close()
+      return None, None
+    return source, entries
+    pass
+
+  def _inferType(self, identifier, value):  # --------------------------------------- _inferType >>
+    """
+    Infers the identifier type of a value from its python type. bool is checked before int and
+    datetime before date, as each is a subclass of the other.
+
+    :param identifier: user supplied identifier, used in the error raised
+    :param value: the value
+    :return: the identifier type
+    """
+    identifiertype = self._inferred_types.get(type(value))
+    if identifiertype is not None:
+      return identifiertype
+    if isArray(value):
+      return 'array'
+    for datatype, identifiertype in self._inferred_types.items():
+      if isinstance(value, datatype):
+        return identifiertype
+    raise Exception('eML error: Identifier ' + str(identifier) + ' has a value of type '
+                    + type(value).__name__ + ' that no identifier type can be inferred from')
+    pass
+
+  def _isBinaryFilename(self, eml_filename: str):  # ------------------------- _isBinaryFilename >>
+    """
+    Determines the format used for a filename when it is not specified.
+
+    :param eml_filename: the eml filename
+    :return: True for filenames ending in .beml, or .beml followed by a compression extension,
+             False otherwise
+    """
+    if getCompression(eml_filename) is not None:
+      eml_filename = os.path.splitext(eml_filename)[0]
+    return eml_filename.lower().endswith('.beml')
+    pass
+
+  def _readWrittenStream(self, name, stream: _WrittenStream):  # ------------ _readWrittenStream >>
+    """
+    Reads back a list or dict stream consumed by a save from the file it was saved to. The stream
+    is replaced by the list or dict read.
+
+    :param name: user supplied identifier
+    :param stream: stands in for the consumed stream
+    :return: the list or dict written by the stream
+    """
+    # getters of thread safe instances only hold the read lock, see _synchronize
+    with self._decode_lock:
+      if self.eml_data[name] is not stream:
+        # another thread read the stream back whilst this one waited for the lock
+        return self.eml_data[name]
+      if self._getSignature(stream.eml_filename) != stream.signature:
+        raise Exception('eML error: the stream ' + str(name) + ' was consumed when it was saved to '
+                        + stream.eml_filename + ', which has changed since')
+      reader = _Read_beML if stream.binary else _Read_eML
+      value = reader(stream.eml_filename).getExistingData()[2][name]
+      self.identifiers[name] = 'list' if self.identifiers[name] == 'list stream' else 'dict'
+      self.eml_data[name] = value
+    return value
+    pass
+
+  def _synchronize(self):  # ------------------------------------------------------ _synchronize >>
+    """
+    Wraps the methods of this instance in a reader/writer lock so that it can be shared between
+    threads. This is only called for thread safe instances, so other instances have no locking
+    overhead. The getters read in parallel whilst the setters, update, dropIdentifier and refresh
+    write exclusively. A save only reads whilst it takes a shallow copy of the entries and
+    serializes the copy without holding the lock, saves are serialized one at a time.
+
+    The getters change the instance when they decode the columns of a table or read back a
+    consumed stream, these are guarded by the lock of the table and by _decode_lock rather than by
+    the write lock. The values handed out by the getters are shared with the instance, changing
+    them in place is not guarded by the lock.
+    """
+    lock = _Lock_eML()
+    save_lock = threading.Lock()
+
+    def reading(method):
+      def lockedRead(*args, **kwargs):
+        lock.acquireRead()
+        try:
+          return method(*args, **kwargs)
+        finally:
+          lock.release()
+      return lockedRead
+
+    def writing(method):
+      def lockedWrite(*args, **kwargs):
+        lock.acquireWrite()
+        try:
+          return method(*args, **kwargs)
+        finally:
+          lock.release()
+      return lockedWrite
+
+    for name, attribute in vars(eML).items():
+      if isinstance(attribute, staticmethod) or name.startswith('_'):
+        continue
+      if name.startswith('get') or name == 'exists':
+        setattr(self, name, reading(getattr(self, name)))
+      elif name.startswith('set') or name in ('dropIdentifier', 'refresh', 'update'):
+        setattr(self, name, writing(getattr(self, name)))
+
+    get_snapshot = self._getSnapshot
+    write = self._write
+
+    def copiedSnapshot():
+      eml_meta_data, identifiers, eml_data, dirty = get_snapshot()
+      return dict(eml_meta_data), dict(identifiers), dict(eml_data), dirty
+
+    def serializedWrite(*args, **kwargs):
+      with save_lock:
+        return write(*args, **kwargs)
+
+    self._getSnapshot = reading(copiedSnapshot)
+    self._write = serializedWrite
+    pass
+
+  def _write(self, eml_filename: str, binary: bool, references: bool = False,  # -------- _write >>
+             compact_layout: bool = False):
+    """
+    Writes all of the entries to a file. The file is written alongside the eml filename and renamed
+    over it once complete, so other processes never read a partly written file, and other
+    processes saving the same file wait for this save to complete, see _FileLock_eML.
+
+    :param eml_filename: the eml filename to write, compressed by its extension, see _Compress_eML
+    :param binary: write the binary beML format, None uses the filename to decide
+    :param references: write back-references, only supported by the text format
+    :param compact_layout: write the compact layout, only supported by the text format
+    """
+    if binary is None:
+      binary = self._isBinaryFilename(eml_filename)
+    compression = getCompression(eml_filename)
+    if binary and compression is not None:
+      raise Exception('eML save error: beML files are read in place and can not be compressed, '
+                      + eml_filename)
+
+    # a symbolic link is saved through, the file it points to is replaced rather than the link
+    target_filename = os.path.realpath(eml_filename)
+    lock = _FileLock_eML(target_filename)
+    if self.file_locking:
+      lock.acquire()
+    written_filename = target_filename + '.' + str(os.getpid()) + '-' \
+                       + str(threading.get_ident()) + '.tmp'
+    source = None
+    stats = self._startStats('save', eml_filename)
+    try:
+      eml_meta_data, identifiers, eml_data, dirty = self._getSnapshot()
+      source, source_entries = self._getSource(binary, references, dirty, compact_layout)
+      if binary:
+        ew = _Write_beML(written_filename, eml_meta_data, identifiers, eml_data, stats, source,
+                         source_entries)
+      else:
+        ew = _Write_eML(written_filename, eml_meta_data, identifiers, eml_data, stats, references,
+                        source, source_entries, compact_layout, compression)
+      ew.save()
+      if os.path.exists(target_filename):
+        os.chmod(written_filename, stat.S_IMODE(os.stat(target_filename).st_mode))
+      os.replace(written_filename, target_filename)
+      signature = self._getSignature(eml_filename)
+    finally:
+      if source is not None:
+        source.close()
+      lock.release()
+      if os.path.exists(written_filename):
+        os.remove(written_filename)
+    shared_cache.invalidate(eml_filename)
+    self._source = (eml_filename, signature, binary, ew.entries, not binary and compact_layout)
+    for identifier, identifiertype in identifiers.items():
+      if identifiertype in ('list stream', 'dict stream') \
+          and self.eml_data.get(identifier) is eml_data[identifier]:
+        # the save consumed the stream, later saves copy it from the file and getters read it back
+        self.eml_data[identifier] = _WrittenStream(eml_filename, signature, binary)
+    self.save_stats = self._finishStats(stats)
+    pass
+
+
+if __name__ == "__main__":
+  # the command line, see _Cli_eML, is only imported when run as python -m eML
+  import sys
+  from _Cli_eML import main
 
-    ew = _Write_eML(eml_filename, self.eml_meta_data, self.identifiers, self.eml_data)
-    ew.save()
-    pass
\ No newline at end of file
+  sys.exit(main())